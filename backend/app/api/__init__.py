@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.routes import auth, agents, calls, campaigns, stats, contacts, admin, recordings, asterisk_config
+from app.api.routes import auth, agents, calls, campaigns, stats, contacts, admin, recordings, asterisk_config, dnc, reports
 
 api_router = APIRouter()
 
@@ -11,4 +11,6 @@ api_router.include_router(campaigns.router)
 api_router.include_router(stats.router)
 api_router.include_router(contacts.router)
 api_router.include_router(admin.router)
-api_router.include_router(asterisk_config.router)
\ No newline at end of file
+api_router.include_router(asterisk_config.router)
+api_router.include_router(dnc.router)
+api_router.include_router(reports.router)
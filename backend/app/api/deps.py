@@ -1,17 +1,17 @@
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.security import decode_access_token
+from app.services.session_cache import session_cache
 from typing import Optional
 
 # Shared HTTP bearer security scheme - auto_error=False to handle missing tokens gracefully
 security = HTTPBearer(auto_error=False)
 
 
-async def get_current_agent_id(
-	request: Request,
+async def get_token_claims(
 	credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-) -> int:
-	"""Extract agent_id from JWT token for protected routes"""
+) -> dict:
+	"""Decode the JWT and check its session is still open (agent_id, session_id, is_admin claims)"""
 	if not credentials:
 		raise HTTPException(
 			status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,5 +36,24 @@ async def get_current_agent_id(
 			headers={"WWW-Authenticate": "Bearer"},
 		)
 	
-	return agent_id
+	if not await session_cache.verify(payload.get("session_id"), agent_id, payload.get("is_admin")):
+		raise HTTPException(
+			status_code=status.HTTP_401_UNAUTHORIZED,
+			detail="Session expired or revoked",
+			headers={"WWW-Authenticate": "Bearer"},
+		)
+	
+	return payload
+
+
+async def get_current_agent_id(claims: dict = Depends(get_token_claims)) -> int:
+	"""Extract agent_id from JWT token for protected routes"""
+	return claims["agent_id"]
+
+
+async def require_admin(claims: dict = Depends(get_token_claims)) -> int:
+	"""agent_id of the caller for admin-only routes, authorized from the token's is_admin claim"""
+	if not claims.get("is_admin"):
+		raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+	return claims["agent_id"]
 
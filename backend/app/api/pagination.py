@@ -0,0 +1,49 @@
+"""
+Keyset (cursor) pagination helpers
+Cursors encode the (timestamp, id) of the last row of a page so the next page
+can seek directly through a composite index instead of using OFFSET
+"""
+import base64
+import json
+import logging
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy.orm import Query, Session
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(timestamp: Optional[datetime], row_id: int) -> str:
+    """Encode the sort key of the last row on a page into an opaque cursor"""
+    payload = json.dumps([timestamp.isoformat() if timestamp else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Decode a cursor produced by encode_cursor, raising 400 on malformed input"""
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return (datetime.fromisoformat(timestamp) if timestamp else None), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def estimate_count(db: Session, query: Query) -> Optional[int]:
+    """
+    Estimate the number of rows a query would return using the PostgreSQL planner
+    This avoids COUNT(*) over large tables; returns None on other databases
+    """
+    if db.bind is None or db.bind.dialect.name != 'postgresql':
+        return None
+    try:
+        compiled = query.statement.compile(dialect=db.bind.dialect)
+        plan = db.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.debug(f"Could not estimate row count: {e}")
+        return None
@@ -4,13 +4,19 @@ from sqlalchemy import func, case
 from typing import List
 from datetime import datetime, timezone
 from app.core.database import get_db
-from app.core.security import get_password_hash
 from app.models.agent import Agent
 from app.models.call import Call, CallDirection, CallStatus
 from app.models.campaign import Campaign, CampaignStatus, DialMethod
 from app.schemas.agent import AgentCreate, AgentUpdate
 from app.schemas.campaign import CampaignCreate, CampaignResponse, CampaignList
-from app.api.deps import get_current_agent_id
+from app.api.deps import require_admin
+from app.services.predictive_dialer import predictive_dialer
+from app.services.agent_stats import agent_stats, average_duration
+from app.services.stats_cache import stats_cache, ADMIN_STATS_ALL_KEY, ADMIN_STATS_SUMMARY_KEY
+from app.services.websocket_manager import websocket_manager
+from app.services.session_cache import session_cache
+from app.services.password_hasher import password_hasher
+from app.services.login_throttle import login_throttle
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,21 +24,12 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
 
-def check_admin(db: Session, agent_id: int):
-    """Check if agent is admin"""
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
-    if not agent or agent.is_admin != 1:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    return agent
-
-
 @router.get("/agents")
 async def list_all_agents(
     db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """List all agents (admin only)"""
-    check_admin(db, agent_id)
     
     try:
         agents = db.query(Agent).order_by(Agent.created_at.desc()).all()
@@ -57,10 +54,9 @@ async def list_all_agents(
 async def create_agent(
     agent_data: AgentCreate,
     db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """Create a new agent (admin only)"""
-    check_admin(db, agent_id)
     
     try:
         # Check if username already exists
@@ -74,7 +70,7 @@ async def create_agent(
             raise HTTPException(status_code=400, detail="Phone extension already exists")
         
         # Hash password
-        password_hash = get_password_hash(agent_data.password)
+        password_hash = await password_hasher.hash(agent_data.password)
         
         # Create new agent
         new_agent = Agent(
@@ -113,15 +109,15 @@ async def update_agent(
     agent_id: int,
     agent_update: AgentUpdate,
     db: Session = Depends(get_db),
-    current_agent_id: int = Depends(get_current_agent_id)
+    current_agent_id: int = Depends(require_admin)
 ):
     """Update an agent (admin only)"""
-    check_admin(db, current_agent_id)
     
     try:
         agent = db.query(Agent).filter(Agent.id == agent_id).first()
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
+        previous_is_admin = agent.is_admin
         
         # Check if username is being changed and already exists
         if agent_update.username and agent_update.username != agent.username:
@@ -142,12 +138,18 @@ async def update_agent(
             agent.full_name = agent_update.full_name
         
         if agent_update.password:
-            agent.password_hash = get_password_hash(agent_update.password)
+            agent.password_hash = await password_hasher.hash(agent_update.password)
         
         if agent_update.is_admin is not None:
             agent.is_admin = agent_update.is_admin
         
+        # A new password or role signs the agent out everywhere (tokens carry the role)
+        revoked = []
+        if agent_update.password or agent.is_admin != previous_is_admin:
+            revoked = session_cache.close_sessions(db, agent.id)
+        
         db.commit()
+        await session_cache.revoke(revoked)
         db.refresh(agent)
         
         return {
@@ -168,94 +170,96 @@ async def update_agent(
         raise HTTPException(status_code=500, detail="Error updating agent")
 
 
-@router.get("/stats/all")
-async def get_all_agents_stats(
-    db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
-):
-    """Get statistics for all agents (admin only) - OPTIMIZED"""
-    check_admin(db, agent_id)
+def compute_all_agents_stats(db: Session) -> list:
+    """Today's per-agent statistics (cached by the /stats/all route)"""
+    # Use timezone-aware datetime
+    now = datetime.now(timezone.utc)
+    
+    # First, get all agents
+    all_agents = db.query(Agent).all()
+    
+    # Today's counters, one row per agent that has finished a call today
+    counters_by_agent = agent_stats.get_day_all(db, now.date())
+    
+    # Build stats list with all agents (including those with no calls)
+    stats = []
+    for agent in all_agents:
+        counters = counters_by_agent.get(agent.id)
+        inbound_calls = (counters.inbound_calls or 0) if counters else 0
+        outbound_calls = (counters.outbound_calls or 0) if counters else 0
+        total_calls = (counters.total_calls or 0) if counters else 0
+        abandoned_calls = (counters.missed_calls or 0) if counters else 0
+        stats.append({
+            "agent_id": agent.id,
+            "username": agent.username,
+            "full_name": agent.full_name or agent.username,
+            "status": agent.status,
+            "inbound_calls": inbound_calls,
+            "outbound_calls": outbound_calls,
+            "total_calls": total_calls,
+            "abandoned_calls": abandoned_calls,
+            "avg_call_duration": average_duration(counters),
+            "answer_rate": round(((total_calls - abandoned_calls) / total_calls * 100) if total_calls > 0 else 0, 2)
+        })
     
+    return stats
+
+
+def compute_summary_stats(db: Session) -> dict:
+    """Today's call centre totals (cached by the /stats/summary route)"""
     # Use timezone-aware datetime
     now = datetime.now(timezone.utc)
     today = now.date()
     today_start = datetime.combine(today, datetime.min.time()).replace(tzinfo=timezone.utc)
     
+    # Optimized: Single query for all call statistics
+    call_stats = db.query(
+        func.count(case((Call.direction == CallDirection.INBOUND, Call.id))).label('inbound'),
+        func.count(case((Call.direction == CallDirection.OUTBOUND, Call.id))).label('outbound'),
+        func.count(case((
+            Call.status.in_([CallStatus.NO_ANSWER, CallStatus.BUSY, CallStatus.FAILED]),
+            Call.id
+        ))).label('abandoned')
+    ).filter(
+        Call.start_time >= today_start
+    ).first()
+    
+    total_inbound = call_stats.inbound or 0
+    total_outbound = call_stats.outbound or 0
+    total_calls = total_inbound + total_outbound
+    total_abandoned = call_stats.abandoned or 0
+    
+    # Agent counts
+    agent_counts = db.query(
+        func.count(case((
+            Agent.status.in_(["available", "in_call", "paused"]),
+            Agent.id
+        ))).label('active'),
+        func.count(Agent.id).label('total')
+    ).first()
+    
+    active_agents = agent_counts.active or 0
+    total_agents = agent_counts.total or 0
+    
+    return {
+        "total_inbound_calls": total_inbound,
+        "total_outbound_calls": total_outbound,
+        "total_calls": total_calls,
+        "total_abandoned_calls": total_abandoned,
+        "active_agents": active_agents,
+        "total_agents": total_agents,
+        "overall_answer_rate": round(((total_calls - total_abandoned) / total_calls * 100) if total_calls > 0 else 0, 2)
+    }
+
+
+@router.get("/stats/all")
+async def get_all_agents_stats(
+    agent_id: int = Depends(require_admin)
+):
+    """Get statistics for all agents (admin only), from the agent_performance daily counters"""
+    
     try:
-        # First, get all agents
-        all_agents = db.query(Agent).all()
-        
-        # Get stats for agents with calls (today only)
-        stats_query = db.query(
-            Agent.id,
-            Agent.username,
-            Agent.full_name,
-            Agent.status,
-            # Count inbound calls
-            func.count(case((Call.direction == CallDirection.INBOUND, Call.id))).label('inbound_calls'),
-            # Count outbound calls
-            func.count(case((Call.direction == CallDirection.OUTBOUND, Call.id))).label('outbound_calls'),
-            # Count total calls
-            func.count(Call.id).label('total_calls'),
-            # Count abandoned calls
-            func.count(case((
-                Call.status.in_([CallStatus.NO_ANSWER, CallStatus.BUSY, CallStatus.FAILED]),
-                Call.id
-            ))).label('abandoned_calls'),
-            # Average call duration
-            func.avg(case((Call.duration > 0, Call.duration))).label('avg_duration')
-        ).outerjoin(
-            Call, 
-            (Call.agent_id == Agent.id) & (Call.start_time >= today_start)
-        ).group_by(
-            Agent.id,
-            Agent.username,
-            Agent.full_name,
-            Agent.status
-        ).all()
-        
-        # Create a dictionary of stats by agent_id
-        stats_by_agent = {}
-        for row in stats_query:
-            total_calls = row.total_calls or 0
-            abandoned_calls = row.abandoned_calls or 0
-            inbound_calls = row.inbound_calls or 0
-            outbound_calls = row.outbound_calls or 0
-            
-            stats_by_agent[row.id] = {
-                "agent_id": row.id,
-                "username": row.username,
-                "full_name": row.full_name or row.username,
-                "status": row.status,
-                "inbound_calls": inbound_calls,
-                "outbound_calls": outbound_calls,
-                "total_calls": total_calls,
-                "abandoned_calls": abandoned_calls,
-                "avg_call_duration": int(row.avg_duration) if row.avg_duration else 0,
-                "answer_rate": round(((total_calls - abandoned_calls) / total_calls * 100) if total_calls > 0 else 0, 2)
-            }
-        
-        # Build stats list with all agents (including those with no calls)
-        stats = []
-        for agent in all_agents:
-            if agent.id in stats_by_agent:
-                stats.append(stats_by_agent[agent.id])
-            else:
-                # Agent with no calls today
-                stats.append({
-                    "agent_id": agent.id,
-                    "username": agent.username,
-                    "full_name": agent.full_name or agent.username,
-                    "status": agent.status,
-                    "inbound_calls": 0,
-                    "outbound_calls": 0,
-                    "total_calls": 0,
-                    "abandoned_calls": 0,
-                    "avg_call_duration": 0,
-                    "answer_rate": 0
-                })
-        
-        return stats
+        return await stats_cache.get_or_compute(ADMIN_STATS_ALL_KEY, compute_all_agents_stats)
     except Exception as e:
         logger.error(f"Error fetching agent stats: {e}")
         raise HTTPException(status_code=500, detail="Error fetching statistics")
@@ -263,69 +267,64 @@ async def get_all_agents_stats(
 
 @router.get("/stats/summary")
 async def get_summary_stats(
-    db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """Get overall summary statistics (admin only) - OPTIMIZED"""
-    check_admin(db, agent_id)
-    
-    # Use timezone-aware datetime
-    now = datetime.now(timezone.utc)
-    today = now.date()
-    today_start = datetime.combine(today, datetime.min.time()).replace(tzinfo=timezone.utc)
     
     try:
-        # Optimized: Single query for all call statistics
-        call_stats = db.query(
-            func.count(case((Call.direction == CallDirection.INBOUND, Call.id))).label('inbound'),
-            func.count(case((Call.direction == CallDirection.OUTBOUND, Call.id))).label('outbound'),
-            func.count(case((
-                Call.status.in_([CallStatus.NO_ANSWER, CallStatus.BUSY, CallStatus.FAILED]),
-                Call.id
-            ))).label('abandoned')
-        ).filter(
-            Call.start_time >= today_start
-        ).first()
-        
-        total_inbound = call_stats.inbound or 0
-        total_outbound = call_stats.outbound or 0
-        total_calls = total_inbound + total_outbound
-        total_abandoned = call_stats.abandoned or 0
-        
-        # Agent counts
-        agent_counts = db.query(
-            func.count(case((
-                Agent.status.in_(["available", "in_call", "paused"]),
-                Agent.id
-            ))).label('active'),
-            func.count(Agent.id).label('total')
-        ).first()
-        
-        active_agents = agent_counts.active or 0
-        total_agents = agent_counts.total or 0
-        
-        return {
-            "total_inbound_calls": total_inbound,
-            "total_outbound_calls": total_outbound,
-            "total_calls": total_calls,
-            "total_abandoned_calls": total_abandoned,
-            "active_agents": active_agents,
-            "total_agents": total_agents,
-            "overall_answer_rate": round(((total_calls - total_abandoned) / total_calls * 100) if total_calls > 0 else 0, 2)
-        }
+        return await stats_cache.get_or_compute(ADMIN_STATS_SUMMARY_KEY, compute_summary_stats)
     except Exception as e:
         logger.error(f"Error fetching summary stats: {e}")
         raise HTTPException(status_code=500, detail="Error fetching summary statistics")
 
 
+@router.get("/cache/stats")
+async def get_stats_cache_metrics(
+    agent_id: int = Depends(require_admin)
+):
+    """Get hit/miss counters for the stats response cache (admin only)"""
+    return stats_cache.get_metrics()
+
+
+@router.get("/ws/stats")
+async def get_websocket_metrics(
+    agent_id: int = Depends(require_admin)
+):
+    """Get send queue depth, latency and eviction counters for WebSocket clients (admin only)"""
+    return websocket_manager.get_metrics()
+
+
+@router.get("/sessions/stats")
+async def get_session_cache_metrics(
+    agent_id: int = Depends(require_admin)
+):
+    """Get hit/miss and revocation counters for the verified-session cache (admin only)"""
+    return session_cache.get_metrics()
+
+
+@router.get("/login/stats")
+async def get_login_metrics(
+    agent_id: int = Depends(require_admin)
+):
+    """Get password hashing pool and login throttling counters (admin only)"""
+    return {"hasher": password_hasher.get_metrics(), "throttle": login_throttle.get_metrics()}
+
+
+@router.get("/predictive/stats")
+async def get_predictive_stats(
+    agent_id: int = Depends(require_admin)
+):
+    """Get live pacing figures for predictive campaigns (admin only)"""
+    return {"campaigns": predictive_dialer.get_stats()}
+
+
 # Campaign CRUD endpoints
 @router.get("/campaigns", response_model=CampaignList)
 async def list_all_campaigns(
     db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """List all campaigns (admin only)"""
-    check_admin(db, agent_id)
     
     campaigns = db.query(Campaign).order_by(Campaign.created_at.desc()).all()
     return CampaignList(campaigns=[CampaignResponse.model_validate(c) for c in campaigns])
@@ -335,10 +334,9 @@ async def list_all_campaigns(
 async def create_campaign(
     campaign: CampaignCreate,
     db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """Create a new campaign (admin only)"""
-    check_admin(db, agent_id)
     
     # Check if code already exists
     existing = db.query(Campaign).filter(Campaign.code == campaign.code).first()
@@ -350,7 +348,13 @@ async def create_campaign(
         code=campaign.code,
         description=campaign.description,
         status=campaign.status.value,
-        dial_method=campaign.dial_method.value
+        dial_method=campaign.dial_method.value,
+        max_attempts=campaign.max_attempts,
+        retry_no_answer_minutes=campaign.retry_no_answer_minutes,
+        retry_busy_minutes=campaign.retry_busy_minutes,
+        retry_failed_minutes=campaign.retry_failed_minutes,
+        call_window_start=campaign.call_window_start,
+        call_window_end=campaign.call_window_end
     )
     db.add(db_campaign)
     db.commit()
@@ -363,10 +367,9 @@ async def update_campaign(
     campaign_id: int,
     campaign: CampaignCreate,
     db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """Update a campaign (admin only)"""
-    check_admin(db, agent_id)
     
     db_campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
     if not db_campaign:
@@ -383,6 +386,12 @@ async def update_campaign(
     db_campaign.description = campaign.description
     db_campaign.status = campaign.status.value
     db_campaign.dial_method = campaign.dial_method.value
+    db_campaign.max_attempts = campaign.max_attempts
+    db_campaign.retry_no_answer_minutes = campaign.retry_no_answer_minutes
+    db_campaign.retry_busy_minutes = campaign.retry_busy_minutes
+    db_campaign.retry_failed_minutes = campaign.retry_failed_minutes
+    db_campaign.call_window_start = campaign.call_window_start
+    db_campaign.call_window_end = campaign.call_window_end
     
     db.commit()
     db.refresh(db_campaign)
@@ -393,10 +402,9 @@ async def update_campaign(
 async def delete_campaign(
     campaign_id: int,
     db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """Delete a campaign (admin only)"""
-    check_admin(db, agent_id)
     
     campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
     if not campaign:
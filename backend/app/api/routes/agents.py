@@ -4,6 +4,8 @@ from app.core.database import get_db
 from app.schemas.agent import AgentResponse, AgentStatusUpdate, AgentSessionResponse
 from app.models.agent import Agent, AgentSession, AgentStatus
 from app.api.deps import get_current_agent_id
+from app.services.progressive_dialer import progressive_dialer
+from app.services.stats_cache import stats_cache
 
 router = APIRouter(prefix="/api/agents", tags=["agents"])
 
@@ -47,6 +49,7 @@ async def update_status(
         raise HTTPException(status_code=404, detail="Agent not found")
     
     agent.status = status_update.status
+    stats_cache.invalidate_on_commit(db, agent_id)
     db.commit()
     
     # Update session status
@@ -58,4 +61,10 @@ async def update_status(
         session.status = status_update.status
         db.commit()
     
+    # Going available starts progressive dialing; pausing or leaving stops it
+    if status_update.status == AgentStatus.AVAILABLE:
+        progressive_dialer.agent_available(agent_id, delay=0)
+    else:
+        progressive_dialer.cancel(agent_id)
+    
     return {"success": True, "status": status_update.status.value}
@@ -1,10 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 from typing import List, Optional, Dict
+from collections import Counter
+from app.core.config import settings
 from app.core.database import get_db
-from app.api.deps import get_current_agent_id
 from app.models.agent import Agent
+from app.api.deps import require_admin
+from app.services.password_hasher import password_hasher
+from app.services.pjsip_config import pjsip_config_cache, write_atomic, PjsipConfig
+from app.services.asterisk_reload import asterisk_reloader
+from app.services.endpoint_registry import endpoint_registry
+import asyncio
 import os
 import re
 import subprocess
@@ -21,14 +28,6 @@ MANAGER_CONF = "/etc/asterisk/manager.conf"
 RTP_CONF = "/etc/asterisk/rtp.conf"
 
 
-def check_admin(db: Session, agent_id: int):
-    """Check if agent is admin"""
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
-    if not agent or agent.is_admin != 1:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    return agent
-
-
 class PJSIPEndpoint(BaseModel):
     extension: str
     password: str
@@ -36,6 +35,17 @@ class PJSIPEndpoint(BaseModel):
     callerid: Optional[str] = None
 
 
+class PJSIPBulkEndpoint(PJSIPEndpoint):
+    full_name: Optional[str] = None
+    agent_username: Optional[str] = None  # defaults to the extension
+    agent_password: Optional[str] = None  # defaults to the SIP password
+
+
+class PJSIPBulkRequest(BaseModel):
+    endpoints: List[PJSIPBulkEndpoint]
+    create_agents: bool = False
+
+
 class PJSIPEndpointResponse(BaseModel):
     extension: str
     password: str
@@ -60,13 +70,103 @@ class SIPTrunkConfig(BaseModel):
     port: int = 5060
 
 
+# Extension and context names written into pjsip.conf section headers
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.+-]+$")
+HOST_PATTERN = re.compile(r"^[A-Za-z0-9.-]+$")
+
+
+def check_value(value: str, label: str):
+    """Reject values that would end their line or start a comment in pjsip.conf"""
+    if any(char in value for char in "\r\n;"):
+        raise HTTPException(status_code=400, detail=f"Invalid characters in {label}")
+
+
+def check_endpoint(endpoint: PJSIPEndpoint):
+    """Reject values that would break pjsip.conf (or inject sections into it)"""
+    if not NAME_PATTERN.match(endpoint.extension) or not NAME_PATTERN.match(endpoint.context):
+        raise HTTPException(status_code=400, detail=f"Invalid extension or context for {endpoint.extension!r}")
+    if not endpoint.password:
+        raise HTTPException(status_code=400, detail=f"Password required for {endpoint.extension}")
+    for value in (endpoint.password, endpoint.callerid or ""):
+        check_value(value, f"settings for {endpoint.extension}")
+
+
+def check_trunk(config: SIPTrunkConfig):
+    """Reject trunk settings that would break pjsip.conf"""
+    if not HOST_PATTERN.match(config.server):
+        raise HTTPException(status_code=400, detail="Invalid trunk server")
+    if not 0 < config.port < 65536:
+        raise HTTPException(status_code=400, detail="Invalid trunk port")
+    check_value(config.username, "trunk username")
+    check_value(config.password, "trunk password")
+
+
+def endpoint_config(endpoint: PJSIPEndpoint) -> str:
+    """endpoint, auth and aor sections for one extension"""
+    return f"""
+
+; Endpoint {endpoint.extension}
+[{endpoint.extension}]
+type=endpoint
+context={endpoint.context}
+disallow=all
+allow=ulaw
+allow=alaw
+aors={endpoint.extension}
+auth={endpoint.extension}
+callerid={endpoint.callerid or f'Agent {endpoint.extension} <{endpoint.extension}>'}
+transport=transport-udp
+
+[{endpoint.extension}]
+type=auth
+auth_type=userpass
+password={endpoint.password}
+username={endpoint.extension}
+
+[{endpoint.extension}]
+type=aor
+max_contacts=1
+contact=
+"""
+
+
+def trunk_config(config: SIPTrunkConfig) -> str:
+    """endpoint, auth and aor sections of the SIP trunk"""
+    return f"""
+
+; SIP Trunk Configuration
+[trunk]
+type=endpoint
+context=from-trunk
+disallow=all
+allow=ulaw
+allow=alaw
+aors=trunk
+auth=trunk
+outbound_auth=trunk
+rtp_symmetric=yes
+force_rport=yes
+rewrite_contact=yes
+direct_media=no
+
+[trunk]
+type=auth
+auth_type=userpass
+password={config.password}
+username={config.username}
+
+[trunk]
+type=aor
+contact=sip:{config.server}:{config.port}
+qualify_frequency=60
+"""
+
+
 @router.get("/status")
 async def get_asterisk_status(
-    db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """Get Asterisk service status"""
-    check_admin(db, agent_id)
     
     try:
         result = subprocess.run(
@@ -102,96 +202,27 @@ async def get_asterisk_status(
 
 @router.get("/endpoints")
 async def list_pjsip_endpoints(
-    db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """List all PJSIP endpoints"""
-    check_admin(db, agent_id)
     
     if not os.path.exists(PJSIP_CONF):
         return []
     
-    endpoints = []
-    current_endpoint = None
-    
     try:
-        with open(PJSIP_CONF, 'r') as f:
-            lines = f.readlines()
-        
-        for i, line in enumerate(lines):
-            line = line.strip()
-            
-            # Check for endpoint section
-            if line.startswith('[') and line.endswith(']') and not line.startswith('[transport'):
-                section_name = line[1:-1]
-                
-                # Check if it's an endpoint (has type=endpoint)
-                if i + 1 < len(lines):
-                    next_lines = ''.join(lines[i:i+10])
-                    if 'type=endpoint' in next_lines:
-                        # Read endpoint config
-                        endpoint_data = {}
-                        j = i
-                        while j < len(lines) and (j == i or not (lines[j].strip().startswith('[') and lines[j].strip().endswith(']'))):
-                            config_line = lines[j].strip()
-                            if '=' in config_line and not config_line.startswith(';'):
-                                key, value = config_line.split('=', 1)
-                                endpoint_data[key.strip()] = value.strip()
-                            j += 1
-                        
-                        if endpoint_data.get('type') == 'endpoint':
-                            extension = section_name
-                            # Get password from auth section
-                            password = ""
-                            auth_section = endpoint_data.get('auth', extension)
-                            
-                            # Find auth section
-                            for k in range(len(lines)):
-                                if f'[{auth_section}]' in lines[k]:
-                                    auth_lines = lines[k:k+10]
-                                    for auth_line in auth_lines:
-                                        if auth_line.strip().startswith('password='):
-                                            password = auth_line.strip().split('=', 1)[1]
-                                            break
-                            
-                            endpoints.append({
-                                "extension": extension,
-                                "password": password,
-                                "context": endpoint_data.get('context', 'from-internal'),
-                                "callerid": endpoint_data.get('callerid', '').replace('"', ''),
-                                "registered": False,
-                                "contact": None
-                            })
+        config = pjsip_config_cache.load(PJSIP_CONF)
         
-        # Check registration status for each endpoint
-        try:
-            result = subprocess.run(
-                ["asterisk", "-rx", "pjsip show endpoints"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                for endpoint in endpoints:
-                    ext = endpoint['extension']
-                    if f'Endpoint: {ext}' in result.stdout:
-                        # Check if registered
-                        if 'Available' in result.stdout or 'Contact:' in result.stdout:
-                            endpoint['registered'] = True
-                            # Try to get contact info
-                            contact_result = subprocess.run(
-                                ["asterisk", "-rx", f"pjsip show endpoint {ext}"],
-                                capture_output=True,
-                                text=True,
-                                timeout=5
-                            )
-                            if 'Contact:' in contact_result.stdout:
-                                for line in contact_result.stdout.split('\n'):
-                                    if 'Contact:' in line and 'sip:' in line:
-                                        endpoint['contact'] = line.split('sip:')[1].split()[0] if 'sip:' in line else None
-                                        break
-        except:
-            pass
+        # Registration state comes from the AMI-fed registry, not the Asterisk CLI
+        endpoints = []
+        for section in config.endpoints():
+            auth = config.auth_for(section)
+            endpoints.append({
+                "extension": section.name,
+                "password": auth.get("password", "") if auth else "",
+                "context": section.get("context", "from-internal"),
+                "callerid": section.get("callerid", "").replace('"', ''),
+                **endpoint_registry.status(section.name)
+            })
         
         return endpoints
     except Exception as e:
@@ -202,57 +233,26 @@ async def list_pjsip_endpoints(
 @router.post("/endpoints")
 async def create_pjsip_endpoint(
     endpoint: PJSIPEndpoint,
-    db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """Create a new PJSIP endpoint"""
-    check_admin(db, agent_id)
     
     if not os.path.exists(PJSIP_CONF):
         raise HTTPException(status_code=404, detail="PJSIP config file not found")
     
     try:
-        # Read current config
-        with open(PJSIP_CONF, 'r') as f:
-            content = f.read()
+        check_endpoint(endpoint)
         
-        # Check if endpoint already exists
-        if f'[{endpoint.extension}]' in content:
-            raise HTTPException(status_code=400, detail=f"Endpoint {endpoint.extension} already exists")
+        def add_endpoint(config: PjsipConfig) -> str:
+            # Check if endpoint already exists
+            if config.has_section(endpoint.extension):
+                raise HTTPException(status_code=400, detail=f"Endpoint {endpoint.extension} already exists")
+            return ''.join(config.lines) + endpoint_config(endpoint)
         
-        # Add endpoint configuration
-        new_config = f"""
-
-; Endpoint {endpoint.extension}
-[{endpoint.extension}]
-type=endpoint
-context={endpoint.context}
-disallow=all
-allow=ulaw
-allow=alaw
-aors={endpoint.extension}
-auth={endpoint.extension}
-callerid={endpoint.callerid or f'Agent {endpoint.extension} <{endpoint.extension}>'}
-transport=transport-udp
-
-[{endpoint.extension}]
-type=auth
-auth_type=userpass
-password={endpoint.password}
-username={endpoint.extension}
-
-[{endpoint.extension}]
-type=aor
-max_contacts=1
-contact=
-"""
+        await asyncio.to_thread(pjsip_config_cache.update, PJSIP_CONF, add_endpoint)
         
-        # Append to file
-        with open(PJSIP_CONF, 'a') as f:
-            f.write(new_config)
-        
-        # Reload PJSIP
-        subprocess.run(["asterisk", "-rx", "module reload res_pjsip.so"], timeout=5)
+        # Reload PJSIP (coalesced with other changes)
+        asterisk_reloader.request("pjsip")
         
         return {"success": True, "message": f"Endpoint {endpoint.extension} created"}
     except HTTPException:
@@ -262,51 +262,125 @@ contact=
         raise HTTPException(status_code=500, detail=f"Error creating endpoint: {str(e)}")
 
 
+@router.post("/endpoints/bulk", status_code=status.HTTP_201_CREATED)
+async def bulk_create_pjsip_endpoints(
+    request: PJSIPBulkRequest,
+    db: Session = Depends(get_db),
+    agent_id: int = Depends(require_admin)
+):
+    """
+    Create many PJSIP endpoints with one config write and one reload (admin only)
+    With create_agents, an agent is created per extension in the same transaction.
+    Nothing is written if any extension or agent already exists.
+    """
+    
+    if not os.path.exists(PJSIP_CONF):
+        raise HTTPException(status_code=404, detail="PJSIP config file not found")
+    
+    endpoints = request.endpoints
+    if not endpoints:
+        raise HTTPException(status_code=400, detail="No endpoints given")
+    if len(endpoints) > settings.ASTERISK_BULK_MAX_ENDPOINTS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.ASTERISK_BULK_MAX_ENDPOINTS} endpoints per request")
+    for endpoint in endpoints:
+        check_endpoint(endpoint)
+    extensions = [endpoint.extension for endpoint in endpoints]
+    usernames = [endpoint.agent_username or endpoint.extension for endpoint in endpoints]
+    duplicates = sorted({name for names in (extensions, usernames) for name, count in Counter(names).items() if count > 1})
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"Duplicated in request: {', '.join(duplicates[:20])}")
+    
+    try:
+        if request.create_agents:
+            existing = db.query(Agent).filter(
+                Agent.username.in_(usernames) | Agent.phone_extension.in_(extensions)
+            ).all()
+            if existing:
+                # Name the requested extension or username each agent clashes with
+                requested = set(extensions)
+                taken = sorted({
+                    agent.phone_extension if agent.phone_extension in requested else agent.username
+                    for agent in existing
+                })
+                raise HTTPException(status_code=400, detail=f"Agents already exist for: {', '.join(taken[:20])}")
+            
+            # Hash in the process pool, in parallel
+            password_hashes = await asyncio.gather(*(
+                password_hasher.hash(endpoint.agent_password or endpoint.password) for endpoint in endpoints
+            ))
+            db.add_all([
+                Agent(
+                    username=username,
+                    phone_extension=endpoint.extension,
+                    full_name=endpoint.full_name,
+                    password_hash=password_hash,
+                    is_admin=0,
+                    status="logged_out"
+                )
+                for endpoint, username, password_hash in zip(endpoints, usernames, password_hashes)
+            ])
+            db.flush()
+        
+        def add_endpoints(config: PjsipConfig) -> str:
+            existing = [extension for extension in extensions if config.has_section(extension)]
+            if existing:
+                raise HTTPException(status_code=400, detail=f"Endpoints already exist: {', '.join(existing[:20])}")
+            return ''.join(config.lines) + ''.join(endpoint_config(endpoint) for endpoint in endpoints)
+        
+        # One atomic write for the whole batch
+        await asyncio.to_thread(pjsip_config_cache.update, PJSIP_CONF, add_endpoints)
+        try:
+            db.commit()
+        except Exception:
+            # Keep pjsip.conf and the agents table in step
+            await asyncio.to_thread(
+                pjsip_config_cache.update, PJSIP_CONF, lambda config: ''.join(config.without_sections(*extensions))
+            )
+            raise
+        
+        # Reload PJSIP once for the batch
+        asterisk_reloader.request("pjsip")
+        
+        return {
+            "success": True,
+            "created": len(endpoints),
+            "agents_created": len(endpoints) if request.create_agents else 0,
+            "extensions": extensions
+        }
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error provisioning endpoints: {e}")
+        raise HTTPException(status_code=500, detail=f"Error provisioning endpoints: {str(e)}")
+
+
 @router.delete("/endpoints/{extension}")
 async def delete_pjsip_endpoint(
     extension: str,
-    db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """Delete a PJSIP endpoint"""
-    check_admin(db, agent_id)
     
     if not os.path.exists(PJSIP_CONF):
         raise HTTPException(status_code=404, detail="PJSIP config file not found")
     
     try:
-        with open(PJSIP_CONF, 'r') as f:
-            lines = f.readlines()
-        
-        new_lines = []
-        skip_section = False
-        current_section = None
+        def remove_endpoint(config: PjsipConfig) -> str:
+            # Drop the endpoint, auth and aor sections named after the extension
+            if not config.has_section(extension):
+                raise HTTPException(status_code=404, detail=f"Endpoint {extension} not found")
+            return ''.join(config.without_sections(extension))
         
-        for i, line in enumerate(lines):
-            if line.strip().startswith('[') and line.strip().endswith(']'):
-                section_name = line.strip()[1:-1]
-                if section_name == extension:
-                    skip_section = True
-                    current_section = extension
-                else:
-                    skip_section = False
-                    current_section = None
-            
-            if not skip_section:
-                new_lines.append(line)
-            elif line.strip() == '' and current_section == extension:
-                # End of section
-                skip_section = False
-                current_section = None
+        await asyncio.to_thread(pjsip_config_cache.update, PJSIP_CONF, remove_endpoint)
         
-        # Write back
-        with open(PJSIP_CONF, 'w') as f:
-            f.writelines(new_lines)
-        
-        # Reload PJSIP
-        subprocess.run(["asterisk", "-rx", "module reload res_pjsip.so"], timeout=5)
+        # Reload PJSIP (coalesced with other changes)
+        asterisk_reloader.request("pjsip")
         
         return {"success": True, "message": f"Endpoint {extension} deleted"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error deleting endpoint: {e}")
         raise HTTPException(status_code=500, detail=f"Error deleting endpoint: {str(e)}")
@@ -314,11 +388,9 @@ async def delete_pjsip_endpoint(
 
 @router.get("/dialplan")
 async def get_dialplan(
-    db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """Get dialplan configuration"""
-    check_admin(db, agent_id)
     
     if not os.path.exists(EXTENSIONS_CONF):
         return {"content": "", "error": "Dialplan file not found"}
@@ -335,11 +407,9 @@ async def get_dialplan(
 @router.post("/dialplan")
 async def update_dialplan(
     content: Dict[str, str],
-    db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """Update dialplan configuration"""
-    check_admin(db, agent_id)
     
     if not os.path.exists(EXTENSIONS_CONF):
         raise HTTPException(status_code=404, detail="Dialplan file not found")
@@ -353,7 +423,7 @@ async def update_dialplan(
             f.write(content.get('content', ''))
         
         # Reload dialplan
-        subprocess.run(["asterisk", "-rx", "dialplan reload"], timeout=5)
+        asterisk_reloader.request("dialplan")
         
         return {"success": True, "message": "Dialplan updated"}
     except Exception as e:
@@ -368,11 +438,9 @@ async def update_dialplan(
 
 @router.get("/trunk")
 async def get_trunk_config(
-    db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """Get SIP trunk configuration"""
-    check_admin(db, agent_id)
     
     if not os.path.exists(PJSIP_CONF):
         return {"exists": False}
@@ -420,107 +488,50 @@ async def get_trunk_config(
 @router.post("/trunk")
 async def update_trunk_config(
     config: SIPTrunkConfig,
-    db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
     """Update SIP trunk configuration"""
-    check_admin(db, agent_id)
     
     if not os.path.exists(PJSIP_CONF):
         raise HTTPException(status_code=404, detail="PJSIP config file not found")
     
     try:
-        # Read current config
-        with open(PJSIP_CONF, 'r') as f:
-            content = f.read()
-        
-        # Backup
-        subprocess.run(["cp", PJSIP_CONF, f"{PJSIP_CONF}.backup"], timeout=5)
-        
-        # Remove old trunk config if exists
-        lines = content.split('\n')
-        new_lines = []
-        skip_trunk = False
-        trunk_sections = ['[trunk]']
-        
-        for line in lines:
-            if line.strip() in trunk_sections:
-                skip_trunk = True
-            elif skip_trunk and line.strip().startswith('[') and line.strip().endswith(']'):
-                if line.strip() not in trunk_sections:
-                    skip_trunk = False
-            
-            if not skip_trunk:
-                new_lines.append(line)
+        check_trunk(config)
         
-        # Add new trunk config
-        trunk_config = f"""
-
-; SIP Trunk Configuration
-[trunk]
-type=endpoint
-context=from-trunk
-disallow=all
-allow=ulaw
-allow=alaw
-aors=trunk
-auth=trunk
-outbound_auth=trunk
-rtp_symmetric=yes
-force_rport=yes
-rewrite_contact=yes
-direct_media=no
-
-[trunk]
-type=auth
-auth_type=userpass
-password={config.password}
-username={config.username}
-
-[trunk]
-type=aor
-contact=sip:{config.server}:{config.port}
-qualify_frequency=60
-"""
+        def replace_trunk(current: PjsipConfig) -> str:
+            # Remove old trunk config if exists
+            return ''.join(current.without_sections("trunk")) + trunk_config(config)
         
-        new_lines.append(trunk_config)
+        def write_trunk():
+            previous = pjsip_config_cache.update(PJSIP_CONF, replace_trunk)
+            # Backup of the config as it was, for manual rollback
+            write_atomic(f"{PJSIP_CONF}.backup", ''.join(previous.lines))
         
-        # Write back
-        with open(PJSIP_CONF, 'w') as f:
-            f.write('\n'.join(new_lines))
+        await asyncio.to_thread(write_trunk)
         
         # Reload PJSIP
-        subprocess.run(["asterisk", "-rx", "module reload res_pjsip.so"], timeout=5)
+        asterisk_reloader.request("pjsip")
         
         return {"success": True, "message": "Trunk configuration updated"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating trunk: {e}")
-        # Restore backup
-        try:
-            subprocess.run(["cp", f"{PJSIP_CONF}.backup", PJSIP_CONF], timeout=5)
-        except:
-            pass
         raise HTTPException(status_code=500, detail=f"Error updating trunk: {str(e)}")
 
 
 @router.post("/reload")
 async def reload_asterisk(
     module: Optional[str] = None,
-    db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    agent_id: int = Depends(require_admin)
 ):
-    """Reload Asterisk configuration"""
-    check_admin(db, agent_id)
+    """Schedule an Asterisk configuration reload (debounced; it goes out shortly after)"""
     
     try:
-        if module == "pjsip":
-            subprocess.run(["asterisk", "-rx", "module reload res_pjsip.so"], timeout=5)
-        elif module == "dialplan":
-            subprocess.run(["asterisk", "-rx", "dialplan reload"], timeout=5)
-        else:
-            subprocess.run(["asterisk", "-rx", "core reload"], timeout=5)
+        # Debounced, so a reload right after a config change is sent only once
+        asterisk_reloader.request(module if module in ("pjsip", "dialplan") else "core")
         
-        return {"success": True, "message": f"Asterisk {module or 'configuration'} reloaded"}
+        return {"success": True, "message": f"Asterisk {module or 'configuration'} reload scheduled"}
     except Exception as e:
         logger.error(f"Error reloading Asterisk: {e}")
         raise HTTPException(status_code=500, detail=f"Error reloading: {str(e)}")
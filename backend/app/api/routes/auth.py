@@ -1,98 +1,142 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.core.security import verify_password, create_access_token, decode_access_token
+from app.core.security import create_access_token, decode_access_token
 from app.schemas.auth import LoginRequest, LoginResponse
 from app.models.agent import Agent, AgentSession, AgentStatus
 from app.models.campaign import Campaign
-from app.api.deps import security, get_current_agent_id
+from app.api.deps import security, get_token_claims
+from app.services.stats_cache import stats_cache
+from app.services.session_cache import session_cache
+from app.services.password_hasher import password_hasher, PasswordHasherBusy
+from app.services.login_throttle import login_throttle
+import asyncio
 import uuid
 from datetime import timedelta
+from typing import Optional
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
+def _find_agent(db: Session, username: str) -> Agent:
+    # Try to find agent by username or phone_extension
+    return db.query(Agent).filter(
+        (Agent.username == username) | (Agent.phone_extension == username)
+    ).first()
+
+
+def _start_session(db: Session, agent: Agent, campaign_code: Optional[str]):
+    """Open an agent session (in the chosen or first active campaign); returns (campaign_id, campaign_code, session_id)"""
+    # Get campaign if provided (optional for admins)
+    campaign = None
+    campaign_id = None
+    
+    if campaign_code:
+        campaign = db.query(Campaign).filter(Campaign.code == campaign_code).first()
+        if not campaign:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Campaign not found"
+            )
+        campaign_id = campaign.id
+        campaign_code = campaign.code
+    # Campaign is optional - if not provided and agent is not admin, use first available campaign
+    elif agent.is_admin == 0:
+        # For regular agents, try to get first active campaign
+        campaign = db.query(Campaign).filter(Campaign.status == "active").first()
+        if campaign:
+            campaign_id = campaign.id
+            campaign_code = campaign.code
+    
+    # Create session
+    session_id = str(uuid.uuid4())
+    agent_session = AgentSession(
+        agent_id=agent.id,
+        campaign_id=campaign_id,
+        session_id=session_id,
+        status=AgentStatus.AVAILABLE.value
+    )
+    db.add(agent_session)
+    
+    # Update agent status
+    agent.status = AgentStatus.AVAILABLE.value
+    stats_cache.invalidate_on_commit(db, agent.id)
+    db.commit()
+    
+    return campaign_id, campaign_code, session_id
+
+
 @router.post("/login", response_model=LoginResponse)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, request: Request, db: Session = Depends(get_db)):
     """User-based login - username can match either username or phone_extension"""
     import logging
     logger = logging.getLogger(__name__)
     
+    # Refuse throttled attempts before any bcrypt work
+    client_ip = request.client.host if request.client else None
+    retry_after = login_throttle.admit(client_ip, login_data.username)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(max(1, int(retry_after) + 1))}
+        )
+    
     try:
-        # Try to find agent by username or phone_extension
-        agent = db.query(Agent).filter(
-            (Agent.username == login_data.username) | (Agent.phone_extension == login_data.username)
-        ).first()
+        agent = await asyncio.to_thread(_find_agent, db, login_data.username)
         
         if not agent:
+            login_throttle.record_failure(client_ip, login_data.username)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid username or password"
             )
         
-        # Verify password
-        if not verify_password(login_data.password, agent.password_hash):
+        # Verify password (in the hashing process pool)
+        try:
+            password_ok = await password_hasher.verify(login_data.password, agent.password_hash)
+        except PasswordHasherBusy:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Login service busy, try again shortly",
+                headers={"Retry-After": "1"}
+            )
+        if not password_ok:
+            login_throttle.record_failure(client_ip, login_data.username)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid username or password"
             )
+        login_throttle.record_success(client_ip, login_data.username)
         
-        # Get campaign if provided (optional for admins)
-        campaign = None
-        campaign_id = None
-        campaign_code = None
-        
-        if login_data.campaign:
-            campaign = db.query(Campaign).filter(Campaign.code == login_data.campaign).first()
-            if not campaign:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Campaign not found"
-                )
-            campaign_id = campaign.id
-            campaign_code = campaign.code
-        # Campaign is optional - if not provided and agent is not admin, use first available campaign
-        elif agent.is_admin == 0:
-            # For regular agents, try to get first active campaign
-            campaign = db.query(Campaign).filter(Campaign.status == "active").first()
-            if campaign:
-                campaign_id = campaign.id
-                campaign_code = campaign.code
+        # Read before the commit expires the agent (a refresh would query on the event loop)
+        agent_id, username, is_admin = agent.id, agent.username, agent.is_admin == 1
         
-        # Create session
-        session_id = str(uuid.uuid4())
-        agent_session = AgentSession(
-            agent_id=agent.id,
-            campaign_id=campaign_id,
-            session_id=session_id,
-            status=AgentStatus.AVAILABLE.value
+        # Get the campaign, open the session and commit, off the event loop
+        campaign_id, campaign_code, session_id = await asyncio.to_thread(
+            _start_session, db, agent, login_data.campaign
         )
-        db.add(agent_session)
-        
-        # Update agent status
-        agent.status = AgentStatus.AVAILABLE.value
-        db.commit()
         
         # Create access token
         access_token_expires = timedelta(minutes=1440)  # 24 hours
         access_token = create_access_token(
-            data={"sub": agent.username, "agent_id": agent.id, "session_id": session_id},
+            data={"sub": username, "agent_id": agent_id, "session_id": session_id, "is_admin": is_admin},
             expires_delta=access_token_expires
         )
         
         return LoginResponse(
             access_token=access_token,
             token_type="bearer",
-            agent_id=agent.id,
-            username=agent.username,
+            agent_id=agent_id,
+            username=username,
             session_id=session_id,
             campaign_id=campaign_id,
             campaign_code=campaign_code,
-            is_admin=bool(agent.is_admin == 1)
+            is_admin=is_admin
         )
     except HTTPException as he:
-        db.rollback()
+        await asyncio.to_thread(db.rollback)
         raise he
     except Exception as e:
         import traceback
@@ -103,7 +147,7 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
         print(f"Traceback:\n{error_trace}")
         print(f"===================\n")
         try:
-            db.rollback()
+            await asyncio.to_thread(db.rollback)
         except:
             pass
         raise HTTPException(
@@ -115,22 +159,18 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
 @router.post("/logout")
 async def logout(
     db: Session = Depends(get_db),
-    agent_id: int = Depends(get_current_agent_id)
+    claims: dict = Depends(get_token_claims)
 ):
-    """Agent logout"""
+    """Agent logout - closes this token's session, which stops the token working"""
+    agent_id = claims["agent_id"]
     
     agent = db.query(Agent).filter(Agent.id == agent_id).first()
     if agent:
         agent.status = AgentStatus.LOGGED_OUT.value
         # Update session
-        session = db.query(AgentSession).filter(
-            AgentSession.agent_id == agent_id,
-            AgentSession.logout_time.is_(None)
-        ).first()
-        if session:
-            from datetime import datetime
-            session.logout_time = datetime.utcnow()
-            session.status = AgentStatus.LOGGED_OUT.value
+        revoked = session_cache.close_sessions(db, agent_id, claims["session_id"])
+        stats_cache.invalidate_on_commit(db, agent_id)
         db.commit()
+        await session_cache.revoke(revoked)
     
     return {"message": "Logged out successfully"}
@@ -1,18 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from sqlalchemy import func, tuple_
+from typing import Optional
 from app.core.database import get_db
 from app.core.config import settings
-from app.schemas.call import DialRequest, CallResponse, DispositionRequest
+from app.core.phone import normalize_phone_prefix
+from app.schemas.call import DialRequest, CallResponse, CallPage, DispositionRequest
 from app.models.call import Call, CallStatus, CallDirection
 from app.models.agent import Agent, AgentStatus
 from app.models.contact import Contact, ContactStatus
 from app.services.dialer_service import DialerService
+from app.services.agent_dialer import agent_dialer, DialRefused
 from app.services.websocket_manager import websocket_manager
+from app.services.hopper_service import campaign_hopper
+from app.services.predictive_dialer import predictive_dialer
+from app.services.progressive_dialer import progressive_dialer
+from app.services.retry_scheduler import retry_scheduler
+from app.services.dnc_service import dnc_index
+from app.services.agent_stats import agent_stats
+from app.services.stats_cache import stats_cache
 from app.api.deps import get_current_agent_id
+from app.api.pagination import encode_cursor, decode_cursor, estimate_count
 from datetime import datetime, timezone
-import uuid
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,73 +40,20 @@ async def dial(
 ):
     """Initiate a call"""
     try:
-        # Fetch agent once
-        agent = db.query(Agent).filter(Agent.id == agent_id).first()
-        if not agent:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
-        
-        # Update contact if contact_id is provided
-        contact = None
-        if dial_request.contact_id:
-            contact = db.query(Contact).filter(Contact.id == dial_request.contact_id).first()
-            if contact:
-                # Update contact dialing info
-                contact.last_dialed_at = datetime.now(timezone.utc)
-                contact.dial_attempts = (contact.dial_attempts or 0) + 1
-                # Don't change status yet - will update based on call result
-        
-        # Create call record
-        call_unique_id = str(uuid.uuid4())
-        call = Call(
-            agent_id=agent_id,
-            campaign_id=dial_request.campaign_id,
-            contact_id=dial_request.contact_id,
-            phone_number=dial_request.phone_number,
-            direction=CallDirection.OUTBOUND,
-            status=CallStatus.DIALING,
-            call_unique_id=call_unique_id
-        )
-        db.add(call)
-        db.flush()  # Flush to get the ID without committing
+        # A manual dial supersedes any scheduled progressive dial
+        progressive_dialer.cancel(agent_id)
         
-        # Initiate call via dialer service
-        call_result = await dialer_service.initiate_call(
-            phone_number=dial_request.phone_number,
-            agent_extension=agent.phone_extension,
+        call = await agent_dialer.dial(
+            db,
+            agent_id,
+            dial_request.phone_number,
             campaign_id=dial_request.campaign_id,
             contact_id=dial_request.contact_id
         )
-        
-        # Update call status
-        call.status = call_result.get("status", CallStatus.DIALING)
-        call.freeswitch_channel = call_result.get("asterisk_channel") or call_result.get("freeswitch_channel")
-        
-        # Update agent status
-        agent.status = AgentStatus.IN_CALL.value
-        
-        # Single commit for all changes
-        db.commit()
-        db.refresh(call)
-        
-        # Register call in channel tracker
-        from app.services.channel_tracker import channel_tracker
-        channel_tracker.register_call(call.call_unique_id)
-        
-        # Send WebSocket update (non-blocking)
-        try:
-            # Handle both enum and string status
-            status_value = call.status.value if hasattr(call.status, 'value') else call.status
-            await websocket_manager.send_call_update(agent_id, {
-                "call_id": call.id,
-                "status": status_value,
-                "phone_number": call.phone_number
-            })
-        except Exception as ws_error:
-            logger.warning(f"WebSocket update failed: {ws_error}")
-        
         return CallResponse.model_validate(call)
-    except HTTPException:
-        raise
+    except DialRefused as e:
+        db.rollback()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         db.rollback()
         logger.error(f"Error initiating call: {e}")
@@ -112,46 +68,13 @@ async def dial_next(
 ):
     """Auto-dial next available contact"""
     try:
-        from app.models.agent import Agent
-        
-        agent = db.query(Agent).filter(Agent.id == agent_id).first()
-        if not agent:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
-        
-        # Use campaign_id from agent if not provided
-        if not campaign_id and hasattr(agent, 'campaign_id') and agent.campaign_id:
-            campaign_id = agent.campaign_id
-        
-        # Get next contact
-        contact = db.query(Contact).filter(
-            Contact.status == ContactStatus.NEW.value,
-            Contact.status != ContactStatus.DO_NOT_CALL.value
-        )
-        
-        if campaign_id:
-            contact = contact.filter(Contact.campaign_id == campaign_id)
-        
-        contact = contact.order_by(Contact.created_at.asc()).first()
-        
-        if not contact:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No more contacts available to dial"
-            )
-        
-        # Create dial request
-        dial_request = DialRequest(
-            phone_number=contact.phone,
-            campaign_id=contact.campaign_id,
-            contact_id=contact.id
-        )
-        
-        # Use existing dial endpoint logic
-        return await dial(dial_request, db, agent_id)
-        
-    except HTTPException:
-        raise
+        progressive_dialer.cancel(agent_id)
+        call = await agent_dialer.dial_next(db, agent_id, campaign_id)
+        return CallResponse.model_validate(call)
+    except DialRefused as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
+        db.rollback()
         logger.error(f"Error dialing next contact: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -198,23 +121,21 @@ async def hangup(call_id: int, db: Session = Depends(get_db), agent_id: int = De
                         contact.status = ContactStatus.NOT_ANSWERED
                     elif call.status == CallStatus.FAILED.value:
                         contact.status = ContactStatus.FAILED
+                    elif call.answered_time:
+                        contact.status = ContactStatus.CONTACTED
+                    retry_scheduler.schedule(db, contact)
+                campaign_hopper.release(db, call.contact_id)
             
             # Update agent status
             agent = db.query(Agent).filter(Agent.id == agent_id).first()
             if agent:
                 agent.status = AgentStatus.AVAILABLE.value
             
+            agent_stats.record_call(db, call)
             db.commit()
+            predictive_dialer.on_call_ended(call.call_unique_id, call.talk_duration)
             
-            # Send WebSocket updates
-            try:
-                await websocket_manager.send_call_update(agent_id, {
-                    "call_id": call.id,
-                    "status": CallStatus.ENDED.value
-                })
-                await websocket_manager.send_agent_status_update(agent_id, "available")
-            except Exception as ws_error:
-                logger.warning(f"WebSocket update failed: {ws_error}")
+            progressive_dialer.agent_available(agent_id)
         
         return {"success": success, "call_id": call_id}
     except HTTPException:
@@ -246,13 +167,10 @@ async def transfer(
         if success:
             call.status = CallStatus.TRANSFERRED
             call.end_time = datetime.now(timezone.utc)
+            agent_stats.record_call(db, call)
             db.commit()
             
             try:
-                await websocket_manager.send_call_update(agent_id, {
-                    "call_id": call.id,
-                    "status": CallStatus.TRANSFERRED.value
-                })
                 await websocket_manager.send_agent_status_update(agent_id, "available")
             except Exception as ws_error:
                 logger.warning(f"WebSocket update failed: {ws_error}")
@@ -281,13 +199,10 @@ async def park(call_id: int, db: Session = Depends(get_db), agent_id: int = Depe
         
         if success:
             call.status = CallStatus.PARKED
+            agent_stats.record_call(db, call)
             db.commit()
             
             try:
-                await websocket_manager.send_call_update(agent_id, {
-                    "call_id": call.id,
-                    "status": CallStatus.PARKED.value
-                })
                 await websocket_manager.send_agent_status_update(agent_id, "available")
             except Exception as ws_error:
                 logger.warning(f"WebSocket update failed: {ws_error}")
@@ -319,30 +234,106 @@ async def get_current_call(db: Session = Depends(get_db), agent_id: int = Depend
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching current call")
 
 
-@router.get("/history", response_model=List[CallResponse])
+def call_history_query(
+    db: Session,
+    agent_id: int,
+    filter: str = "all",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    direction: Optional[CallDirection] = None,
+    call_status: Optional[CallStatus] = None,
+    disposition: Optional[str] = None,
+    campaign_id: Optional[int] = None,
+    phone_prefix: Optional[str] = None,
+):
+    """An agent's calls with the history filters applied (unordered, no cursor)"""
+    query = db.query(Call).filter(Call.agent_id == agent_id)
+    
+    # Legacy presets, combinable with the explicit filters below
+    if filter == "today":
+        # Use timezone-aware datetime
+        now = datetime.now(timezone.utc)
+        today_start = datetime.combine(now.date(), datetime.min.time()).replace(tzinfo=timezone.utc)
+        query = query.filter(Call.start_time >= today_start)
+    elif filter == "outbound":
+        query = query.filter(Call.direction == CallDirection.OUTBOUND.value)
+    elif filter == "inbound":
+        query = query.filter(Call.direction == CallDirection.INBOUND.value)
+    # "all" doesn't add any filter
+    
+    if start:
+        query = query.filter(Call.start_time >= start)
+    if end:
+        query = query.filter(Call.start_time < end)
+    if direction:
+        query = query.filter(Call.direction == direction.value)
+    if call_status:
+        query = query.filter(Call.status == call_status.value)
+    if disposition:
+        query = query.filter(Call.disposition == disposition)
+    if campaign_id:
+        query = query.filter(Call.campaign_id == campaign_id)
+    if phone_prefix:
+        # Match the normalized number, however the prefix was typed (digits only, so no LIKE wildcards)
+        prefix = normalize_phone_prefix(phone_prefix)
+        if prefix:
+            query = query.filter(Call.phone_normalized.like(f"{prefix}%"))
+    return query
+
+
+@router.get("/history", response_model=CallPage)
 async def get_call_history(
-    filter: str = "today",
+    filter: str = Query("today", description="Preset: today, inbound, outbound or all"),
+    start: Optional[datetime] = Query(None, description="Calls started at or after this time"),
+    end: Optional[datetime] = Query(None, description="Calls started before this time"),
+    direction: Optional[CallDirection] = Query(None),
+    call_status: Optional[CallStatus] = Query(None, alias="status"),
+    disposition: Optional[str] = Query(None),
+    campaign_id: Optional[int] = Query(None),
+    phone_prefix: Optional[str] = Query(None, description="Match calls whose number starts with this value"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
     db: Session = Depends(get_db),
     agent_id: int = Depends(get_current_agent_id)
 ):
-    """Get call history for agent"""
+    """
+    Get call history for agent, newest first, one page at a time
+
+    Uses keyset pagination on (start_time, id) over the (agent_id, start_time, id) index:
+    pass next_cursor back as cursor to fetch the next page. Every page costs the same
+    however deep it is. estimated_total comes from the query planner, so treat it as approximate.
+    """
     try:
-        query = db.query(Call).filter(Call.agent_id == agent_id)
-        
-        if filter == "today":
-            # Use timezone-aware datetime
-            now = datetime.now(timezone.utc)
-            today = now.date()
-            today_start = datetime.combine(today, datetime.min.time()).replace(tzinfo=timezone.utc)
-            query = query.filter(Call.start_time >= today_start)
-        elif filter == "outbound":
-            query = query.filter(Call.direction == CallDirection.OUTBOUND)
-        elif filter == "inbound":
-            query = query.filter(Call.direction == CallDirection.INBOUND)
-        # "all" doesn't add any filter
-        
-        calls = query.order_by(Call.start_time.desc()).limit(100).all()
-        return [CallResponse.model_validate(call) for call in calls]
+        query = call_history_query(
+            db, agent_id, filter=filter, start=start, end=end, direction=direction,
+            call_status=call_status, disposition=disposition, campaign_id=campaign_id,
+            phone_prefix=phone_prefix
+        )
+        
+        estimated_total = estimate_count(db, query) if not cursor else None
+        
+        if cursor:
+            cursor_start_time, cursor_id = decode_cursor(cursor)
+            query = query.filter(tuple_(Call.start_time, Call.id) < (cursor_start_time, cursor_id))
+        
+        # Fetch one extra row to know whether another page exists
+        calls = query.order_by(Call.start_time.desc(), Call.id.desc()).limit(limit + 1).all()
+        has_more = len(calls) > limit
+        calls = calls[:limit]
+        
+        next_cursor = None
+        if has_more and calls:
+            last = calls[-1]
+            next_cursor = encode_cursor(last.start_time, last.id)
+        
+        return CallPage(
+            items=[CallResponse.model_validate(call) for call in calls],
+            next_cursor=next_cursor,
+            has_more=has_more,
+            estimated_total=estimated_total
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting call history: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching call history")
@@ -387,24 +378,24 @@ async def set_disposition(
                     "DNC": ContactStatus.DO_NOT_CALL
                 }
                 contact.status = disposition_map.get(disposition_request.disposition, ContactStatus.CONTACTED)
+                retry_scheduler.schedule(db, contact)
+            campaign_hopper.release(db, call.contact_id)
         
         # Update agent status to available
         agent = db.query(Agent).filter(Agent.id == agent_id).first()
         if agent:
             agent.status = AgentStatus.AVAILABLE
         
+        agent_stats.record_call(db, call)
         db.commit()
+        predictive_dialer.on_call_ended(call.call_unique_id, call.talk_duration)
+        
+        # Customer asked not to be called again: add the number to the DNC list
+        if disposition_request.disposition == "DNC":
+            dnc_index.add_numbers(db, [call.phone_number], source="disposition", added_by=agent_id)
         
-        # Send WebSocket updates
-        try:
-            await websocket_manager.send_call_update(agent_id, {
-                "call_id": call.id,
-                "status": CallStatus.ENDED.value,
-                "disposition": disposition_request.disposition
-            })
-            await websocket_manager.send_agent_status_update(agent_id, "available")
-        except Exception as ws_error:
-            logger.warning(f"WebSocket update failed: {ws_error}")
+        # Disposition closes wrap-up, so the next progressive dial can go out right away
+        progressive_dialer.agent_available(agent_id, delay=0)
         
         return {"message": "Disposition set successfully", "call_id": call_id}
     except HTTPException:
@@ -431,14 +422,6 @@ async def mute_call(call_id: int, db: Session = Depends(get_db), agent_id: int =
         if success:
             call.is_muted = True
             db.commit()
-            
-            try:
-                await websocket_manager.send_call_update(agent_id, {
-                    "call_id": call.id,
-                    "is_muted": True
-                })
-            except Exception as ws_error:
-                logger.warning(f"WebSocket update failed: {ws_error}")
         
         return {"success": success, "is_muted": call.is_muted}
     except HTTPException:
@@ -465,14 +448,6 @@ async def unmute_call(call_id: int, db: Session = Depends(get_db), agent_id: int
         if success:
             call.is_muted = False
             db.commit()
-            
-            try:
-                await websocket_manager.send_call_update(agent_id, {
-                    "call_id": call.id,
-                    "is_muted": False
-                })
-            except Exception as ws_error:
-                logger.warning(f"WebSocket update failed: {ws_error}")
         
         return {"success": success, "is_muted": call.is_muted}
     except HTTPException:
@@ -499,14 +474,6 @@ async def hold_call(call_id: int, db: Session = Depends(get_db), agent_id: int =
         if success:
             call.is_on_hold = True
             db.commit()
-            
-            try:
-                await websocket_manager.send_call_update(agent_id, {
-                    "call_id": call.id,
-                    "is_on_hold": True
-                })
-            except Exception as ws_error:
-                logger.warning(f"WebSocket update failed: {ws_error}")
         
         return {"success": success, "is_on_hold": call.is_on_hold}
     except HTTPException:
@@ -533,14 +500,6 @@ async def unhold_call(call_id: int, db: Session = Depends(get_db), agent_id: int
         if success:
             call.is_on_hold = False
             db.commit()
-            
-            try:
-                await websocket_manager.send_call_update(agent_id, {
-                    "call_id": call.id,
-                    "is_on_hold": False
-                })
-            except Exception as ws_error:
-                logger.warning(f"WebSocket update failed: {ws_error}")
         
         return {"success": success, "is_on_hold": call.is_on_hold}
     except HTTPException:
@@ -575,17 +534,6 @@ async def answer_inbound_call(call_id: int, db: Session = Depends(get_db), agent
         
         db.commit()
         
-        # Send WebSocket update
-        try:
-            await websocket_manager.send_call_update(agent_id, {
-                "call_id": call.id,
-                "status": call.status,
-                "phone_number": call.phone_number,
-                "direction": call.direction
-            })
-        except Exception as ws_error:
-            logger.warning(f"WebSocket update failed: {ws_error}")
-        
         return {"success": True, "call_id": call_id, "status": call.status}
     except HTTPException:
         raise
@@ -621,15 +569,6 @@ async def reject_inbound_call(call_id: int, db: Session = Depends(get_db), agent
             except Exception as hangup_error:
                 logger.warning(f"Error hanging up rejected call: {hangup_error}")
         
-        # Send WebSocket update
-        try:
-            await websocket_manager.send_call_update(agent_id, {
-                "call_id": call.id,
-                "status": call.status
-            })
-        except Exception as ws_error:
-            logger.warning(f"WebSocket update failed: {ws_error}")
-        
         return {"success": True, "call_id": call_id, "status": call.status}
     except HTTPException:
         raise
@@ -1,44 +1,99 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, tuple_
 from typing import Optional, List
 from datetime import datetime, timezone, timedelta
 import pandas as pd
 import io
 from app.core.database import get_db
-from app.schemas.contact import ContactResponse, ContactUpdate, ContactCreate
+from app.core.phone import normalize_phone, normalize_phone_prefix, normalize_phone_series
+from app.schemas.contact import ContactResponse, ContactUpdate, ContactCreate, ContactPage
 from app.models.contact import Contact, ContactStatus, GenderType
 from app.api.deps import get_current_agent_id
+from app.api.pagination import encode_cursor, decode_cursor, estimate_count
+from app.services.hopper_service import campaign_hopper
+from app.services.dnc_service import dnc_index
 
 router = APIRouter(prefix="/api/contacts", tags=["contacts"])
 
 
-@router.get("/", response_model=list[ContactResponse])
+@router.get("/", response_model=ContactPage)
 async def list_contacts(
     campaign_id: Optional[int] = Query(None),
+    status: Optional[ContactStatus] = Query(None),
+    city: Optional[str] = Query(None),
+    phone_prefix: Optional[str] = Query(None, description="Match contacts whose phone starts with this value"),
+    phone: Optional[str] = Query(None, description="Match contacts with this number in any format (E.164 match)"),
+    name: Optional[str] = Query(None, description="Match contacts whose name contains this value (case-insensitive)"),
+    dialed: Optional[bool] = Query(None, description="true = dialed at least once, false = never dialed"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db),
     agent_id: int = Depends(get_current_agent_id)
 ):
-    """List all contacts, optionally filtered by campaign. All agents see all contacts (or filtered by campaign if specified)."""
-    from app.models.agent import Agent
-    
+    """
+    List contacts newest first, one page at a time. All agents see all contacts (or filtered by campaign if specified).
+
+    Uses keyset pagination on (created_at, id): pass next_cursor back as cursor to fetch the next page.
+    estimated_total comes from the query planner, not COUNT(*), so treat it as approximate.
+    """
     query = db.query(Contact)
-    
+
     # Apply campaign filter if provided
     # If no campaign_id is specified, show all contacts to all agents
     if campaign_id:
         query = query.filter(Contact.campaign_id == campaign_id)
-    
-    # All agents can see all contacts (no restriction based on agent's campaign)
-    # This allows all agents to access all imported contacts
-    contacts = query.order_by(Contact.created_at.desc()).all()
-    return [ContactResponse.model_validate(contact) for contact in contacts]
+    if status:
+        query = query.filter(Contact.status == status.value)
+    if city:
+        query = query.filter(Contact.city == city)
+    if phone:
+        normalized = normalize_phone(phone)
+        if not normalized:
+            # Not a usable number; "== None" would match every contact without one
+            return ContactPage(items=[], next_cursor=None, has_more=False, estimated_total=0)
+        query = query.filter(Contact.phone_normalized == normalized)
+    if phone_prefix:
+        # Match the normalized number, however the prefix was typed (digits only, so no LIKE wildcards)
+        prefix = normalize_phone_prefix(phone_prefix)
+        if prefix:
+            query = query.filter(Contact.phone_normalized.like(f"{prefix}%"))
+    if name and name.strip():
+        # Escape LIKE wildcards so the value is matched literally
+        term = name.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        query = query.filter(Contact.name.ilike(f"%{term}%", escape='\\'))
+    if dialed is not None:
+        query = query.filter(Contact.last_dialed_at.isnot(None) if dialed else Contact.last_dialed_at.is_(None))
+
+    estimated_total = estimate_count(db, query)
+
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Contact.created_at, Contact.id) < (cursor_created_at, cursor_id))
+
+    # Fetch one extra row to know whether another page exists
+    contacts = query.order_by(Contact.created_at.desc(), Contact.id.desc()).limit(limit + 1).all()
+    has_more = len(contacts) > limit
+    contacts = contacts[:limit]
+
+    next_cursor = None
+    if has_more and contacts:
+        last = contacts[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return ContactPage(
+        items=[ContactResponse.model_validate(contact) for contact in contacts],
+        next_cursor=next_cursor,
+        has_more=has_more,
+        estimated_total=estimated_total
+    )
 
 
 @router.post("/", response_model=ContactResponse)
 async def create_contact(contact: ContactCreate, db: Session = Depends(get_db)):
     """Create a new contact"""
     db_contact = Contact(**contact.dict())
+    db_contact.phone_normalized = normalize_phone(db_contact.phone)
     db.add(db_contact)
     db.commit()
     db.refresh(db_contact)
@@ -60,6 +115,8 @@ async def update_contact(
     update_data = contact_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(contact, field, value)
+    if 'phone' in update_data:
+        contact.phone_normalized = normalize_phone(contact.phone)
     
     db.commit()
     db.refresh(contact)
@@ -142,6 +199,21 @@ async def import_contacts(
                 detail="Excel file must contain a phone column. Supported names: phone, businessphone, phonenumber, mobile, cell, tel, telephone"
             )
         
+        # Normalize the whole phone column at once; the float artifact ("3001234567.0")
+        # pandas produces for numeric cells is handled here too
+        df['_phone_normalized'] = normalize_phone_series(df[phone_col])
+        
+        # Existing numbers in the campaign, fetched in one query for dedupe
+        candidates = df['_phone_normalized'].dropna().unique().tolist()
+        existing_numbers = set()
+        for start in range(0, len(candidates), 5000):
+            existing_numbers.update(
+                n for (n,) in db.query(Contact.phone_normalized).filter(
+                    Contact.campaign_id == campaign_id,
+                    Contact.phone_normalized.in_(candidates[start:start + 5000])
+                )
+            )
+        
         # Process rows
         imported = 0
         skipped = 0
@@ -150,22 +222,30 @@ async def import_contacts(
         for index, row in df.iterrows():
             try:
                 # Get phone (required)
-                phone = str(row.get(phone_col, '')).strip() if pd.notna(row.get(phone_col)) else ''
-                if not phone or phone == 'nan':
+                phone_normalized = row['_phone_normalized']
+                if pd.isna(phone_normalized):
                     skipped += 1
-                    errors.append(f"Row {index + 2}: Missing phone number")
+                    if pd.notna(row.get(phone_col)) and str(row.get(phone_col)).strip():
+                        errors.append(f"Row {index + 2}: Invalid phone number {row.get(phone_col)}")
+                    else:
+                        errors.append(f"Row {index + 2}: Missing phone number")
                     continue
+                # Keep the number as entered for display, minus the float artifact
+                phone = str(row.get(phone_col)).strip()
+                if phone.endswith('.0'):
+                    phone = phone[:-2]
                 
-                # Check if contact already exists
-                existing = db.query(Contact).filter(
-                    Contact.phone == phone,
-                    Contact.campaign_id == campaign_id
-                ).first()
+                if dnc_index.contains(phone_normalized):
+                    skipped += 1
+                    errors.append(f"Row {index + 2}: Phone {phone} is on the DNC list")
+                    continue
                 
-                if existing:
+                # Check if contact already exists (also catches duplicates within the file)
+                if phone_normalized in existing_numbers:
                     skipped += 1
                     errors.append(f"Row {index + 2}: Contact with phone {phone} already exists")
                     continue
+                existing_numbers.add(phone_normalized)
                 
                 # Get optional fields using mapped columns
                 name = str(row.get(name_col, '')).strip() if name_col and pd.notna(row.get(name_col)) else None
@@ -198,6 +278,7 @@ async def import_contacts(
                     campaign_id=campaign_id,
                     name=name if name and name != 'nan' else None,
                     phone=phone,
+                    phone_normalized=phone_normalized,
                     address=address if address and address != 'nan' else None,
                     city=city if city and city != 'nan' else None,
                     occupation=occupation if occupation and occupation != 'nan' else None,
@@ -240,7 +321,10 @@ async def get_next_contact(
     db: Session = Depends(get_db),
     agent_id: int = Depends(get_current_agent_id)
 ):
-    """Get next available contact to dial (status = NEW, not DO_NOT_CALL)"""
+    """
+    Get next available contact to dial (status = NEW, not DO_NOT_CALL)
+    The contact is leased to the calling agent so other agents skip it until it is dialed or the lease expires
+    """
     from app.models.agent import Agent
     
     # Get agent's campaign if campaign_id not provided
@@ -248,20 +332,12 @@ async def get_next_contact(
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    # Build query for next contact
-    query = db.query(Contact).filter(
-        Contact.status == ContactStatus.NEW.value,
-        Contact.status != ContactStatus.DO_NOT_CALL.value
-    )
-    
     # Filter by campaign if provided or agent has campaign
-    if campaign_id:
-        query = query.filter(Contact.campaign_id == campaign_id)
-    elif hasattr(agent, 'campaign_id') and agent.campaign_id:
-        query = query.filter(Contact.campaign_id == agent.campaign_id)
+    if not campaign_id and hasattr(agent, 'campaign_id') and agent.campaign_id:
+        campaign_id = agent.campaign_id
     
-    # Get oldest NEW contact (first in, first out)
-    contact = query.order_by(Contact.created_at.asc()).first()
+    # Oldest dialable contact (first in, first out), skipping ones other agents hold
+    contact = campaign_hopper.lease_next(db, agent_id, campaign_id)
     
     if not contact:
         return None
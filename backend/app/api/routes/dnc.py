@@ -0,0 +1,121 @@
+import asyncio
+import io
+import logging
+import pandas as pd
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.phone import normalize_phone
+from app.schemas.dnc import DNCCreate, DNCCheckResponse
+from app.services.dnc_service import dnc_index
+from app.api.deps import require_admin
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/admin/dnc", tags=["dnc"])
+
+PHONE_COLUMN_NAMES = ['phone', 'phonenumber', 'number', 'mobile', 'cell', 'tel', 'telephone', 'msisdn']
+
+
+@router.get("/check", response_model=DNCCheckResponse)
+async def check_number(
+    phone: str = Query(..., description="Phone number to screen"),
+    agent_id: int = Depends(require_admin)
+):
+    """Check whether a number is on the DNC list (admin only)"""
+    return DNCCheckResponse(phone_number=phone, normalized=normalize_phone(phone), on_dnc=dnc_index.contains(phone))
+
+
+@router.get("/stats")
+async def get_dnc_stats(
+    agent_id: int = Depends(require_admin)
+):
+    """Size of the in-memory DNC index (admin only)"""
+    return {"numbers": len(dnc_index), "loaded": dnc_index.loaded}
+
+
+@router.post("", status_code=201)
+async def add_number(
+    entry: DNCCreate,
+    db: Session = Depends(get_db),
+    agent_id: int = Depends(require_admin)
+):
+    """Add a single number to the DNC list (admin only)"""
+    normalized = normalize_phone(entry.phone_number)
+    if not normalized:
+        raise HTTPException(status_code=400, detail="Invalid phone number")
+    try:
+        dnc_index.add_numbers(db, [normalized], source="manual", reason=entry.reason, added_by=agent_id)
+        return {"success": True, "phone_number": normalized}
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error adding DNC number: {e}")
+        raise HTTPException(status_code=500, detail="Error adding number to DNC list")
+
+
+@router.post("/upload")
+async def upload_numbers(
+    file: UploadFile = File(...),
+    reason: str = Query(None, description="Reason recorded on every uploaded number"),
+    db: Session = Depends(get_db),
+    agent_id: int = Depends(require_admin)
+):
+    """
+    Bulk upload DNC numbers from a CSV or Excel file (admin only)
+    Uses the first column named like a phone column, or the first column otherwise.
+    Numbers are screened immediately; no restart needed.
+    """
+    if not file.filename.endswith(('.csv', '.xlsx', '.xls')):
+        raise HTTPException(status_code=400, detail="File must be CSV or Excel format (.csv, .xlsx, .xls)")
+
+    contents = await file.read()
+    try:
+        # Read as text so long numbers are not turned into floats
+        if file.filename.endswith('.csv'):
+            df = pd.read_csv(io.BytesIO(contents), dtype=str)
+        else:
+            df = pd.read_excel(io.BytesIO(contents), dtype=str)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error reading file: {str(e)}")
+
+    if df.empty:
+        return {"success": True, "submitted": 0, "total_rows": 0}
+
+    columns = {str(c).lower().strip().replace(' ', '').replace('_', ''): c for c in df.columns}
+    phone_col = next((columns[name] for name in PHONE_COLUMN_NAMES if name in columns), df.columns[0])
+
+    try:
+        # Off the event loop: uploads can carry millions of rows
+        submitted = await asyncio.to_thread(
+            dnc_index.add_numbers,
+            db,
+            df[phone_col].dropna().tolist(),
+            "upload",
+            reason,
+            agent_id
+        )
+        logger.info(f"DNC upload by agent {agent_id}: {submitted} numbers from {len(df)} rows")
+        return {"success": True, "submitted": submitted, "total_rows": len(df)}
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error uploading DNC numbers: {e}")
+        raise HTTPException(status_code=500, detail="Error uploading DNC numbers")
+
+
+@router.delete("/{phone_number}")
+async def remove_number(
+    phone_number: str,
+    db: Session = Depends(get_db),
+    agent_id: int = Depends(require_admin)
+):
+    """Remove a number from the DNC list (admin only)"""
+    try:
+        if not dnc_index.remove_number(db, phone_number):
+            raise HTTPException(status_code=404, detail="Number not on DNC list")
+        return {"success": True}
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error removing DNC number: {e}")
+        raise HTTPException(status_code=500, detail="Error removing number from DNC list")
@@ -0,0 +1,109 @@
+import csv
+import io
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import get_db, SessionLocal
+from app.services.report_rollup import report_rollup, day_start, INTERVALS, GROUP_COLUMNS
+from app.services.call_partitions import call_partitions, EXPORT_COLUMNS
+from app.api.deps import get_token_claims, require_admin
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/reports", tags=["reports"])
+
+
+@router.get("/timeseries")
+async def get_timeseries(
+    interval: str = Query("day", description="Bucket size: hour or day"),
+    start: Optional[date] = Query(None, description="First UTC day (default: 29 days before end)"),
+    end: Optional[date] = Query(None, description="Last UTC day, inclusive (default: today)"),
+    group_by: Optional[str] = Query(None, description="agent, campaign or disposition"),
+    agent_id: Optional[int] = None,
+    campaign_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    claims: dict = Depends(get_token_claims)
+):
+    """Bucketed call counts from the hourly rollups (agents only see their own calls)"""
+    if interval not in INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of: {', '.join(INTERVALS)}")
+    if group_by and group_by not in GROUP_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of: {', '.join(GROUP_COLUMNS)}")
+    
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days + 1 > settings.REPORT_MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {settings.REPORT_MAX_RANGE_DAYS} days")
+    
+    if not claims["is_admin"]:
+        agent_id = claims["agent_id"]
+    
+    try:
+        points = report_rollup.timeseries(
+            db, interval, start, end,
+            group_by=group_by, agent_id=agent_id, campaign_id=campaign_id
+        )
+        return {
+            "interval": interval,
+            "group_by": group_by,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "points": points
+        }
+    except Exception as e:
+        logger.error(f"Error fetching report time series: {e}")
+        raise HTTPException(status_code=500, detail="Error fetching report")
+
+
+@router.get("/cache/stats")
+async def get_report_cache_stats(
+    db: Session = Depends(get_db),
+    agent_id: int = Depends(require_admin)
+):
+    """Closed-bucket cache counters (admin only)"""
+    return report_rollup.get_metrics()
+
+
+def _export_csv(start: datetime, end: datetime):
+    db = SessionLocal()
+    try:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        for count, row in enumerate(call_partitions.export_rows(db, start, end), 1):
+            writer.writerow(row)
+            if count % 1000 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    except Exception as e:
+        logger.error(f"Error exporting calls: {e}")
+        raise
+    finally:
+        db.close()
+
+
+@router.get("/calls/export")
+async def export_calls(
+    start: date = Query(..., description="First UTC day"),
+    end: date = Query(..., description="Last UTC day, inclusive"),
+    agent_id: int = Depends(require_admin)
+):
+    """Stream calls as CSV (admin only); archived months are read from their Parquet files"""
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days + 1 > settings.REPORT_MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {settings.REPORT_MAX_RANGE_DAYS} days")
+    
+    return StreamingResponse(
+        _export_csv(day_start(start), day_start(end + timedelta(days=1))),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename=calls_{start}_{end}.csv"}
+    )
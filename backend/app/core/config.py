@@ -10,6 +10,13 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
+    SESSION_CACHE_TTL_SECONDS: float = 60.0  # How long a verified token session is trusted before re-checking the database
+    SESSION_CACHE_MAX_ENTRIES: int = 10000  # Verified sessions kept per worker
+    PASSWORD_HASH_WORKERS: int = 0  # bcrypt worker processes (0 = min(4, CPU count))
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Password checks running or queued before logins get 503
+    LOGIN_MAX_ATTEMPTS_PER_IP: int = 600  # Login attempts per minute from one address (call centres share NAT)
+    LOGIN_MAX_FAILURES: int = 5  # Failed attempts from one address that lock a username for it...
+    LOGIN_FAILURE_WINDOW_SECONDS: float = 300.0  # ...within this window, and for its remainder
     
     # Asterisk AMI (Asterisk Manager Interface)
     ASTERISK_HOST: str = "localhost"
@@ -19,6 +26,8 @@ class Settings(BaseSettings):
     ASTERISK_CONTEXT: str = "from-internal"
     ASTERISK_TRUNK: str = "SIP/trunk"
     USE_MOCK_DIALER: bool = True
+    ASTERISK_RELOAD_DEBOUNCE_SECONDS: float = 2.0  # Quiet period before queued config reloads are sent
+    ASTERISK_BULK_MAX_ENDPOINTS: int = 1000  # Most extensions one bulk provisioning request may create
     
     # CORS - Default includes both ports
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:3001"]
@@ -27,6 +36,61 @@ class Settings(BaseSettings):
     DEFAULT_CALL_TIMEOUT: int = 60
     MAX_CONCURRENT_CALLS: int = 10
     
+    # Campaign hopper (contact leasing)
+    HOPPER_LEASE_SECONDS: int = 120  # How long an agent may hold a contact before dialing
+    HOPPER_CALL_LEASE_SECONDS: int = 3600  # Lease held while the call is in progress
+    
+    # Predictive dialing
+    PREDICTIVE_TICK_SECONDS: float = 2.0  # How often pacing is recomputed
+    PREDICTIVE_TARGET_ABANDON_RATE: float = 0.03  # Abandoned / answered calls to aim for
+    PREDICTIVE_MAX_DIAL_RATIO: float = 3.0  # Upper bound on lines dialed per available agent
+    PREDICTIVE_STATS_WINDOW: int = 200  # Recent calls used for answer/abandon rates
+    PREDICTIVE_HOLD_CONTEXT: str = "predictive-hold"  # Dialplan context answered calls wait in
+    
+    # Progressive dialing
+    PROGRESSIVE_WRAPUP_SECONDS: float = 5.0  # Wrap-up time after hangup before the next auto-dial
+    
+    # Contact retries
+    CALLING_TIMEZONE: str = "UTC"  # Timezone campaign calling windows are expressed in
+    
+    # Phone normalization (E.164)
+    DEFAULT_COUNTRY_CODE: str = "92"  # Prepended to national numbers
+    NATIONAL_NUMBER_MAX_DIGITS: int = 10  # Numbers this short (without trunk 0) are national
+    
+    # Do Not Call screening
+    DNC_REFRESH_SECONDS: int = 30  # Pick up numbers added by other workers
+    DNC_FULL_RELOAD_SECONDS: int = 3600  # Full reload (catches deletions made elsewhere)
+    
+    # Stats endpoints
+    STATS_CACHE_TTL_SECONDS: float = 5.0  # Upper bound on how stale a cached stats response can be
+    
+    # Reporting rollups
+    REPORT_ROLLUP_INTERVAL_SECONDS: int = 60  # How often recent calls are re-aggregated
+    REPORT_ROLLUP_LOOKBACK_HOURS: int = 3  # Hours re-aggregated each run (at least 1); older hours are closed
+    REPORT_CACHE_MAX_DAYS: int = 20000  # Cached closed (series, day) entries
+    REPORT_MAX_RANGE_DAYS: int = 366  # Longest range a single report may request
+    
+    # WebSocket delivery
+    WS_SEND_QUEUE_SIZE: int = 256  # Outbound messages buffered per connection; a full queue disconnects the client
+    WS_SEND_QUEUE_HIGH_WATER: int = 64  # Queue depth that marks a client as slow
+    WS_SLOW_CLIENT_SECONDS: float = 10.0  # How long a client may stay over the high-water mark
+    WS_SEND_TIMEOUT_SECONDS: float = 10.0  # Longest a single send may take
+    WS_COALESCE_MS: int = 30  # Window for merging/batching queued messages (0 sends as soon as queued)
+    WS_BATCH_MAX_MESSAGES: int = 100  # Most messages packed into one frame
+    WS_PING_INTERVAL_SECONDS: float = 20.0  # How often each connection is pinged
+    WS_PING_TIMEOUT_SECONDS: float = 60.0  # Connections silent for longer are closed
+    WS_REPLAY_BUFFER_SIZE: int = 200  # Recent messages kept per agent for resuming after a reconnect
+    WS_RESUME_WINDOW_SECONDS: float = 120.0  # How long an agent's buffer outlives its last connection
+    WS_PER_MESSAGE_DEFLATE: bool = True  # Offer permessage-deflate compression (python app/main.py; CLI: --ws-per-message-deflate)
+    WS_PUBSUB_BACKEND: str = "postgres"  # "postgres" (LISTEN/NOTIFY, multi-worker) or "memory" (single worker)
+    WS_PUBSUB_CHANNEL: str = "ak_dialer_ws"  # NOTIFY channel shared by all API workers
+    
+    # Calls partitioning and archival
+    CALLS_PARTITION_MONTHS_AHEAD: int = 3  # Empty monthly partitions kept ready ahead of now
+    CALLS_ARCHIVE_AFTER_MONTHS: int = 12  # Partitions older than this are moved to Parquet
+    CALLS_ARCHIVE_DIR: str = "archive"  # Local directory for archived Parquet files
+    CALLS_ARCHIVE_BATCH_SIZE: int = 10000  # Rows read/deleted per batch while archiving or exporting
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
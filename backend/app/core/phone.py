@@ -0,0 +1,98 @@
+"""
+Phone number normalization
+Reduces numbers to E.164 digits (country code + national number, no "+") for
+matching: dedupe, DNC screening and caller lookups
+"""
+import re
+from typing import Optional
+import pandas as pd
+from app.core.config import settings
+
+_NON_DIGITS = re.compile(r"\D")
+
+# E.164 allows at most 15 digits; anything under 8 is an extension or junk
+MIN_DIGITS = 8
+MAX_DIGITS = 15
+
+
+def normalize_phone(value) -> Optional[str]:
+    """
+    Normalize a single phone number to E.164 digits
+    "+92 300-1234567", "0092300...", "0300...", "3001234567" and the spreadsheet float
+    artifact "3001234567.0" all become "923001234567" (with DEFAULT_COUNTRY_CODE 92)
+    """
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return None
+        value = f"{value:.0f}"
+    text = str(value).strip()
+    if text.endswith(".0"):
+        text = text[:-2]
+    international = text.startswith("+") or text.startswith("00")
+    digits = _NON_DIGITS.sub("", text)
+    if text.startswith("00"):
+        digits = digits[2:]
+
+    country_code = settings.DEFAULT_COUNTRY_CODE
+    if not international:
+        if digits.startswith("0"):
+            # National trunk prefix
+            digits = country_code + digits[1:]
+        elif len(digits) <= settings.NATIONAL_NUMBER_MAX_DIGITS:
+            digits = country_code + digits
+
+    if not MIN_DIGITS <= len(digits) <= MAX_DIGITS:
+        return None
+    return digits
+
+
+def normalize_phone_prefix(value: str) -> Optional[str]:
+    """
+    Normalize the start of a phone number for prefix matching against normalized numbers
+    "+92300", "0092300", "0300", "92300" and "300" all become "92300"; a prefix already
+    starting with DEFAULT_COUNTRY_CODE is taken as international. None if it has no digits
+    """
+    text = value.strip()
+    international = text.startswith("+") or text.startswith("00")
+    digits = _NON_DIGITS.sub("", text)
+    if text.startswith("00"):
+        digits = digits[2:]
+    if not digits:
+        return None
+
+    country_code = settings.DEFAULT_COUNTRY_CODE
+    if not international:
+        if digits.startswith("0"):
+            digits = country_code + digits[1:]
+        elif not digits.startswith(country_code):
+            digits = country_code + digits
+    return digits
+
+
+def normalize_phone_series(values: pd.Series) -> pd.Series:
+    """
+    Vectorized normalize_phone over a whole column (e.g. an imported spreadsheet)
+    Invalid or missing numbers come back as <NA>
+    """
+    if pd.api.types.is_float_dtype(values):
+        # Numeric columns read by pandas: format without the ".0" (and without exponents)
+        text = values.map(lambda v: f"{v:.0f}" if v == v else None).astype("string")
+    else:
+        text = values.astype("string")
+    text = text.str.strip().str.replace(r"\.0$", "", regex=True)
+
+    has_00 = text.str.startswith("00").fillna(False)
+    international = text.str.startswith("+").fillna(False) | has_00
+    digits = text.str.replace(r"\D", "", regex=True)
+    digits = digits.where(~has_00, digits.str.slice(2))
+
+    country_code = settings.DEFAULT_COUNTRY_CODE
+    trunk = ~international & digits.str.startswith("0").fillna(False)
+    digits = digits.where(~trunk, country_code + digits.str.slice(1))
+    national = ~international & ~trunk & (digits.str.len() <= settings.NATIONAL_NUMBER_MAX_DIGITS).fillna(False)
+    digits = digits.where(~national, country_code + digits)
+
+    valid = digits.str.len().between(MIN_DIGITS, MAX_DIGITS).fillna(False)
+    return digits.where(valid, pd.NA)
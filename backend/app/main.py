@@ -8,6 +8,15 @@ from app.core.security import decode_access_token
 from app.api import api_router
 from app.websockets.dialer import router as websocket_router
 from app.services.ami_event_listener import ami_event_listener
+from app.services.predictive_dialer import predictive_dialer
+from app.services.progressive_dialer import progressive_dialer
+from app.services.retry_scheduler import retry_scheduler
+from app.services.dnc_service import dnc_index
+from app.services.live_updates import live_updates
+from app.services.websocket_manager import websocket_manager
+from app.services.report_rollup import report_rollup
+from app.services.call_partitions import call_partitions
+from app.services.password_hasher import password_hasher
 import asyncio
 import logging
 
@@ -47,10 +56,42 @@ async def lifespan(app: FastAPI):
     else:
         logger.info("Using mock dialer - AMI event listener disabled")
     
+    # Fan WebSocket messages out across API workers (LISTEN/NOTIFY by default)
+    await websocket_manager.start()
+    
+    # Push committed call/stats changes to connected agents
+    live_updates.start()
+    
+    # Load the Do Not Call index before anything can dial
+    await dnc_index.start()
+    
+    # Pace predictive campaigns (idle when no predictive campaign is active)
+    await predictive_dialer.start()
+    
+    # Release NOT_ANSWERED/BUSY/FAILED contacts back to the hopper when their retry is due
+    await retry_scheduler.start()
+    
+    # Keep the hourly reporting rollups current
+    await report_rollup.start()
+    
+    # Create upcoming monthly partitions of calls (no-op until calls is partitioned)
+    await call_partitions.start()
+    
+    # Spawn the bcrypt worker processes before the first login arrives
+    await password_hasher.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down AK Dialer API...")
+    await predictive_dialer.stop()
+    await progressive_dialer.stop()
+    await retry_scheduler.stop()
+    await report_rollup.stop()
+    await call_partitions.stop()
+    await dnc_index.stop()
+    await websocket_manager.stop()
+    await password_hasher.stop()
     if not settings.USE_MOCK_DIALER:
         try:
             # Set a timeout for shutdown to avoid hanging
@@ -111,4 +152,10 @@ async def health():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        ws="websockets",
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE
+    )
@@ -4,5 +4,8 @@ from app.models.contact import Contact
 from app.models.call import Call
 from app.models.call_recording import CallRecording
 from app.models.call_quality import CallQualityMetrics
+from app.models.dnc import DNCEntry
+from app.models.agent_performance import AgentPerformance
+from app.models.call_rollup import CallRollupHourly
 
-__all__ = ["Agent", "AgentSession", "Campaign", "Contact", "Call"]
+__all__ = ["Agent", "AgentSession", "Campaign", "Contact", "Call", "DNCEntry", "AgentPerformance", "CallRollupHourly"]
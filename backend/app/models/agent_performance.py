@@ -0,0 +1,34 @@
+"""
+Agent Performance Model
+Per-agent, per-day call counters maintained incrementally as calls end
+"""
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, Float, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class AgentPerformance(Base):
+    __tablename__ = "agent_performance"
+    __table_args__ = (
+        UniqueConstraint("agent_id", "date", "period_type", name="agent_performance_agent_id_date_period_type_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    agent_id = Column(Integer, ForeignKey("agents.id", ondelete="CASCADE"), nullable=False, index=True)
+    date = Column(Date, nullable=False, index=True)  # UTC day of the call's start_time
+    period_type = Column(String(20), default="daily")
+    total_calls = Column(Integer, default=0)
+    inbound_calls = Column(Integer, default=0)
+    outbound_calls = Column(Integer, default=0)
+    answered_calls = Column(Integer, default=0)
+    missed_calls = Column(Integer, default=0)  # No answer, busy or failed ("abandoned" in stats)
+    total_talk_time = Column(Integer, default=0)  # seconds
+    total_duration = Column(Integer, default=0)  # seconds, over calls with a duration
+    duration_calls = Column(Integer, default=0)  # calls counted in total_duration
+    avg_call_duration = Column(Integer, default=0)  # seconds
+    total_sales = Column(Integer, default=0)
+    conversion_rate = Column(Float, default=0.0)
+    total_break_time = Column(Integer, default=0)
+    login_duration = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -25,12 +25,17 @@ class CallDirection(str, enum.Enum):
 
 class Call(Base):
     __tablename__ = "calls"
+    __table_args__ = (
+        # Keyset pagination of an agent's history on (start_time, id), newest first
+        Index("idx_calls_agent_start_time_id", "agent_id", "start_time", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     agent_id = Column(Integer, ForeignKey("agents.id"), nullable=True)
     campaign_id = Column(Integer, ForeignKey("campaigns.id"), nullable=True)
     contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=True)
     phone_number = Column(String, nullable=False, index=True)
+    phone_normalized = Column(String, nullable=True, index=True)  # E.164 digits, see app.core.phone
     direction = Column(String, default=CallDirection.OUTBOUND.value)
     status = Column(String, default=CallStatus.DIALING.value)
     start_time = Column(DateTime(timezone=True), server_default=func.now())
@@ -41,7 +46,7 @@ class Call(Base):
     ring_duration = Column(Integer, default=0)  # Ringing duration (seconds)
     talk_duration = Column(Integer, default=0)  # Actual talk time (answered to end, seconds)
     recording_path = Column(String, nullable=True)
-    call_unique_id = Column(String, unique=True, index=True, nullable=True)  # Unique call ID
+    call_unique_id = Column(String, index=True, nullable=True)  # Asterisk call ID (not enforced unique: calls is partitioned by start_time)
     freeswitch_channel = Column(String, nullable=True)  # Legacy field name, stores Asterisk channel
     agent_channel = Column(String, nullable=True)  # Agent's Asterisk channel
     customer_channel = Column(String, nullable=True)  # Customer's Asterisk channel
@@ -51,6 +56,7 @@ class Call(Base):
     billsec = Column(Integer, default=0)  # Billed seconds from CDR
     disposition = Column(String, nullable=True)  # Call disposition (SALE, NA, BUSY, etc.)
     notes = Column(String, nullable=True)
+    stats_recorded = Column(Boolean, default=False)  # Counted in agent_performance
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -0,0 +1,29 @@
+"""
+Call Rollup Model
+Hourly call counts per agent, campaign and disposition, used by the reporting API
+"""
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class CallRollupHourly(Base):
+    __tablename__ = "call_rollups_hourly"
+    __table_args__ = (
+        Index("idx_call_rollups_hourly_agent_bucket", "agent_id", "bucket_start"),
+        Index("idx_call_rollups_hourly_campaign_bucket", "campaign_id", "bucket_start"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    bucket_start = Column(DateTime(timezone=True), nullable=False, index=True)  # UTC hour of the call's start_time
+    agent_id = Column(Integer, ForeignKey("agents.id", ondelete="CASCADE"), nullable=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=True)
+    disposition = Column(String(50), nullable=True)
+    total_calls = Column(Integer, default=0)
+    inbound_calls = Column(Integer, default=0)
+    outbound_calls = Column(Integer, default=0)
+    answered_calls = Column(Integer, default=0)
+    missed_calls = Column(Integer, default=0)  # No answer, busy or failed
+    total_talk_time = Column(Integer, default=0)  # seconds
+    total_duration = Column(Integer, default=0)  # seconds
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
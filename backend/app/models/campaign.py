@@ -26,6 +26,13 @@ class Campaign(Base):
     description = Column(String, nullable=True)
     status = Column(String, default=CampaignStatus.ACTIVE.value)
     dial_method = Column(String, default=DialMethod.MANUAL.value)
+    # Retry rules for unanswered, busy and failed contacts
+    max_attempts = Column(Integer, default=3)  # Total dial attempts per contact
+    retry_no_answer_minutes = Column(Integer, default=60)
+    retry_busy_minutes = Column(Integer, default=15)
+    retry_failed_minutes = Column(Integer, default=240)
+    call_window_start = Column(String, nullable=True)  # "HH:MM" in CALLING_TIMEZONE, e.g. "09:00"
+    call_window_end = Column(String, nullable=True)  # "HH:MM" in CALLING_TIMEZONE, e.g. "20:00"
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
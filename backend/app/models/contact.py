@@ -86,6 +86,7 @@ class Contact(Base):
     campaign_id = Column(Integer, ForeignKey("campaigns.id"), nullable=False)
     name = Column(String, nullable=True)
     phone = Column(String, nullable=False, index=True)
+    phone_normalized = Column(String, nullable=True, index=True)  # E.164 digits, see app.core.phone
     address = Column(String, nullable=True)
     city = Column(String, nullable=True)
     occupation = Column(String, nullable=True)
@@ -100,6 +101,9 @@ class Contact(Base):
     status = Column(EnumValueType(ContactStatus, enum_name='contact_status_enum'), default=ContactStatus.NEW)
     last_dialed_at = Column(DateTime(timezone=True), nullable=True)  # When contact was last dialed
     dial_attempts = Column(Integer, default=0)  # Number of dial attempts
+    leased_by_agent_id = Column(Integer, ForeignKey("agents.id"), nullable=True)  # Agent holding the hopper lease
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)  # When the hopper lease lapses
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)  # When a retry is due (set by retry scheduler)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
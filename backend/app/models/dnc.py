@@ -0,0 +1,20 @@
+"""
+DNC Model
+Numbers that must never be dialed (dnc_list table)
+"""
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class DNCEntry(Base):
+    __tablename__ = "dnc_list"
+
+    id = Column(Integer, primary_key=True, index=True)
+    phone_number = Column(String(50), unique=True, index=True, nullable=False)  # Normalized digits
+    reason = Column(String(255), nullable=True)
+    source = Column(String(100), default="manual")  # manual, upload, disposition
+    added_by = Column(Integer, ForeignKey("agents.id"), nullable=True)
+    notes = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
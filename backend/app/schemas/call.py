@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from app.models.call import CallStatus, CallDirection
 
 
@@ -43,6 +43,13 @@ class CallResponse(CallBase):
         use_enum_values = True
 
 
+class CallPage(BaseModel):
+    items: List[CallResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    estimated_total: Optional[int] = None
+
+
 class CallUpdate(BaseModel):
     status: Optional[CallStatus] = None
     duration: Optional[int] = None
@@ -1,13 +1,23 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 from app.models.campaign import CampaignStatus, DialMethod
 
 
+# "HH:MM", 24-hour clock
+WINDOW_TIME_PATTERN = r"^([01]\d|2[0-3]):[0-5]\d$"
+
+
 class CampaignBase(BaseModel):
     name: str
     code: str
     description: Optional[str] = None
+    max_attempts: int = Field(3, ge=1, le=50)
+    retry_no_answer_minutes: int = Field(60, ge=0)
+    retry_busy_minutes: int = Field(15, ge=0)
+    retry_failed_minutes: int = Field(240, ge=0)
+    call_window_start: Optional[str] = Field(None, pattern=WINDOW_TIME_PATTERN)
+    call_window_end: Optional[str] = Field(None, pattern=WINDOW_TIME_PATTERN)
 
 
 class CampaignCreate(CampaignBase):
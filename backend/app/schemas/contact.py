@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 from app.models.contact import ContactStatus, GenderType
 
 
@@ -28,6 +28,7 @@ class ContactResponse(ContactBase):
     id: int
     campaign_id: int
     status: ContactStatus
+    phone_normalized: Optional[str] = None
     last_dialed_at: Optional[datetime] = None
     dial_attempts: int = 0
     created_at: datetime
@@ -35,3 +36,10 @@ class ContactResponse(ContactBase):
 
     class Config:
         from_attributes = True
+
+
+class ContactPage(BaseModel):
+    items: List[ContactResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    estimated_total: Optional[int] = None
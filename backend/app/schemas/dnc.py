@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class DNCCreate(BaseModel):
+    phone_number: str
+    reason: Optional[str] = None
+
+
+class DNCCheckResponse(BaseModel):
+    phone_number: str
+    normalized: Optional[str] = None
+    on_dnc: bool
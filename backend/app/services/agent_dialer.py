@@ -0,0 +1,167 @@
+"""
+Agent Dialer Service
+Agent-first outbound dials: manual dials, dial-next and progressive auto-dials
+"""
+import logging
+import uuid
+from typing import Optional
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from app.core.phone import normalize_phone
+from app.models.agent import Agent, AgentStatus
+from app.models.call import Call, CallStatus, CallDirection
+from app.models.contact import Contact
+from app.services.dialer_service import DialerService
+from app.services.hopper_service import campaign_hopper
+from app.services.dnc_service import dnc_index
+from app.services.agent_stats import agent_stats
+from app.services.stats_cache import stats_cache
+from app.services.channel_tracker import channel_tracker
+
+logger = logging.getLogger(__name__)
+
+
+class DialRefused(Exception):
+    """A dial that cannot go ahead; status_code and detail are what the API reports"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AgentDialer:
+    """Originate calls that ring the agent's extension first"""
+
+    def __init__(self):
+        self.dialer_service = DialerService()
+
+    async def dial(
+        self,
+        db: Session,
+        agent_id: int,
+        phone_number: str,
+        campaign_id: Optional[int] = None,
+        contact_id: Optional[int] = None
+    ) -> Call:
+        """Create the call record, originate it and commit; raises DialRefused"""
+        # Fetch agent once
+        agent = db.query(Agent).filter(Agent.id == agent_id).first()
+        if not agent:
+            raise DialRefused(404, "Agent not found")
+
+        if dnc_index.contains(phone_number):
+            raise DialRefused(403, "Number is on the Do Not Call list")
+
+        # Update contact if contact_id is provided
+        contact = None
+        if contact_id:
+            # Lease the contact so no other agent can dial it at the same time
+            contact = campaign_hopper.lease_contact(db, contact_id, agent_id)
+            if contact is None and db.query(Contact.id).filter(Contact.id == contact_id).first():
+                raise DialRefused(409, "Contact is being dialed by another agent")
+            if contact:
+                # Update contact dialing info
+                contact.last_dialed_at = datetime.now(timezone.utc)
+                contact.dial_attempts = (contact.dial_attempts or 0) + 1
+                # Don't change status yet - will update based on call result
+
+        # Create call record
+        call_unique_id = str(uuid.uuid4())
+        call = Call(
+            agent_id=agent_id,
+            campaign_id=campaign_id,
+            contact_id=contact_id,
+            phone_number=phone_number,
+            phone_normalized=normalize_phone(phone_number),
+            direction=CallDirection.OUTBOUND,
+            status=CallStatus.DIALING,
+            call_unique_id=call_unique_id
+        )
+        db.add(call)
+        stats_cache.invalidate_on_commit(db, agent_id)
+        # Commit the lease and the call record before originating, so the contact row
+        # lock is not held (with the transaction) for as long as the originate takes
+        db.commit()
+
+        # Initiate call via dialer service
+        call_result = await self.dialer_service.initiate_call(
+            phone_number=phone_number,
+            agent_extension=agent.phone_extension,
+            campaign_id=campaign_id,
+            contact_id=contact_id
+        )
+
+        # Update call status
+        call.status = call_result.get("status", CallStatus.DIALING)
+        call.freeswitch_channel = call_result.get("asterisk_channel") or call_result.get("freeswitch_channel")
+
+        # Keep the contact leased for the life of the call, or hand it back if the originate failed
+        if contact:
+            if call_result.get("success"):
+                campaign_hopper.hold(contact)
+            else:
+                campaign_hopper.release(db, contact.id)
+
+        # Update agent status
+        agent.status = AgentStatus.IN_CALL.value
+
+        # A failed originate is already final
+        agent_stats.record_call(db, call)
+
+        # Commit the originate's outcome
+        db.commit()
+        db.refresh(call)
+
+        # Register call in channel tracker
+        channel_tracker.register_call(call.call_unique_id)
+        return call
+
+    async def dial_next(self, db: Session, agent_id: int, campaign_id: Optional[int] = None) -> Call:
+        """Lease the next hopper contact to the agent and dial it; raises DialRefused"""
+        agent = db.query(Agent).filter(Agent.id == agent_id).first()
+        if not agent:
+            raise DialRefused(404, "Agent not found")
+
+        # Use campaign_id from agent if not provided
+        if not campaign_id and hasattr(agent, 'campaign_id') and agent.campaign_id:
+            campaign_id = agent.campaign_id
+
+        # Lease next contact from the campaign hopper (skips contacts other agents hold)
+        contact = campaign_hopper.lease_next(db, agent_id, campaign_id)
+        if not contact:
+            raise DialRefused(404, "No more contacts available to dial")
+
+        try:
+            return await self.dial(db, agent_id, contact.phone, contact.campaign_id, contact.id)
+        except DialRefused:
+            # Dial failed before the call existed, hand the contact back to the hopper
+            db.rollback()
+            campaign_hopper.release(db, contact.id)
+            db.commit()
+            raise
+
+    def claim_available(self, db: Session, agent_id: int) -> bool:
+        """
+        Move an available agent to in_call and commit; False if they were not available
+        The conditional UPDATE lets exactly one of several concurrent auto-dial triggers
+        (on any worker) go ahead for the agent
+        """
+        claimed = db.query(Agent).filter(
+            Agent.id == agent_id,
+            Agent.status == AgentStatus.AVAILABLE.value
+        ).update({Agent.status: AgentStatus.IN_CALL.value}, synchronize_session=False)
+        db.commit()
+        return claimed == 1
+
+    def unclaim(self, db: Session, agent_id: int):
+        """Hand a claimed agent back when no call was placed, and commit"""
+        db.query(Agent).filter(
+            Agent.id == agent_id,
+            Agent.status == AgentStatus.IN_CALL.value
+        ).update({Agent.status: AgentStatus.AVAILABLE.value}, synchronize_session=False)
+        db.commit()
+
+
+# Global agent dialer instance
+agent_dialer = AgentDialer()
@@ -0,0 +1,250 @@
+"""
+Agent Stats Service
+Maintains per-agent daily counters in agent_performance as calls reach a final state
+"""
+import logging
+from datetime import date, datetime, timezone
+from typing import Dict, Optional
+from sqlalchemy import update, text, bindparam, func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models.agent import AgentSession
+from app.models.agent_performance import AgentPerformance
+from app.models.call import Call, CallStatus, CallDirection
+from app.services.stats_cache import stats_cache, agent_today_key
+
+logger = logging.getLogger(__name__)
+
+DAILY = "daily"
+
+# Final call states; a call is counted once, the first time it reaches one of these
+TERMINAL_STATUSES = [
+    CallStatus.ENDED.value,
+    CallStatus.FAILED.value,
+    CallStatus.BUSY.value,
+    CallStatus.NO_ANSWER.value,
+    CallStatus.TRANSFERRED.value,
+    CallStatus.PARKED.value,
+]
+
+# Outcomes reported as "abandoned" by the stats endpoints
+MISSED_STATUSES = [
+    CallStatus.NO_ANSWER.value,
+    CallStatus.BUSY.value,
+    CallStatus.FAILED.value,
+]
+
+COUNTER_COLUMNS = [
+    "total_calls", "inbound_calls", "outbound_calls", "answered_calls",
+    "missed_calls", "total_talk_time", "total_duration", "duration_calls",
+]
+
+
+def _value(field) -> str:
+    return field.value if hasattr(field, "value") else field
+
+
+def format_time(seconds: int) -> str:
+    """Format seconds to HH:MM:SS"""
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    secs = seconds % 60
+    return f"{int(hours):02d}:{int(minutes):02d}:{int(secs):02d}"
+
+
+class AgentStatsService:
+    """
+    Incremental per-agent, per-day call counters
+
+    record_call() claims the call with a conditional UPDATE on calls.stats_recorded,
+    so whichever path ends the call first (AMI Hangup, hangup route, disposition)
+    counts it and every later path is a no-op. Counters are added with a single
+    INSERT ... ON CONFLICT DO UPDATE, so concurrent calls for one agent never race.
+    """
+
+    def record_call(self, db: Session, call: Call):
+        """Add a finished call to its agent's daily counters (caller commits)"""
+        if not call.agent_id or _value(call.status) not in TERMINAL_STATUSES:
+            return
+        db.flush()
+        claimed = db.execute(
+            update(Call)
+            .where(Call.id == call.id, Call.stats_recorded.isnot(True))
+            .values(stats_recorded=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            return
+        stats_cache.invalidate_on_commit(db, call.agent_id)
+
+        started = call.start_time or datetime.now(timezone.utc)
+        duration = call.duration or 0
+        counters = {
+            "total_calls": 1,
+            "inbound_calls": 1 if _value(call.direction) == CallDirection.INBOUND.value else 0,
+            "outbound_calls": 1 if _value(call.direction) == CallDirection.OUTBOUND.value else 0,
+            "answered_calls": 1 if call.answered_time else 0,
+            "missed_calls": 1 if _value(call.status) in MISSED_STATUSES else 0,
+            "total_talk_time": call.talk_duration or 0,
+            "total_duration": duration if duration > 0 else 0,
+            "duration_calls": 1 if duration > 0 else 0,
+        }
+        self._add(db, call.agent_id, started.astimezone(timezone.utc).date(), counters)
+
+    def _add(self, db: Session, agent_id: int, day: date, counters: Dict[str, int]):
+        stmt = pg_insert(AgentPerformance).values(
+            agent_id=agent_id, date=day, period_type=DAILY, **counters
+        )
+        table = AgentPerformance.__table__
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["agent_id", "date", "period_type"],
+            set_={
+                **{name: table.c[name] + stmt.excluded[name] for name in COUNTER_COLUMNS},
+                "avg_call_duration": func.coalesce(
+                    (table.c.total_duration + stmt.excluded.total_duration)
+                    / func.nullif(table.c.duration_calls + stmt.excluded.duration_calls, 0),
+                    0
+                ),
+                "updated_at": datetime.now(timezone.utc),
+            }
+        )
+        db.execute(stmt)
+
+    def get_day(self, db: Session, agent_id: int, day: date) -> Optional[AgentPerformance]:
+        return db.query(AgentPerformance).filter(
+            AgentPerformance.agent_id == agent_id,
+            AgentPerformance.date == day,
+            AgentPerformance.period_type == DAILY
+        ).first()
+
+    def get_day_all(self, db: Session, day: date) -> Dict[int, AgentPerformance]:
+        rows = db.query(AgentPerformance).filter(
+            AgentPerformance.date == day,
+            AgentPerformance.period_type == DAILY
+        ).all()
+        return {row.agent_id: row for row in rows}
+
+    def today_summary(self, db: Session, agent_id: int) -> Dict:
+        """
+        Today's counters and open session for an agent (raw values, cacheable)
+        Calls count from when they start, as they always have: the counters hold the
+        calls that have ended, and calls still in progress are added from the calls table
+        """
+        today = datetime.now(timezone.utc).date()
+        counters = self.get_day(db, agent_id, today)
+        inbound_calls = (counters.inbound_calls or 0) if counters else 0
+        outbound_calls = (counters.outbound_calls or 0) if counters else 0
+
+        # Not yet recorded = not ended; served by the (agent_id, start_time, id) index
+        live = dict(db.query(Call.direction, func.count(Call.id)).filter(
+            Call.agent_id == agent_id,
+            Call.start_time >= datetime.combine(today, datetime.min.time()).replace(tzinfo=timezone.utc),
+            Call.stats_recorded.isnot(True)
+        ).group_by(Call.direction).all())
+        inbound_calls += sum(count for direction, count in live.items() if _value(direction) == CallDirection.INBOUND.value)
+        outbound_calls += sum(count for direction, count in live.items() if _value(direction) == CallDirection.OUTBOUND.value)
+        
+        session = db.query(AgentSession).filter(
+            AgentSession.agent_id == agent_id,
+            AgentSession.logout_time.is_(None)
+        ).order_by(AgentSession.login_time.desc()).first()
+        
+        return {
+            "inbound_calls": inbound_calls,
+            "outbound_calls": outbound_calls,
+            "abandoned_calls": (counters.missed_calls or 0) if counters else 0,
+            "total_calls": inbound_calls + outbound_calls,
+            "break_time": (session.break_time or 0) if session else 0,
+            "session_login_time": session.login_time if session else None,
+            "session_id": session.session_id if session else None
+        }
+
+    async def get_today_stats(self, agent_id: int) -> Dict:
+        """Today's stats as served by /api/stats/today and pushed over the WebSocket"""
+        stats = await stats_cache.get_or_compute(
+            agent_today_key(agent_id),
+            lambda db: self.today_summary(db, agent_id)
+        )
+        
+        # Login time keeps ticking, so it is worked out per call rather than cached
+        login_time = 0
+        session_login_time = stats["session_login_time"]
+        if session_login_time:
+            login_time = int((datetime.now(timezone.utc) - session_login_time).total_seconds())
+        
+        return {
+            "inbound_calls": stats["inbound_calls"],
+            "outbound_calls": stats["outbound_calls"],
+            "abandoned_calls": stats["abandoned_calls"],
+            "total_calls": stats["total_calls"],
+            "break_time": format_time(stats["break_time"]),
+            "login_time": format_time(login_time),
+            "session_login_time": session_login_time.isoformat() if session_login_time else None,
+            "session_id": stats["session_id"]
+        }
+
+    def rebuild(self, db: Session, start_day: date, end_day: date) -> int:
+        """
+        Recompute daily counters for [start_day, end_day] from the calls table and commit
+        Returns the number of agent-day rows written
+        """
+        params = {
+            "start": datetime.combine(start_day, datetime.min.time()).replace(tzinfo=timezone.utc),
+            "end": datetime.combine(end_day, datetime.max.time()).replace(tzinfo=timezone.utc),
+            "start_day": start_day,
+            "end_day": end_day,
+            "terminal": TERMINAL_STATUSES,
+            "missed": MISSED_STATUSES,
+        }
+        expanding = [bindparam("terminal", expanding=True), bindparam("missed", expanding=True)]
+        try:
+            db.execute(text(
+                "DELETE FROM agent_performance "
+                "WHERE period_type = 'daily' AND date BETWEEN :start_day AND :end_day"
+            ), params)
+            written = db.execute(text("""
+                INSERT INTO agent_performance (
+                    agent_id, date, period_type, total_calls, inbound_calls, outbound_calls,
+                    answered_calls, missed_calls, total_talk_time, total_duration, duration_calls,
+                    avg_call_duration
+                )
+                SELECT
+                    agent_id,
+                    (start_time AT TIME ZONE 'UTC')::date,
+                    'daily',
+                    COUNT(*),
+                    COUNT(*) FILTER (WHERE direction = 'inbound'),
+                    COUNT(*) FILTER (WHERE direction = 'outbound'),
+                    COUNT(*) FILTER (WHERE answered_time IS NOT NULL),
+                    COUNT(*) FILTER (WHERE status IN :missed),
+                    COALESCE(SUM(talk_duration), 0),
+                    COALESCE(SUM(duration) FILTER (WHERE duration > 0), 0),
+                    COUNT(*) FILTER (WHERE duration > 0),
+                    COALESCE(AVG(duration) FILTER (WHERE duration > 0), 0)::int
+                FROM calls
+                WHERE agent_id IS NOT NULL
+                  AND start_time BETWEEN :start AND :end
+                  AND status IN :terminal
+                GROUP BY agent_id, (start_time AT TIME ZONE 'UTC')::date
+            """).bindparams(*expanding), params).rowcount
+            db.execute(text(
+                "UPDATE calls SET stats_recorded = (status IN :terminal AND agent_id IS NOT NULL) "
+                "WHERE start_time BETWEEN :start AND :end"
+            ).bindparams(expanding[0]), params)
+            db.commit()
+            logger.info(f"Rebuilt agent stats for {start_day}..{end_day}: {written} rows")
+            return written
+        except Exception:
+            db.rollback()
+            raise
+
+
+def average_duration(row: Optional[AgentPerformance]) -> int:
+    """Average call duration in seconds from the running totals"""
+    if not row or not row.duration_calls:
+        return 0
+    return int(row.total_duration / row.duration_calls)
+
+
+# Global agent stats instance
+agent_stats = AgentStatsService()
@@ -9,12 +9,19 @@ import logging
 from typing import Dict, Optional, Callable, Any
 from app.core.config import settings
 from app.core.database import SessionLocal
+from app.core.phone import normalize_phone
 from app.models.call import Call, CallStatus, CallDirection
 from app.models.agent import Agent, AgentStatus
 import uuid
 from app.services.channel_tracker import channel_tracker
 from app.services.websocket_manager import websocket_manager
 from app.services.cdr_processor import cdr_processor
+from app.services.hopper_service import campaign_hopper
+from app.services.predictive_dialer import predictive_dialer
+from app.services.progressive_dialer import progressive_dialer
+from app.services.retry_scheduler import retry_scheduler
+from app.services.agent_stats import agent_stats
+from app.services.endpoint_registry import endpoint_registry, SEED_ACTION_ID
 from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
@@ -44,6 +51,10 @@ class AMIEventListener:
             'DialEnd': self._handle_dial_end,
             'Cdr': self._handle_cdr,
             'VarSet': self._handle_varset,  # For quality metrics if available
+            'ContactStatus': endpoint_registry.handle_contact_status,
+            'PeerStatus': endpoint_registry.handle_peer_status,
+            'ContactList': endpoint_registry.handle_contact_list,
+            'ContactListComplete': endpoint_registry.handle_contact_list_complete,
         }
     
     def _parse_ami_event(self, event_data: str) -> Dict[str, str]:
@@ -127,6 +138,11 @@ class AMIEventListener:
                 await loop.run_in_executor(None, lambda: self.connection.send(subscribe_action.encode('utf-8')))
                 # Don't wait for response, just send it
                 
+                # Seed endpoint registrations; ContactStatus events keep them current afterwards
+                endpoint_registry.begin_seed()
+                seed_action = self._build_ami_action('PJSIPShowContacts', {'ActionID': SEED_ACTION_ID})
+                await loop.run_in_executor(None, lambda: self.connection.send(seed_action.encode('utf-8')))
+                
                 return True
             else:
                 logger.error(f"AMI Authentication failed: {parsed.get('Message', 'Unknown error')}")
@@ -419,6 +435,7 @@ class AMIEventListener:
                     call = Call(
                         agent_id=agent.id,
                         phone_number=phone_number,
+                        phone_normalized=normalize_phone(phone_number),
                         direction=direction.value,
                         status=CallStatus.DIALING.value,
                         call_unique_id=call_unique_id,
@@ -444,14 +461,6 @@ class AMIEventListener:
                     db.commit()
                     db.refresh(call)
                     
-                    # Send WebSocket update
-                    await websocket_manager.send_call_update(agent.id, {
-                        "call_id": call.id,
-                        "status": call.status,
-                        "phone_number": call.phone_number,
-                        "direction": call.direction
-                    })
-                    
                     # Send incoming call notification for inbound calls
                     if direction == CallDirection.INBOUND:
                         await websocket_manager.send_personal_message({
@@ -568,17 +577,12 @@ class AMIEventListener:
                 
                 db.commit()
                 
-                # Send WebSocket update
                 if call.agent_id:
-                    await websocket_manager.send_call_update(call.agent_id, {
-                        "call_id": call.id,
-                        "status": call.status,
-                        "phone_number": call.phone_number,
-                        "direction": call.direction,
-                        "old_status": old_status
-                    })
-                    
                     logger.info(f"Call {call_unique_id} status changed: {old_status} -> {call.status}")
+                
+                # Answered predictive calls have no agent yet: hand them to the pacing engine
+                if new_status == CallStatus.CONNECTED and predictive_dialer.is_predictive_call(call_unique_id):
+                    await predictive_dialer.on_answer(call_unique_id)
         
         except Exception as e:
             logger.error(f"Error handling Newstate event: {e}")
@@ -650,7 +654,13 @@ class AMIEventListener:
                             contact.status = ContactStatus.NOT_ANSWERED
                         elif call.status == CallStatus.FAILED.value:
                             contact.status = ContactStatus.FAILED
+                        elif call.answered_time:
+                            # Normal clearing after the customer answered
+                            contact.status = ContactStatus.CONTACTED
                         # Note: contact.last_dialed_at and dial_attempts are updated in dial endpoint
+                        retry_scheduler.schedule(db, contact)
+                    # Call is final, return the contact's hopper lease
+                    campaign_hopper.release(db, call.contact_id)
                 
                 # Update agent status
                 if call.agent_id:
@@ -658,21 +668,16 @@ class AMIEventListener:
                     if agent:
                         agent.status = AgentStatus.AVAILABLE.value
                 
+                agent_stats.record_call(db, call)
                 db.commit()
                 
-                # Send WebSocket update
                 if call.agent_id:
-                    await websocket_manager.send_call_update(call.agent_id, {
-                        "call_id": call.id,
-                        "status": call.status,
-                        "phone_number": call.phone_number,
-                        "direction": call.direction,
-                        "duration": call.duration
-                    })
-                    await websocket_manager.send_agent_status_update(call.agent_id, "available")
+                    progressive_dialer.agent_available(call.agent_id)
                 
                 logger.info(f"Call {call_unique_id} ended: {cause_txt} (Cause: {cause})")
             
+            predictive_dialer.on_call_ended(call_unique_id, call.talk_duration)
+            
             # Clean up tracking
             channel_tracker.remove_call(call_unique_id)
         
@@ -711,14 +716,6 @@ class AMIEventListener:
                             ring_duration = (call.answered_time - call.ring_time).total_seconds()
                             call.ring_duration = int(ring_duration)
                     db.commit()
-                    
-                    if call.agent_id:
-                        await websocket_manager.send_call_update(call.agent_id, {
-                            "call_id": call.id,
-                            "status": call.status,
-                            "phone_number": call.phone_number,
-                            "direction": call.direction
-                        })
             except Exception as e:
                 logger.error(f"Error handling Bridge event: {e}")
                 db.rollback()
@@ -790,7 +787,9 @@ class AMIEventListener:
                 finally:
                     db.close()
         
-        if call_unique_id and extension:
+        # Predictive calls are redirected from the trunk channel to the agent after answer;
+        # they are still outbound and must not be reclassified as inbound
+        if call_unique_id and extension and not predictive_dialer.is_predictive_call(call_unique_id):
             db = SessionLocal()
             try:
                 call = db.query(Call).filter(Call.call_unique_id == call_unique_id).first()
@@ -824,14 +823,6 @@ class AMIEventListener:
                         
                         db.commit()
                         
-                        # Send WebSocket update with proper direction
-                        await websocket_manager.send_call_update(agent.id, {
-                            "call_id": call.id,
-                            "status": call.status,
-                            "phone_number": call.phone_number,
-                            "direction": CallDirection.INBOUND.value
-                        })
-                        
                         # Send incoming call notification
                         await websocket_manager.send_personal_message({
                             "type": "incoming_call",
@@ -886,14 +877,6 @@ class AMIEventListener:
                     if call:
                         call.status = CallStatus.ANSWERED.value
                         db.commit()
-                        
-                        if call.agent_id:
-                            await websocket_manager.send_call_update(call.agent_id, {
-                                "call_id": call.id,
-                                "status": call.status,
-                                "phone_number": call.phone_number,
-                                "direction": call.direction
-                            })
                 except Exception as e:
                     logger.error(f"Error handling DialEnd event: {e}")
                     db.rollback()
@@ -938,6 +921,19 @@ class AMIEventListener:
             except (ValueError, TypeError) as e:
                 logger.debug(f"Error parsing quality metric {variable}={value}: {e}")
     
+    async def send_action(self, action: str, params: Dict[str, str] = None) -> bool:
+        """Send an action on the listening connection without waiting for its response"""
+        if not self.connected or not self.connection:
+            return False
+        data = self._build_ami_action(action, params).encode('utf-8')
+        try:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self.connection.sendall, data)
+            return True
+        except Exception as e:
+            logger.error(f"Error sending AMI action {action}: {e}")
+            return False
+    
     async def disconnect(self):
         """Disconnect from AMI"""
         if self.connection:
@@ -0,0 +1,84 @@
+"""
+Asterisk Reload Service
+Debounced module reloads sent over AMI, so a burst of config changes reloads once
+"""
+import asyncio
+import logging
+import subprocess
+from typing import Dict, Optional, Set
+from app.core.config import settings
+from app.services.ami_event_listener import ami_event_listener
+
+logger = logging.getLogger(__name__)
+
+# Reload target -> (AMI ModuleReload module, CLI command used when AMI is not connected)
+RELOAD_TARGETS: Dict[str, tuple] = {
+    "pjsip": ("res_pjsip.so", "module reload res_pjsip.so"),
+    "dialplan": ("pbx_config.so", "dialplan reload"),
+    "core": (None, "core reload"),
+}
+
+
+class AsteriskReloader:
+    """
+    Coalesce reload requests
+
+    request() marks a target as dirty and (re)arms a timer; once no request has
+    arrived for ASTERISK_RELOAD_DEBOUNCE_SECONDS every dirty target is reloaded once
+    ("core" covers all of them). Reloads go out as an AMI ModuleReload action on the
+    event listener's connection, falling back to `asterisk -rx` when AMI is not
+    connected.
+    """
+
+    def __init__(self):
+        self.pending: Set[str] = set()
+        self.due = 0.0
+        self.task: Optional[asyncio.Task] = None
+        self.requested = 0
+        self.reloads = 0
+
+    def request(self, target: str = "pjsip"):
+        if target not in RELOAD_TARGETS:
+            raise ValueError(f"Unknown reload target {target!r}")
+        loop = asyncio.get_running_loop()
+        self.requested += 1
+        self.pending.add(target)
+        self.due = loop.time() + settings.ASTERISK_RELOAD_DEBOUNCE_SECONDS
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        # Requests that arrive while reloads are in flight find this task still running,
+        # so keep going until nothing is pending
+        while self.pending:
+            while loop.time() < self.due:
+                await asyncio.sleep(self.due - loop.time())
+            targets, self.pending = self.pending, set()
+            if "core" in targets:
+                targets = {"core"}
+            for target in targets:
+                try:
+                    await self._reload(target)
+                    self.reloads += 1
+                except Exception as e:
+                    logger.error(f"Error reloading Asterisk {target}: {e}")
+
+    async def _reload(self, target: str):
+        module, command = RELOAD_TARGETS[target]
+        if await ami_event_listener.send_action('ModuleReload', {'Module': module} if module else None):
+            logger.info(f"Requested Asterisk {target} reload over AMI")
+            return
+        await asyncio.to_thread(subprocess.run, ["asterisk", "-rx", command], timeout=5)
+        logger.info(f"Reloaded Asterisk {target} with the CLI")
+
+    def get_metrics(self) -> Dict:
+        return {
+            "requested": self.requested,
+            "reloads": self.reloads,
+            "pending": sorted(self.pending)
+        }
+
+
+# Global Asterisk reloader instance
+asterisk_reloader = AsteriskReloader()
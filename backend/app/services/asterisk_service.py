@@ -109,7 +109,8 @@ class AsteriskService:
         priority: int = 1,
         caller_id: str = None,
         timeout: int = 30000,
-        variables: Dict[str, str] = None
+        variables: Dict[str, str] = None,
+        channel_id: str = None
     ) -> Dict:
         """
         Originate a call using Asterisk AMI
@@ -122,6 +123,7 @@ class AsteriskService:
             caller_id: Caller ID to display
             timeout: Call timeout in milliseconds
             variables: Channel variables to set
+            channel_id: Uniqueid to assign to the originated channel (lets AMI events be matched to the call)
         """
         params = {
             'Channel': channel,
@@ -135,6 +137,9 @@ class AsteriskService:
         if caller_id:
             params['CallerID'] = caller_id
         
+        if channel_id:
+            params['ChannelId'] = channel_id
+        
         if variables:
             var_list = []
             for key, value in variables.items():
@@ -0,0 +1,323 @@
+"""
+Call Partitions Service
+Creates monthly partitions of calls ahead of time and archives old months to Parquet
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PATTERN = re.compile(r"^calls_y(\d{4})m(\d{2})$")
+
+# Rows that belong to a call and are archived with it
+CHILD_TABLES = ["call_recordings", "call_quality_metrics", "call_notes"]
+
+# Rows that outlive an archived call; only their call_id is cleared
+UNLINKED_TABLES = ["voicemail_messages"]
+
+# Columns served by the export, identical for live and archived months
+EXPORT_COLUMNS = [
+    "id", "agent_id", "campaign_id", "contact_id", "phone_number", "direction", "status",
+    "disposition", "start_time", "answered_time", "end_time", "duration", "talk_duration",
+]
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_datetime(month: date) -> datetime:
+    return datetime.combine(month, datetime.min.time(), timezone.utc)
+
+
+def partition_name(month: date) -> str:
+    return f"calls_y{month.year:04d}m{month.month:02d}"
+
+
+def _arrow_type(pa, data_type: str):
+    if data_type in ("integer", "smallint", "bigint"):
+        return pa.int64()
+    if data_type in ("numeric", "real", "double precision"):
+        return pa.float64()
+    if data_type == "boolean":
+        return pa.bool_()
+    if data_type == "timestamp with time zone":
+        return pa.timestamp("us", tz="UTC")
+    if data_type == "timestamp without time zone":
+        return pa.timestamp("us")
+    if data_type == "date":
+        return pa.date32()
+    if data_type == "ARRAY":
+        return pa.list_(pa.string())
+    return pa.string()
+
+
+def _arrow_value(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+class CallPartitionManager:
+    """
+    Monthly range partitions of calls on start_time
+
+    ensure_partitions() keeps CALLS_PARTITION_MONTHS_AHEAD months of empty partitions
+    ready (the API runs it on startup and daily), so inserts never land in the default
+    partition. archive_month() copies a month of calls plus their recordings, quality
+    metrics and notes to zstd-compressed Parquet files in batches, writes a manifest, deletes the
+    child rows in batches, clears voicemail_messages.call_id and finally detaches and
+    drops the partition. A manifest is
+    only written once every file is complete, so an interrupted run is safe to repeat.
+    Archived months stay readable through export_rows().
+    """
+
+    def __init__(self):
+        self.running = False
+        self.task: Optional[asyncio.Task] = None
+
+    def is_partitioned(self, db: Session) -> bool:
+        return bool(db.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('calls'))"
+        )).scalar())
+
+    def list_partitions(self, db: Session) -> List[Tuple[str, date]]:
+        """Monthly partitions currently attached to calls, oldest first"""
+        names = db.execute(text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass('calls')
+        """)).scalars().all()
+        partitions = []
+        for name in names:
+            match = PARTITION_PATTERN.match(name)
+            if match:
+                partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    def ensure_partitions(self, db: Session, months_ahead: Optional[int] = None) -> List[str]:
+        """Create any missing partitions from this month through months_ahead; returns the new ones"""
+        if not self.is_partitioned(db):
+            return []
+        months_ahead = settings.CALLS_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+        existing = {name for name, _ in self.list_partitions(db)}
+        created = []
+        current = month_start(datetime.now(timezone.utc).date())
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            name = partition_name(month)
+            if name in existing:
+                continue
+            try:
+                db.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF calls "
+                    f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+                ))
+                db.commit()
+                created.append(name)
+                logger.info(f"Created calls partition {name}")
+            except Exception as e:
+                # Usually rows for that month already sit in calls_default
+                db.rollback()
+                logger.error(f"Error creating calls partition {name}: {e}")
+        return created
+
+    def archive_dir(self, table: str) -> str:
+        return os.path.join(settings.CALLS_ARCHIVE_DIR, table)
+
+    def archive_path(self, table: str, month: date) -> str:
+        return os.path.join(self.archive_dir(table), f"{month:%Y-%m}.parquet")
+
+    def manifest_path(self, month: date) -> str:
+        return os.path.join(settings.CALLS_ARCHIVE_DIR, "manifests", f"{month:%Y-%m}.json")
+
+    def is_archived(self, month: date) -> bool:
+        return os.path.exists(self.manifest_path(month))
+
+    def archivable_months(self, db: Session, older_than_months: Optional[int] = None) -> List[date]:
+        months = settings.CALLS_ARCHIVE_AFTER_MONTHS if older_than_months is None else older_than_months
+        cutoff = add_months(month_start(datetime.now(timezone.utc).date()), -months)
+        return [month for _, month in self.list_partitions(db) if month < cutoff]
+
+    def archive_month(self, db: Session, month: date) -> Dict[str, int]:
+        """Move one month of calls (and their child rows) to Parquet, then drop the partition"""
+        partition = partition_name(month)
+        if not self.is_archived(month):
+            rows = {"calls": self._export(
+                db, "calls", f"SELECT * FROM {partition}", self.archive_path("calls", month)
+            )}
+            for table in self._existing_tables(db, CHILD_TABLES):
+                rows[table] = self._export(
+                    db, table,
+                    f"SELECT t.* FROM {table} t JOIN {partition} c ON c.id = t.call_id",
+                    self.archive_path(table, month),
+                    key="t.id"
+                )
+            os.makedirs(os.path.dirname(self.manifest_path(month)), exist_ok=True)
+            with open(self.manifest_path(month), "w") as manifest:
+                json.dump({
+                    "month": f"{month:%Y-%m}",
+                    "rows": rows,
+                    "archived_at": datetime.now(timezone.utc).isoformat()
+                }, manifest)
+            logger.info(f"Archived {partition}: {rows}")
+
+        with open(self.manifest_path(month)) as manifest:
+            rows = json.load(manifest)["rows"]
+
+        # Files are complete: delete child rows in batches, unlink the rows that stay,
+        # then drop the partition (the foreign keys to calls are gone, see the migration)
+        for table in self._existing_tables(db, CHILD_TABLES):
+            while True:
+                deleted = db.execute(text(f"""
+                    DELETE FROM {table} WHERE id IN (
+                        SELECT t.id FROM {table} t JOIN {partition} c ON c.id = t.call_id LIMIT :batch
+                    )
+                """), {"batch": settings.CALLS_ARCHIVE_BATCH_SIZE}).rowcount
+                db.commit()
+                if deleted < settings.CALLS_ARCHIVE_BATCH_SIZE:
+                    break
+        for table in self._existing_tables(db, UNLINKED_TABLES):
+            db.execute(text(f"UPDATE {table} t SET call_id = NULL FROM {partition} c WHERE c.id = t.call_id"))
+            db.commit()
+        db.execute(text(f"ALTER TABLE calls DETACH PARTITION {partition}"))
+        db.execute(text(f"DROP TABLE {partition}"))
+        db.commit()
+        logger.info(f"Detached and dropped {partition}")
+        return rows
+
+    def _existing_tables(self, db: Session, tables: List[str]) -> List[str]:
+        return [
+            table for table in tables
+            if db.execute(text("SELECT to_regclass(:table)"), {"table": table}).scalar()
+        ]
+
+    def _export(self, db: Session, table: str, select_sql: str, path: str, key: str = "id") -> int:
+        """Write the rows of select_sql to a Parquet file in batches of CALLS_ARCHIVE_BATCH_SIZE"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("pyarrow is required to archive calls (pip install pyarrow)")
+
+        columns = db.execute(text(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_name = :table ORDER BY ordinal_position"
+        ), {"table": table}).all()
+        schema = pa.schema([(name, _arrow_type(pa, data_type)) for name, data_type in columns])
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        written = 0
+        last_id = 0
+        with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+            while True:
+                batch = db.execute(
+                    text(f"{select_sql} WHERE {key} > :last_id ORDER BY {key} LIMIT :batch"),
+                    {"last_id": last_id, "batch": settings.CALLS_ARCHIVE_BATCH_SIZE}
+                ).mappings().all()
+                if not batch:
+                    break
+                writer.write_table(pa.Table.from_pylist(
+                    [{name: _arrow_value(row[name]) for name, _ in columns} for row in batch],
+                    schema=schema
+                ))
+                written += len(batch)
+                last_id = batch[-1]["id"]
+        os.replace(tmp_path, path)
+        return written
+
+    def export_rows(self, db: Session, start: datetime, end: datetime) -> Iterator[Dict]:
+        """
+        Calls started in [start, end) as EXPORT_COLUMNS dicts, in start_time order
+        Archived months are read from Parquet, everything else from the database
+        """
+        month = month_start(start.date())
+        while month_datetime(month) < end:
+            window_start = max(start, month_datetime(month))
+            window_end = min(end, month_datetime(add_months(month, 1)))
+            if self.is_archived(month):
+                yield from self._archived_rows(month, window_start, window_end)
+            else:
+                yield from self._live_rows(db, window_start, window_end)
+            month = add_months(month, 1)
+
+    def _archived_rows(self, month: date, start: datetime, end: datetime) -> Iterator[Dict]:
+        import pyarrow.parquet as pq
+        table = pq.read_table(
+            self.archive_path("calls", month),
+            columns=EXPORT_COLUMNS,
+            filters=[("start_time", ">=", start), ("start_time", "<", end)]
+        ).sort_by([("start_time", "ascending"), ("id", "ascending")])
+        for batch in table.to_batches(max_chunksize=settings.CALLS_ARCHIVE_BATCH_SIZE):
+            yield from batch.to_pylist()
+
+    def _live_rows(self, db: Session, start: datetime, end: datetime) -> Iterator[Dict]:
+        last = (start, 0)
+        while True:
+            batch = db.execute(text(f"""
+                SELECT {', '.join(EXPORT_COLUMNS)} FROM calls
+                WHERE start_time >= :start AND start_time < :end
+                  AND (start_time, id) > (:last_start, :last_id)
+                ORDER BY start_time, id
+                LIMIT :batch
+            """), {
+                "start": start, "end": end, "last_start": last[0], "last_id": last[1],
+                "batch": settings.CALLS_ARCHIVE_BATCH_SIZE
+            }).mappings().all()
+            if not batch:
+                break
+            for row in batch:
+                yield dict(row)
+            last = (batch[-1]["start_time"], batch[-1]["id"])
+
+    async def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.task = asyncio.create_task(self._maintenance_loop())
+
+    async def stop(self):
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    def _ensure_with_session(self):
+        db = SessionLocal()
+        try:
+            self.ensure_partitions(db)
+        finally:
+            db.close()
+
+    async def _maintenance_loop(self):
+        while self.running:
+            try:
+                await asyncio.to_thread(self._ensure_with_session)
+            except Exception as e:
+                logger.error(f"Error maintaining calls partitions: {e}")
+            try:
+                await asyncio.sleep(24 * 3600)
+            except asyncio.CancelledError:
+                break
+
+
+# Global call partition manager instance
+call_partitions = CallPartitionManager()
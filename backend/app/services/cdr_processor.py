@@ -6,6 +6,7 @@ import logging
 from typing import Dict, Optional
 from datetime import datetime, timezone
 from app.core.database import SessionLocal
+from app.core.phone import normalize_phone
 from app.models.call import Call, CallStatus
 from app.models.call_quality import CallQualityMetrics
 
@@ -37,15 +38,16 @@ class CDRProcessor:
                 
                 if not call:
                     # Try to find by phone number and recent start time
-                    src = cdr_data.get('src', '')
+                    src = normalize_phone(cdr_data.get('src', ''))
                     start_time_str = cdr_data.get('start', '')
+                    # An unusable src normalizes to None, which would match calls with no number
                     if src and start_time_str:
                         try:
                             # Parse Asterisk datetime format: YYYY-MM-DD HH:MM:SS
                             start_time = datetime.strptime(start_time_str, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
                             # Find call within 5 minutes of CDR start time
                             call = db.query(Call).filter(
-                                Call.phone_number == src,
+                                Call.phone_normalized == src,
                                 Call.start_time >= start_time,
                                 Call.start_time <= start_time.replace(second=start_time.second + 300)
                             ).order_by(Call.start_time.desc()).first()
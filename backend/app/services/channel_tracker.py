@@ -55,6 +55,12 @@ class ChannelTracker:
         else:
             logger.warning(f"Call {call_unique_id} not found in tracker")
     
+    def set_customer_uniqueid(self, call_unique_id: str, uniqueid: str):
+        """Map a customer channel's Asterisk uniqueid to a call before the channel name is known"""
+        if call_unique_id in self.call_channels:
+            self.call_channels[call_unique_id]['customer_uniqueid'] = uniqueid
+            self.uniqueid_to_call[uniqueid] = call_unique_id
+    
     def set_bridge(self, call_unique_id: str, bridge_unique_id: str):
         """Set bridge unique ID for a call"""
         if call_unique_id in self.call_channels:
@@ -102,6 +102,95 @@ class DialerService:
                 "success": False
             }
 
+    async def originate_predictive(
+        self,
+        call_unique_id: str,
+        phone_number: str,
+        campaign_id: Optional[int] = None,
+        contact_id: Optional[int] = None
+    ) -> Dict:
+        """
+        Originate a customer-first call for predictive dialing
+        The customer is dialed with no agent attached; once answered the channel waits in
+        the PREDICTIVE_HOLD_CONTEXT until connect_to_agent redirects it to a free agent
+        """
+        try:
+            if settings.USE_MOCK_DIALER:
+                await asyncio.sleep(1)  # Simulate dialing
+                return {
+                    "call_unique_id": call_unique_id,
+                    "status": CallStatus.DIALING,
+                    "success": True,
+                    "mock": True
+                }
+            
+            channel_tracker.register_call(call_unique_id)
+            # Give the customer channel a known Uniqueid so AMI events map back to this call
+            channel_tracker.set_customer_uniqueid(call_unique_id, call_unique_id)
+            
+            customer_channel = f"{settings.ASTERISK_TRUNK}/{phone_number}"
+            variables = {
+                'CALL_UNIQUE_ID': call_unique_id,
+                'CAMPAIGN_ID': str(campaign_id) if campaign_id else '',
+                'CONTACT_ID': str(contact_id) if contact_id else '',
+                'CUSTOMER_NUMBER': phone_number
+            }
+            
+            result = await self.asterisk_service.originate_call(
+                channel=customer_channel,
+                context=settings.PREDICTIVE_HOLD_CONTEXT,
+                exten='s',
+                priority=1,
+                caller_id=f"Dialer <{phone_number}>",
+                timeout=settings.DEFAULT_CALL_TIMEOUT * 1000,
+                variables=variables,
+                channel_id=call_unique_id
+            )
+            
+            if result.get("success"):
+                logger.info(f"Predictive call {call_unique_id} originated to {phone_number}")
+                return {
+                    "call_unique_id": call_unique_id,
+                    "status": CallStatus.DIALING,
+                    "asterisk_channel": customer_channel,
+                    "success": True
+                }
+            channel_tracker.remove_call(call_unique_id)
+            return {
+                "call_unique_id": call_unique_id,
+                "status": CallStatus.FAILED,
+                "error": result.get("message", "Call failed"),
+                "success": False
+            }
+        except Exception as e:
+            logger.error(f"Error originating predictive call: {e}", exc_info=True)
+            channel_tracker.remove_call(call_unique_id)
+            return {
+                "call_unique_id": call_unique_id,
+                "status": CallStatus.FAILED,
+                "error": str(e),
+                "success": False
+            }
+
+    async def connect_to_agent(self, call_unique_id: str, agent_extension: str) -> bool:
+        """Redirect an answered predictive call to an agent's extension"""
+        try:
+            if settings.USE_MOCK_DIALER:
+                return True
+            channels = channel_tracker.get_call_channels(call_unique_id)
+            customer_channel = channels.get('customer_channel') if channels else None
+            if not customer_channel:
+                logger.warning(f"Customer channel not found for predictive call {call_unique_id}")
+                return False
+            return await self.asterisk_service.transfer_call(
+                channel=customer_channel,
+                exten=agent_extension,
+                context=settings.ASTERISK_CONTEXT
+            )
+        except Exception as e:
+            logger.error(f"Error connecting call to agent: {e}", exc_info=True)
+            return False
+
     async def _mock_call(self, call_unique_id: str, phone_number: str, agent_extension: str) -> Dict:
         """Simulate a call for testing"""
         await asyncio.sleep(1)  # Simulate dialing
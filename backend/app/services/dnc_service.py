@@ -0,0 +1,230 @@
+"""
+DNC Service
+In-memory Do Not Call index screened before every originate and import
+"""
+import asyncio
+import logging
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from typing import Iterable, List, Optional, Set
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.phone import normalize_phone
+from app.models.dnc import DNCEntry
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT when bulk loading numbers
+BULK_INSERT_CHUNK = 5000
+
+# Merge pending additions/removals into the sorted array once they grow past this
+COMPACT_THRESHOLD = 50000
+
+# Refresh watermark: created_at is the inserting transaction's start time, so a row
+# committed after a refresh can carry an older stamp than the refresh itself, but never
+# older than the oldest transaction open at that moment
+WATERMARK_SQL = text("""
+    SELECT least(now(), (
+        SELECT min(xact_start) FROM pg_stat_activity
+        WHERE datname = current_database() AND xact_start IS NOT NULL
+    ))
+""")
+
+
+def dnc_key(phone) -> Optional[int]:
+    """Integer key for a phone number (normalized digits), None if it has no digits"""
+    digits = normalize_phone(phone)
+    if not digits or len(digits) > 18:
+        return None
+    return int(digits)
+
+
+class DNCIndex:
+    """
+    Compact set of DNC numbers
+
+    Numbers are held as a sorted array of 64-bit integers (8 bytes each, so tens of
+    millions fit comfortably) searched with bisect, plus small sets of recent additions
+    and removals that are merged into the array once they grow large. The index is loaded
+    from dnc_list at startup and refreshed incrementally by created_at, so bulk uploads
+    made by any worker become visible without a restart.
+    """
+
+    def __init__(self):
+        self.numbers = array('q')
+        self.added: Set[int] = set()
+        self.removed: Set[int] = set()
+        self.watermark: Optional[datetime] = None
+        self.loaded = False
+        self.refresh_task: Optional[asyncio.Task] = None
+        self.running = False
+
+    def __len__(self) -> int:
+        return len(self.numbers) + len(self.added) - len(self.removed)
+
+    def _in_base(self, key: int) -> bool:
+        i = bisect_left(self.numbers, key)
+        return i < len(self.numbers) and self.numbers[i] == key
+
+    def contains(self, phone) -> bool:
+        """True if the number is on the DNC list"""
+        key = dnc_key(phone)
+        if key is None:
+            return False
+        if key in self.added:
+            return True
+        return key not in self.removed and self._in_base(key)
+
+    def add_keys(self, keys: Iterable[int]):
+        for key in keys:
+            self.removed.discard(key)
+            if not self._in_base(key):
+                self.added.add(key)
+        self._maybe_compact()
+
+    def remove_key(self, key: int):
+        self.added.discard(key)
+        if self._in_base(key):
+            self.removed.add(key)
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if len(self.added) + len(self.removed) >= COMPACT_THRESHOLD:
+            self.compact()
+
+    def compact(self):
+        """Merge pending additions and removals into the sorted array"""
+        if not self.added and not self.removed:
+            return
+        merged = set(self.numbers)
+        merged.difference_update(self.removed)
+        merged.update(self.added)
+        self.numbers = array('q', sorted(merged))
+        self.added.clear()
+        self.removed.clear()
+
+    def load(self, db: Session):
+        """Full load of dnc_list (safe to run in a worker thread; the array is swapped in at the end)"""
+        keys = set()
+        watermark = db.execute(WATERMARK_SQL).scalar()
+        for (phone_number,) in db.query(DNCEntry.phone_number).yield_per(50000):
+            key = dnc_key(phone_number)
+            if key is not None:
+                keys.add(key)
+        self.numbers = array('q', sorted(keys))
+        self.added.clear()
+        self.removed.clear()
+        self.watermark = watermark
+        self.loaded = True
+        logger.info(f"Loaded {len(self.numbers)} DNC numbers")
+
+    def refresh(self, db: Session):
+        """
+        Pick up rows committed since the last load or refresh
+        Rows from transactions still open are re-read by the next refresh (adding is idempotent)
+        """
+        if self.watermark is None:
+            # The startup load failed
+            self.load(db)
+            return
+        watermark = db.execute(WATERMARK_SQL).scalar()
+        rows = db.query(DNCEntry.phone_number).filter(DNCEntry.created_at >= self.watermark).all()
+        self.add_keys(k for k in (dnc_key(phone) for (phone,) in rows) if k is not None)
+        self.watermark = watermark
+        if rows:
+            logger.debug(f"DNC refresh read {len(rows)} numbers")
+
+    def add_numbers(
+        self,
+        db: Session,
+        phones: Iterable,
+        source: str = "manual",
+        reason: Optional[str] = None,
+        added_by: Optional[int] = None
+    ) -> int:
+        """
+        Insert numbers into dnc_list (duplicates ignored) and the index, then commit
+        Returns how many valid numbers were submitted
+        """
+        normalized: List[str] = sorted({n for n in (normalize_phone(p) for p in phones) if n and len(n) <= 18})
+        for start in range(0, len(normalized), BULK_INSERT_CHUNK):
+            chunk = normalized[start:start + BULK_INSERT_CHUNK]
+            stmt = pg_insert(DNCEntry).values([
+                {"phone_number": n, "source": source, "reason": reason, "added_by": added_by}
+                for n in chunk
+            ]).on_conflict_do_nothing(index_elements=["phone_number"])
+            db.execute(stmt)
+        db.commit()
+        self.add_keys(int(n) for n in normalized)
+        return len(normalized)
+
+    def remove_number(self, db: Session, phone) -> bool:
+        """Delete a number from dnc_list and the index, then commit"""
+        digits = normalize_phone(phone)
+        if not digits:
+            return False
+        deleted = db.query(DNCEntry).filter(DNCEntry.phone_number == digits).delete(synchronize_session=False)
+        db.commit()
+        self.remove_key(int(digits))
+        return deleted > 0
+
+    async def start(self):
+        """Load the index and start the refresh loop"""
+        if self.running:
+            return
+        self.running = True
+        try:
+            await asyncio.to_thread(self._load_with_session)
+        except Exception as e:
+            logger.error(f"Error loading DNC list: {e}")
+        self.refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop the refresh loop"""
+        self.running = False
+        if self.refresh_task:
+            self.refresh_task.cancel()
+            try:
+                await self.refresh_task
+            except asyncio.CancelledError:
+                pass
+
+    def _load_with_session(self):
+        db = SessionLocal()
+        try:
+            self.load(db)
+        finally:
+            db.close()
+
+    def _refresh_with_session(self):
+        db = SessionLocal()
+        try:
+            self.refresh(db)
+        finally:
+            db.close()
+
+    async def _refresh_loop(self):
+        elapsed = 0
+        while self.running:
+            try:
+                await asyncio.sleep(settings.DNC_REFRESH_SECONDS)
+            except asyncio.CancelledError:
+                break
+            elapsed += settings.DNC_REFRESH_SECONDS
+            try:
+                # Deletions made by other workers are only seen by a full reload
+                if elapsed >= settings.DNC_FULL_RELOAD_SECONDS:
+                    elapsed = 0
+                    await asyncio.to_thread(self._load_with_session)
+                else:
+                    await asyncio.to_thread(self._refresh_with_session)
+            except Exception as e:
+                logger.error(f"Error refreshing DNC list: {e}")
+
+
+# Global DNC index instance
+dnc_index = DNCIndex()
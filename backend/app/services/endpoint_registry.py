@@ -0,0 +1,112 @@
+"""
+Endpoint Registry Service
+Live PJSIP registration state kept from AMI events
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Contact states that mean the phone is registered and answering (or not qualified)
+REGISTERED_CONTACT_STATUSES = {"Created", "Updated", "Reachable", "Unknown", "NonQualified"}
+REGISTERED_PEER_STATUSES = {"Registered", "Reachable", "Lagged"}
+
+# ActionID of the PJSIPShowContacts action that seeds the registry
+SEED_ACTION_ID = "endpoint-registry-seed"
+
+
+def _strip_sip(uri: str) -> str:
+    return uri.split(":", 1)[1] if uri.startswith(("sip:", "sips:")) else uri
+
+
+class EndpointRegistry:
+    """
+    Registration state of every PJSIP endpoint, served from memory
+
+    The AMI listener sends one PJSIPShowContacts action after each (re)connect; its
+    ContactList events are collected and replace the contact table when
+    ContactListComplete arrives. From then on ContactStatus events keep each
+    endpoint's contacts current, and PeerStatus events record the endpoint-level
+    state, used when an endpoint has no known contact. Nothing is persisted: after a
+    restart the registry is empty until the seed completes.
+    """
+
+    def __init__(self):
+        self.contacts: Dict[str, Dict[str, Dict]] = {}  # endpoint -> uri -> contact
+        self.peers: Dict[str, Dict] = {}  # endpoint -> last PeerStatus
+        self.seeding: Optional[Dict[str, Dict[str, Dict]]] = None
+        self.seeded_at: Optional[datetime] = None
+
+    def begin_seed(self):
+        self.seeding = {}
+
+    def _contact(self, uri: str, status: str, event: Dict[str, str]) -> Dict:
+        return {
+            "uri": uri,
+            "status": status,
+            "user_agent": event.get("UserAgent") or None,
+            "roundtrip_usec": event.get("RoundtripUsec") or None,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    async def handle_contact_list(self, event: Dict[str, str]):
+        """One contact of the seeding PJSIPShowContacts response"""
+        endpoint = event.get("Endpoint") or event.get("Aor")
+        uri = event.get("Uri")
+        if self.seeding is None or event.get("ActionID", SEED_ACTION_ID) != SEED_ACTION_ID or not endpoint or not uri:
+            return
+        self.seeding.setdefault(endpoint, {})[uri] = self._contact(uri, event.get("Status", "Unknown"), event)
+
+    async def handle_contact_list_complete(self, event: Dict[str, str]):
+        if self.seeding is None or event.get("ActionID", SEED_ACTION_ID) != SEED_ACTION_ID:
+            return
+        self.contacts = self.seeding
+        self.seeding = None
+        self.seeded_at = datetime.now(timezone.utc)
+        logger.info(f"Endpoint registry seeded with {sum(len(c) for c in self.contacts.values())} contacts")
+
+    async def handle_contact_status(self, event: Dict[str, str]):
+        endpoint = event.get("EndpointName") or event.get("AOR")
+        uri = event.get("URI")
+        status = event.get("ContactStatus", "")
+        if not endpoint or not uri:
+            return
+        for table in (self.contacts, self.seeding):
+            if table is None:
+                continue
+            if status == "Removed":
+                contacts = table.get(endpoint)
+                if contacts:
+                    contacts.pop(uri, None)
+                    if not contacts:
+                        del table[endpoint]
+            else:
+                table.setdefault(endpoint, {})[uri] = self._contact(uri, status, event)
+
+    async def handle_peer_status(self, event: Dict[str, str]):
+        peer = event.get("Peer", "")
+        if event.get("ChannelType", "PJSIP") != "PJSIP" or "/" not in peer:
+            return
+        self.peers[peer.split("/", 1)[1]] = {
+            "status": event.get("PeerStatus", ""),
+            "address": event.get("Address") or None
+        }
+
+    def status(self, endpoint: str) -> Dict:
+        """registered flag and preferred contact ("user@host:port") for an endpoint"""
+        contacts = [
+            contact for contact in self.contacts.get(endpoint, {}).values()
+            if contact["status"] in REGISTERED_CONTACT_STATUSES
+        ]
+        if contacts:
+            contact = next((c for c in contacts if c["status"] == "Reachable"), contacts[0])
+            return {"registered": True, "contact": _strip_sip(contact["uri"])}
+        peer = self.peers.get(endpoint)
+        if peer and not self.contacts.get(endpoint) and peer["status"] in REGISTERED_PEER_STATUSES:
+            return {"registered": True, "contact": peer["address"]}
+        return {"registered": False, "contact": None}
+
+
+# Global endpoint registry instance
+endpoint_registry = EndpointRegistry()
@@ -0,0 +1,126 @@
+"""
+Campaign Hopper Service
+Leases NEW contacts to agents so two agents never dial the same contact
+"""
+import logging
+from typing import Optional
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import or_
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.contact import Contact, ContactStatus
+from app.services.dnc_service import dnc_index
+
+logger = logging.getLogger(__name__)
+
+
+class CampaignHopper:
+    """
+    Hand out dialable contacts with SELECT ... FOR UPDATE SKIP LOCKED
+
+    A lease (leased_by_agent_id + lease_expires_at) is written on the contact row so it
+    survives across requests and workers. Leases expire on their own if an agent never
+    dials, and are released explicitly when a dial fails or the call reaches a final state.
+    """
+
+    def _now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    def _dialable(self, query, now: datetime):
+        """Restrict a contact query to NEW contacts that are not leased (or whose lease expired)"""
+        return query.filter(
+            Contact.status == ContactStatus.NEW.value,
+            or_(Contact.lease_expires_at.is_(None), Contact.lease_expires_at < now)
+        )
+
+    def lease_next(self, db: Session, agent_id: Optional[int], campaign_id: Optional[int] = None) -> Optional[Contact]:
+        """
+        Lease the oldest dialable contact in a campaign to an agent
+        agent_id is None for leases taken by the backend dialing engines
+        """
+        now = self._now()
+
+        # An agent that already holds an unexpired lease gets the same contact back,
+        # so pressing "next" twice does not burn through the hopper
+        if agent_id is not None:
+            existing = db.query(Contact).filter(
+                Contact.leased_by_agent_id == agent_id,
+                Contact.status == ContactStatus.NEW.value,
+                Contact.lease_expires_at >= now
+            )
+            if campaign_id:
+                existing = existing.filter(Contact.campaign_id == campaign_id)
+            contact = existing.first()
+            if contact:
+                return contact
+
+        query = self._dialable(db.query(Contact), now)
+        if campaign_id:
+            query = query.filter(Contact.campaign_id == campaign_id)
+
+        # Served by the partial index on (campaign_id, created_at) WHERE status = 'new';
+        # rows another agent is leasing right now are skipped instead of waited on
+        query = query.order_by(Contact.created_at.asc()).with_for_update(skip_locked=True)
+        contact = query.first()
+        # Contacts whose number has since been put on the DNC list are retired on the way out
+        while contact and dnc_index.contains(contact.phone):
+            contact.status = ContactStatus.DO_NOT_CALL
+            db.flush()
+            logger.info(f"Contact {contact.id} is on the DNC list, skipping")
+            contact = query.first()
+        if not contact:
+            db.commit()
+            return None
+
+        contact.leased_by_agent_id = agent_id
+        contact.lease_expires_at = now + timedelta(seconds=settings.HOPPER_LEASE_SECONDS)
+        db.commit()
+        db.refresh(contact)
+        logger.debug(f"Leased contact {contact.id} to agent {agent_id}")
+        return contact
+
+    def lease_contact(self, db: Session, contact_id: int, agent_id: int) -> Optional[Contact]:
+        """
+        Lease a specific contact to an agent (manual dial of a chosen contact)
+        Returns None if another agent currently holds the lease, or is taking it right
+        now (the row is locked; the session is rolled back rather than left waiting)
+        """
+        now = self._now()
+        try:
+            contact = db.query(Contact).filter(Contact.id == contact_id).with_for_update(nowait=True).first()
+        except OperationalError:
+            db.rollback()
+            return None
+        if not contact:
+            return None
+
+        if (
+            contact.lease_expires_at
+            and contact.lease_expires_at >= now
+            and contact.leased_by_agent_id != agent_id
+        ):
+            return None
+
+        contact.leased_by_agent_id = agent_id
+        contact.lease_expires_at = now + timedelta(seconds=settings.HOPPER_LEASE_SECONDS)
+        db.flush()
+        return contact
+
+    def hold(self, contact: Contact):
+        """Extend a lease to cover an originated call until it reaches a final state"""
+        contact.lease_expires_at = self._now() + timedelta(seconds=settings.HOPPER_CALL_LEASE_SECONDS)
+
+    def release(self, db: Session, contact_id: Optional[int]):
+        """Return a leased contact to the hopper (caller commits)"""
+        if not contact_id:
+            return
+        contact = db.query(Contact).filter(Contact.id == contact_id).first()
+        if contact and contact.lease_expires_at is not None:
+            contact.leased_by_agent_id = None
+            contact.lease_expires_at = None
+            logger.debug(f"Released lease on contact {contact_id}")
+
+
+# Global campaign hopper instance
+campaign_hopper = CampaignHopper()
@@ -0,0 +1,190 @@
+"""
+Live Updates Service
+Pushes call state, agent status and stats changes to agents' WebSockets as they are committed
+"""
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.models.agent import Agent, AgentSession
+from app.models.call import Call, CallStatus
+from app.schemas.call import CallResponse
+from app.services.agent_stats import agent_stats
+from app.services.websocket_manager import websocket_manager, Connection
+from app.services.wallboard import wallboard, agent_row, call_row, WALLBOARD_ROWS_EVENT
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_CALL_STATUSES = [
+    CallStatus.DIALING.value,
+    CallStatus.RINGING.value,
+    CallStatus.CONNECTED.value,
+    CallStatus.ANSWERED.value,
+]
+
+# Ticks every second; clients derive it from session_login_time instead of receiving it
+STATS_UPDATE_EXCLUDE = {"login_time"}
+
+
+def call_payload(call: Call) -> Dict:
+    return CallResponse.model_validate(call).model_dump(mode="json")
+
+
+class LiveUpdates:
+    """
+    Push state to connected agents instead of having the dialer page poll
+
+    A SQLAlchemy after_flush listener notes which calls, agents and agent sessions
+    a transaction touched; once it commits, the committed rows are re-read and sent:
+    the full call as "call_state", the agent's status as "agent_status" and today's
+    stats as "stats_update". Stats are sent whole rather than as a diff: updates for
+    one agent can come from any worker, and a diff against one worker's view of what
+    the client last saw would not add up. Nothing is recorded
+    while no agent is connected. Clients get a full "snapshot" when they connect.
+    The same rows feed the supervisor wallboard.
+    """
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.tasks: Set[asyncio.Task] = set()
+
+    def start(self):
+        """Remember the event loop so commits made in worker threads can still push"""
+        self.loop = asyncio.get_running_loop()
+
+    def _after_flush(self, db: Session, flush_context):
+        if not websocket_manager.may_be_connected():
+            return
+        call_ids = db.info.setdefault("live_call_ids", set())
+        status_agent_ids = db.info.setdefault("live_status_agent_ids", set())
+        stats_agent_ids = db.info.setdefault("live_stats_agent_ids", set())
+        agent_ids = db.info.setdefault("live_agent_ids", set())
+        for obj in list(db.new) + list(db.dirty):
+            state = inspect(obj)
+            if isinstance(obj, Call):
+                call_ids.add(state.dict.get("id"))
+            elif isinstance(obj, Agent):
+                agent_ids.add(state.dict.get("id"))
+                if state.attrs.status.history.has_changes():
+                    status_agent_ids.add(state.dict.get("id"))
+            elif isinstance(obj, AgentSession):
+                stats_agent_ids.add(state.dict.get("agent_id"))
+
+    def _after_commit(self, db: Session):
+        call_ids = db.info.pop("live_call_ids", set())
+        status_agent_ids = db.info.pop("live_status_agent_ids", set())
+        stats_agent_ids = db.info.pop("live_stats_agent_ids", set())
+        agent_ids = db.info.pop("live_agent_ids", set())
+        call_ids.discard(None)
+        if not (call_ids or status_agent_ids or stats_agent_ids or agent_ids):
+            return
+        self._schedule(self.push(call_ids, status_agent_ids - {None}, stats_agent_ids - {None}, agent_ids - {None}))
+
+    def _after_rollback(self, db: Session):
+        db.info.pop("live_call_ids", None)
+        db.info.pop("live_status_agent_ids", None)
+        db.info.pop("live_stats_agent_ids", None)
+        db.info.pop("live_agent_ids", None)
+
+    def _schedule(self, coro):
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            # Committed from a worker thread
+            if self.loop is None or self.loop.is_closed():
+                coro.close()
+                return
+            asyncio.run_coroutine_threadsafe(coro, self.loop)
+            return
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def push(
+        self,
+        call_ids: Set[int],
+        status_agent_ids: Set[int],
+        stats_agent_ids: Set[int],
+        agent_ids: Optional[Set[int]] = None
+    ):
+        """Send the committed state of the given calls and agents to whoever is connected"""
+        db = SessionLocal()
+        try:
+            calls = db.query(Call).filter(Call.id.in_(call_ids)).all() if call_ids else []
+            wallboard_calls, wallboard_agents = [], []
+            if websocket_manager.distributed or wallboard.is_active():
+                wallboard_calls = [call_row(call) for call in calls]
+                if agent_ids:
+                    wallboard_agents = [
+                        agent_row(agent) for agent in db.query(Agent).filter(Agent.id.in_(agent_ids)).all()
+                    ]
+            call_messages = [
+                (call.agent_id, call_payload(call))
+                for call in calls
+                if call.agent_id and websocket_manager.may_be_connected(call.agent_id)
+            ]
+            statuses = {}
+            connected_status_ids = [a for a in status_agent_ids if websocket_manager.may_be_connected(a)]
+            if connected_status_ids:
+                statuses = dict(db.query(Agent.id, Agent.status).filter(Agent.id.in_(connected_status_ids)).all())
+        except Exception as e:
+            logger.error(f"Error loading live update state: {e}")
+            return
+        finally:
+            db.close()
+
+        try:
+            if wallboard_calls or wallboard_agents:
+                # Every worker keeps its own wallboard state for its own subscribers
+                await websocket_manager.publish_event(
+                    WALLBOARD_ROWS_EVENT, {"calls": wallboard_calls, "agents": wallboard_agents}
+                )
+        except Exception as e:
+            logger.error(f"Error publishing wallboard delta: {e}")
+
+        try:
+            for agent_id, payload in call_messages:
+                await websocket_manager.send_personal_message({"type": "call_state", "data": payload}, agent_id)
+            for agent_id, agent_status in statuses.items():
+                await websocket_manager.send_agent_status_update(agent_id, agent_status)
+
+            # A call or session change can move today's counters
+            for agent_id in {agent_id for agent_id, _ in call_messages} | set(statuses) | stats_agent_ids:
+                if websocket_manager.may_be_connected(agent_id):
+                    await self._push_stats(agent_id)
+        except Exception as e:
+            logger.error(f"Error pushing live updates: {e}")
+
+    async def _push_stats(self, agent_id: int):
+        stats = await agent_stats.get_today_stats(agent_id)
+        await websocket_manager.send_stats_update(agent_id, {
+            key: value for key, value in stats.items() if key not in STATS_UPDATE_EXCLUDE
+        })
+
+    async def send_snapshot(self, agent_id: int, connection: Connection):
+        """Send everything the dialer page needs on connect: current call, status and stats"""
+        db = SessionLocal()
+        try:
+            agent = db.query(Agent).filter(Agent.id == agent_id).first()
+            call = db.query(Call).filter(
+                Call.agent_id == agent_id,
+                Call.status.in_(ACTIVE_CALL_STATUSES)
+            ).order_by(Call.start_time.desc()).first()
+            snapshot = {
+                "call": call_payload(call) if call else None,
+                "agent_status": agent.status if agent else None
+            }
+        finally:
+            db.close()
+
+        snapshot["stats"] = await agent_stats.get_today_stats(agent_id)
+        await websocket_manager.send_to_connection(connection, {"type": "snapshot", "data": snapshot})
+
+
+# Global live updates instance
+live_updates = LiveUpdates()
+
+event.listen(SessionLocal, "after_flush", live_updates._after_flush)
+event.listen(SessionLocal, "after_commit", live_updates._after_commit)
+event.listen(SessionLocal, "after_rollback", live_updates._after_rollback)
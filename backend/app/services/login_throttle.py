@@ -0,0 +1,85 @@
+"""
+Login Throttle Service
+Per-IP attempt limits and per-address username failure lockouts for the login endpoint
+"""
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tracked keys beyond which idle ones are swept
+MAX_TRACKED_KEYS = 10000
+
+
+class LoginThrottle:
+    """
+    Sliding-window admission control for logins
+
+    An IP may start LOGIN_MAX_ATTEMPTS_PER_IP logins per minute (generous, since a
+    whole call centre often shares one NAT address), and a username is locked for an
+    IP once that IP has LOGIN_MAX_FAILURES failed attempts at it within
+    LOGIN_FAILURE_WINDOW_SECONDS. Failures are keyed on (ip, username) so that
+    guessing from elsewhere cannot lock an agent out of their own desk. Both checks
+    run before any bcrypt work, so refused attempts cost almost nothing. A successful
+    login clears that pair's failures. Counts are per worker.
+    """
+
+    def __init__(self):
+        self.attempts: Dict[str, Deque[float]] = {}  # ip -> attempt times
+        self.failures: Dict[str, Deque[float]] = {}  # "ip username" -> failure times
+        self.throttled = 0
+
+    def _recent(self, table: Dict[str, Deque[float]], key: str, window: float, now: float) -> Deque[float]:
+        times = table.get(key)
+        if times is None:
+            if len(table) >= MAX_TRACKED_KEYS:
+                self._sweep(table, window, now)
+            times = table[key] = deque()
+        while times and times[0] <= now - window:
+            times.popleft()
+        return times
+
+    def _sweep(self, table: Dict[str, Deque[float]], window: float, now: float):
+        for key in [key for key, times in table.items() if not times or times[-1] <= now - window]:
+            del table[key]
+
+    def _failure_key(self, ip: Optional[str], username: str) -> str:
+        return f"{ip or '-'} {username.lower()}"
+
+    def admit(self, ip: Optional[str], username: str) -> Optional[float]:
+        """Record an attempt; returns seconds to wait if it must be refused, else None"""
+        now = time.monotonic()
+
+        failures = self._recent(self.failures, self._failure_key(ip, username), settings.LOGIN_FAILURE_WINDOW_SECONDS, now)
+        if len(failures) >= settings.LOGIN_MAX_FAILURES:
+            self.throttled += 1
+            return failures[0] + settings.LOGIN_FAILURE_WINDOW_SECONDS - now
+
+        if ip:
+            attempts = self._recent(self.attempts, ip, 60, now)
+            if len(attempts) >= settings.LOGIN_MAX_ATTEMPTS_PER_IP:
+                self.throttled += 1
+                return attempts[0] + 60 - now
+            attempts.append(now)
+        return None
+
+    def record_failure(self, ip: Optional[str], username: str):
+        now = time.monotonic()
+        self._recent(self.failures, self._failure_key(ip, username), settings.LOGIN_FAILURE_WINDOW_SECONDS, now).append(now)
+
+    def record_success(self, ip: Optional[str], username: str):
+        self.failures.pop(self._failure_key(ip, username), None)
+
+    def get_metrics(self) -> Dict:
+        return {
+            "throttled": self.throttled,
+            "tracked_ips": len(self.attempts),
+            "tracked_failures": len(self.failures)
+        }
+
+
+# Global login throttle instance
+login_throttle = LoginThrottle()
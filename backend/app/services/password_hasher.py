@@ -0,0 +1,100 @@
+"""
+Password Hasher Service
+Runs bcrypt in a bounded process pool so login bursts never block the event loop
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core.security import verify_password, get_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password checks are already queued"""
+
+
+def _warm_up() -> int:
+    # One real hash: loads bcrypt in the child, and keeps this worker busy long enough
+    # that the other warm-up tasks have to start workers of their own
+    get_password_hash("warm-up")
+    return os.getpid()
+
+
+class PasswordHasher:
+    """
+    bcrypt off the event loop
+
+    Hashing and verification run in a pool of PASSWORD_HASH_WORKERS processes, so
+    each costs the event loop nothing and they run in parallel across cores.
+    Verifications beyond PASSWORD_HASH_MAX_PENDING (running plus queued) are refused
+    with PasswordHasherBusy, so a login storm is shed quickly instead of growing a
+    queue that times out anyway; hashing for admin changes always queues.
+    """
+
+    def __init__(self):
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.verified = 0
+        self.hashed = 0
+        self.rejected = 0
+
+    def workers(self) -> int:
+        return settings.PASSWORD_HASH_WORKERS or min(4, os.cpu_count() or 1)
+
+    async def start(self):
+        if self.executor is None:
+            # spawn, not fork: by now the process has an event loop, the AMI listener and
+            # DB pool threads, and forking a threaded process can deadlock the child
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            # Start every worker now rather than on the first logins
+            pids = await asyncio.gather(*(
+                asyncio.get_running_loop().run_in_executor(self.executor, _warm_up)
+                for _ in range(self.workers())
+            ))
+            logger.info(f"Password hasher started {len(set(pids))} worker processes")
+
+    async def stop(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def _run(self, func, *args):
+        if self.executor is None:
+            await self.start()
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        if self.pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        self.verified += 1
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        self.hashed += 1
+        return await self._run(get_password_hash, password)
+
+    def get_metrics(self) -> Dict:
+        return {
+            "workers": self.workers(),
+            "pending": self.pending,
+            "verified": self.verified,
+            "hashed": self.hashed,
+            "rejected": self.rejected
+        }
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher()
@@ -0,0 +1,189 @@
+"""
+PJSIP Config Service
+Parsed, indexed view of pjsip.conf, cached until the file changes
+"""
+import logging
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PjsipSection:
+    """One [name] block; options keep their order and repeats (allow=ulaw, allow=alaw)"""
+
+    def __init__(self, name: str, templates: List[str], is_template: bool, start: int):
+        self.name = name
+        self.templates = templates
+        self.is_template = is_template
+        self.start = start  # index of the [name] line
+        self.end = start + 1  # index after the last line of the section
+        self.options: List[Tuple[str, str]] = []
+        self.values: Dict[str, str] = {}  # last value per key, templates included
+
+    @property
+    def type(self) -> Optional[str]:
+        return self.values.get("type")
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.values.get(key, default)
+
+
+class PjsipConfig:
+    """
+    pjsip.conf parsed in a single pass
+
+    Sections are indexed by (name, type), so an extension's endpoint, auth and aor
+    blocks (which share one name) are each a dict lookup, and an endpoint's auth=
+    and aors= links resolve the same way. Sections built from templates
+    ([1001](agent-defaults)) inherit the template's options, type included.
+    """
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self.sections: List[PjsipSection] = []
+        self.by_name: Dict[str, List[PjsipSection]] = {}
+        self.by_type: Dict[str, Dict[str, PjsipSection]] = {}
+        self._parse()
+
+    def _parse(self):
+        templates: Dict[str, PjsipSection] = {}
+        section: Optional[PjsipSection] = None
+        for index, raw in enumerate(self.lines):
+            line = raw.split(";", 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith("["):
+                if section:
+                    self._add(section, templates)
+                section = self._header(line, index)
+                continue
+            if section is None or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            section.options.append((key.strip(), value.strip()))
+            section.end = index + 1
+        if section:
+            self._add(section, templates)
+
+    def _header(self, line: str, index: int) -> PjsipSection:
+        name, _, rest = line[1:].partition("]")
+        options = rest.strip()
+        templates = []
+        if options.startswith("(") and options.endswith(")"):
+            templates = [option.strip() for option in options[1:-1].split(",") if option.strip()]
+        is_template = "!" in templates
+        return PjsipSection(name.strip(), [t for t in templates if t != "!"], is_template, index)
+
+    def _add(self, section: PjsipSection, templates: Dict[str, PjsipSection]):
+        for template in section.templates:
+            if template in templates:
+                section.values.update(templates[template].values)
+        section.values.update(section.options)
+        self.sections.append(section)
+        if section.is_template:
+            templates[section.name] = section
+            return
+        self.by_name.setdefault(section.name, []).append(section)
+        if section.type:
+            self.by_type.setdefault(section.type, {})[section.name] = section
+
+    def get(self, name: str, section_type: str) -> Optional[PjsipSection]:
+        return self.by_type.get(section_type, {}).get(name)
+
+    def has_section(self, name: str) -> bool:
+        return name in self.by_name
+
+    def endpoints(self) -> List[PjsipSection]:
+        return list(self.by_type.get("endpoint", {}).values())
+
+    def auth_for(self, endpoint: PjsipSection) -> Optional[PjsipSection]:
+        return self.get(endpoint.get("auth", endpoint.name), "auth")
+
+    def aors_for(self, endpoint: PjsipSection) -> List[PjsipSection]:
+        names = [name.strip() for name in endpoint.get("aors", endpoint.name).split(",") if name.strip()]
+        return [aor for aor in (self.get(name, "aor") for name in names) if aor]
+
+    def without_sections(self, *names: str) -> List[str]:
+        """File lines with every section called one of names removed, with the comments just above them"""
+        drop = set()
+        for section in (section for name in names for section in self.by_name.get(name, [])):
+            start = section.start
+            while start > 0 and (not self.lines[start - 1].strip() or self.lines[start - 1].lstrip().startswith(";")):
+                start -= 1
+            drop.update(range(start, section.end))
+        return [line for index, line in enumerate(self.lines) if index not in drop]
+
+
+class PjsipConfigCache:
+    """
+    Parsed configs keyed by path, reused while the file's inode, mtime and size are
+    unchanged (an atomic rename or an edit in place both invalidate it)
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[Tuple[int, int, int], PjsipConfig]] = {}
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.loads = 0
+
+    def load(self, path: str) -> PjsipConfig:
+        stat = os.stat(path)
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry and entry[0] == key:
+                return entry[1]
+        with open(path, "r") as f:
+            config = PjsipConfig(f.read().splitlines(keepends=True))
+        with self.lock:
+            self.entries[path] = (key, config)
+            self.loads += 1
+        logger.debug(f"Parsed {path}: {len(config.sections)} sections")
+        return config
+
+    def invalidate(self, path: str):
+        with self.lock:
+            self.entries.pop(path, None)
+
+    def update(self, path: str, change: Callable[[PjsipConfig], str]) -> PjsipConfig:
+        """
+        Rewrite path atomically with change(current config), one writer at a time
+        Returns the config as it was before, e.g. to restore it if a later step fails
+        """
+        with self.write_lock:
+            previous = self.load(path)
+            write_atomic(path, change(previous))
+            self.invalidate(path)
+            return previous
+
+
+def write_atomic(path: str, content: str):
+    """Replace path with content via a temp file and rename, keeping its permissions"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            stat = os.stat(path)
+            os.chmod(tmp_path, stat.st_mode & 0o7777)
+            try:
+                os.chown(tmp_path, stat.st_uid, stat.st_gid)
+            except PermissionError:
+                pass
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+# Global PJSIP config cache instance
+pjsip_config_cache = PjsipConfigCache()
@@ -0,0 +1,400 @@
+"""
+Predictive Dialer Service
+Paces customer-first dialing for DialMethod.PREDICTIVE campaigns and connects
+answered calls to the next free agent
+"""
+import asyncio
+import math
+import uuid
+import logging
+from collections import deque
+from typing import Dict, Optional, Set
+from datetime import datetime, timezone
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.core.phone import normalize_phone
+from app.models.agent import Agent, AgentSession, AgentStatus
+from app.models.call import Call, CallStatus, CallDirection
+from app.models.campaign import Campaign, CampaignStatus, DialMethod
+from app.models.contact import Contact, ContactStatus
+from app.services.dialer_service import DialerService
+from app.services.hopper_service import campaign_hopper
+from app.services.retry_scheduler import retry_scheduler
+from app.services.stats_cache import stats_cache
+
+logger = logging.getLogger(__name__)
+
+# Disposition recorded on answered calls that had no agent to take them
+ABANDONED_DISPOSITION = "DROP"
+
+# Held (pg_advisory_lock, on a dedicated connection) by the one worker that paces
+PACER_LOCK_KEY = 720280
+
+
+class CampaignPacing:
+    """Rolling pacing statistics for one predictive campaign"""
+
+    def __init__(self, campaign_id: int):
+        self.campaign_id = campaign_id
+        self.in_flight: Dict[str, Optional[int]] = {}  # call_unique_id -> contact_id (dialing, not yet answered)
+        self.connected: Dict[str, int] = {}  # call_unique_id -> agent_id
+        self.dial_outcomes = deque(maxlen=settings.PREDICTIVE_STATS_WINDOW)  # True = answered
+        self.answer_outcomes = deque(maxlen=settings.PREDICTIVE_STATS_WINDOW)  # True = abandoned
+        self.avg_handle_time: Optional[float] = None  # seconds, exponentially weighted
+        self.adjustment = 1.0  # Multiplier on 1/answer_rate, tuned toward the abandon target
+
+    @property
+    def answer_rate(self) -> Optional[float]:
+        if not self.dial_outcomes:
+            return None
+        return sum(self.dial_outcomes) / len(self.dial_outcomes)
+
+    @property
+    def abandon_rate(self) -> float:
+        if not self.answer_outcomes:
+            return 0.0
+        return sum(self.answer_outcomes) / len(self.answer_outcomes)
+
+    def record_dial_outcome(self, answered: bool):
+        self.dial_outcomes.append(answered)
+
+    def record_answer_outcome(self, abandoned: bool):
+        self.answer_outcomes.append(abandoned)
+        # Back off quickly when over target, creep up slowly when comfortably under it
+        target = settings.PREDICTIVE_TARGET_ABANDON_RATE
+        if self.abandon_rate > target:
+            self.adjustment = max(0.3, self.adjustment * 0.85)
+        elif self.abandon_rate < target / 2:
+            self.adjustment = min(1.0, self.adjustment * 1.05)
+
+    def record_handle_time(self, seconds: int):
+        if seconds <= 0:
+            return
+        if self.avg_handle_time is None:
+            self.avg_handle_time = float(seconds)
+        else:
+            self.avg_handle_time = 0.9 * self.avg_handle_time + 0.1 * seconds
+
+    def dial_ratio(self) -> float:
+        """Lines to dial per available agent"""
+        answer_rate = self.answer_rate
+        # Not enough history yet: dial one line per agent
+        if answer_rate is None or len(self.dial_outcomes) < 10:
+            return 1.0
+        ratio = (1.0 / max(answer_rate, 0.05)) * self.adjustment
+        return min(max(ratio, 1.0), settings.PREDICTIVE_MAX_DIAL_RATIO)
+
+    def snapshot(self) -> Dict:
+        return {
+            "campaign_id": self.campaign_id,
+            "calls_in_flight": len(self.in_flight),
+            "calls_connected": len(self.connected),
+            "answer_rate": round(self.answer_rate, 4) if self.answer_rate is not None else None,
+            "abandon_rate": round(self.abandon_rate, 4),
+            "avg_handle_time": int(self.avg_handle_time) if self.avg_handle_time else None,
+            "dial_ratio": round(self.dial_ratio(), 2)
+        }
+
+
+class PredictiveDialer:
+    """
+    Pace outbound dialing for predictive campaigns
+
+    Every API worker runs the pacing loop, but only the one holding PACER_LOCK_KEY
+    dials: pacing counts available agents and in-flight calls from this process's own
+    state, so several pacers would each dial for the same agents. If the pacer's
+    worker dies its connection closes, the lock is freed and another worker takes over
+    on its next tick. AMI events reach every worker; the others ignore calls they did
+    not launch.
+    """
+
+    def __init__(self):
+        self.dialer_service = DialerService()
+        self.campaigns: Dict[int, CampaignPacing] = {}
+        self.call_campaigns: Dict[str, int] = {}  # call_unique_id -> campaign_id
+        self.reserved_agents: Set[int] = set()  # Agents being connected right now
+        self.pacing_task: Optional[asyncio.Task] = None
+        self.running = False
+        self.lock_connection = None  # Connection holding PACER_LOCK_KEY while this worker paces
+
+    async def start(self):
+        """Start the pacing loop in the background"""
+        if self.running:
+            return
+        self.running = True
+        self.pacing_task = asyncio.create_task(self._pacing_loop())
+        logger.info("Predictive dialer started")
+
+    async def stop(self):
+        """Stop the pacing loop"""
+        self.running = False
+        if self.pacing_task:
+            self.pacing_task.cancel()
+            try:
+                await self.pacing_task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.to_thread(self._release_pacer_lock)
+        logger.info("Predictive dialer stopped")
+
+    def _hold_pacer_lock(self) -> bool:
+        """True if this worker is the pacer, taking the lock if it is free"""
+        if not settings.DATABASE_URL.startswith('postgresql'):
+            return True
+        if self.lock_connection is not None:
+            try:
+                self.lock_connection.execute(text("SELECT 1"))
+                self.lock_connection.commit()
+                return True
+            except Exception as e:
+                logger.warning(f"Lost the predictive pacer lock: {e}")
+                self.lock_connection.invalidate()
+                self.lock_connection.close()
+                self.lock_connection = None
+        connection = engine.connect()
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": PACER_LOCK_KEY}
+            ).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self.lock_connection = connection
+        logger.info("This worker is now the predictive pacer")
+        return True
+
+    def _release_pacer_lock(self):
+        if self.lock_connection is None:
+            return
+        try:
+            self.lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PACER_LOCK_KEY})
+            self.lock_connection.commit()
+            self.lock_connection.close()
+        except Exception:
+            # Dropping the connection releases the lock too
+            self.lock_connection.invalidate()
+            self.lock_connection.close()
+        self.lock_connection = None
+
+    def is_predictive_call(self, call_unique_id: Optional[str]) -> bool:
+        return bool(call_unique_id) and call_unique_id in self.call_campaigns
+
+    def get_stats(self) -> list:
+        return [pacing.snapshot() for pacing in self.campaigns.values()]
+
+    async def _pacing_loop(self):
+        while self.running:
+            try:
+                if await asyncio.to_thread(self._hold_pacer_lock):
+                    await self._tick()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in predictive pacing loop: {e}", exc_info=True)
+            await asyncio.sleep(settings.PREDICTIVE_TICK_SECONDS)
+
+    async def _tick(self):
+        db = SessionLocal()
+        try:
+            campaigns = db.query(Campaign).filter(
+                Campaign.dial_method == DialMethod.PREDICTIVE.value,
+                Campaign.status == CampaignStatus.ACTIVE.value
+            ).all()
+            for campaign in campaigns:
+                await self._pace_campaign(db, campaign.id)
+        finally:
+            db.close()
+
+    def _campaign_agents_query(self, db, campaign_id: int):
+        """Agents logged in to a campaign (open session)"""
+        return db.query(Agent).join(AgentSession, AgentSession.agent_id == Agent.id).filter(
+            AgentSession.campaign_id == campaign_id,
+            AgentSession.logout_time.is_(None)
+        ).distinct()
+
+    async def _pace_campaign(self, db, campaign_id: int):
+        pacing = self.campaigns.setdefault(campaign_id, CampaignPacing(campaign_id))
+
+        agents = self._campaign_agents_query(db, campaign_id).all()
+        available = [
+            a for a in agents
+            if a.status == AgentStatus.AVAILABLE.value and a.id not in self.reserved_agents
+        ]
+
+        # Agents whose current call has run past the average handle time are likely to free up
+        # before a call dialed now is answered, so they count toward capacity
+        soon_free = 0
+        if pacing.avg_handle_time:
+            now = datetime.now(timezone.utc)
+            in_call_ids = [a.id for a in agents if a.status == AgentStatus.IN_CALL.value]
+            if in_call_ids:
+                active_calls = db.query(Call.answered_time).filter(
+                    Call.agent_id.in_(in_call_ids),
+                    Call.status.in_([CallStatus.CONNECTED.value, CallStatus.ANSWERED.value]),
+                    Call.answered_time.isnot(None)
+                ).all()
+                soon_free = sum(
+                    1 for (answered_time,) in active_calls
+                    if (now - answered_time).total_seconds() >= pacing.avg_handle_time
+                )
+
+        capacity = len(available) + soon_free
+        if capacity == 0:
+            return
+
+        target_lines = math.floor(capacity * pacing.dial_ratio())
+        total_in_flight = sum(len(p.in_flight) for p in self.campaigns.values())
+        to_dial = min(
+            target_lines - len(pacing.in_flight),
+            settings.MAX_CONCURRENT_CALLS - total_in_flight
+        )
+
+        for _ in range(max(to_dial, 0)):
+            contact = campaign_hopper.lease_next(db, None, campaign_id)
+            if not contact:
+                break
+            await self._launch(db, pacing, contact)
+
+    async def _launch(self, db, pacing: CampaignPacing, contact: Contact):
+        """Create the call record and originate a customer-first call"""
+        call_unique_id = str(uuid.uuid4())
+        contact.last_dialed_at = datetime.now(timezone.utc)
+        contact.dial_attempts = (contact.dial_attempts or 0) + 1
+        campaign_hopper.hold(contact)
+        call = Call(
+            campaign_id=pacing.campaign_id,
+            contact_id=contact.id,
+            phone_number=contact.phone,
+            phone_normalized=contact.phone_normalized or normalize_phone(contact.phone),
+            direction=CallDirection.OUTBOUND.value,
+            status=CallStatus.DIALING.value,
+            call_unique_id=call_unique_id
+        )
+        db.add(call)
+        db.commit()
+
+        pacing.in_flight[call_unique_id] = contact.id
+        self.call_campaigns[call_unique_id] = pacing.campaign_id
+
+        result = await self.dialer_service.originate_predictive(
+            call_unique_id=call_unique_id,
+            phone_number=contact.phone,
+            campaign_id=pacing.campaign_id,
+            contact_id=contact.id
+        )
+
+        if not result.get("success"):
+            call.status = CallStatus.FAILED.value
+            call.end_time = datetime.now(timezone.utc)
+            campaign_hopper.release(db, contact.id)
+            db.commit()
+            self.on_call_ended(call_unique_id)
+            logger.warning(f"Predictive originate failed for contact {contact.id}: {result.get('error')}")
+            return
+
+        if result.get("mock"):
+            # No AMI events in mock mode: treat the call as answered right away
+            asyncio.create_task(self.on_answer(call_unique_id))
+
+    def _next_free_agent(self, db, campaign_id: int) -> Optional[Agent]:
+        """Available agent in the campaign who has been idle the longest"""
+        agents = self._campaign_agents_query(db, campaign_id).filter(
+            Agent.status == AgentStatus.AVAILABLE.value
+        ).order_by(Agent.updated_at.asc().nullsfirst()).all()
+        for agent in agents:
+            if agent.id not in self.reserved_agents:
+                return agent
+        return None
+
+    async def on_answer(self, call_unique_id: str):
+        """Customer answered: hand the call to the next free agent or abandon it"""
+        campaign_id = self.call_campaigns.get(call_unique_id)
+        pacing = self.campaigns.get(campaign_id) if campaign_id else None
+        if not pacing or call_unique_id not in pacing.in_flight:
+            return
+        pacing.in_flight.pop(call_unique_id, None)
+        pacing.record_dial_outcome(True)
+
+        db = SessionLocal()
+        agent_id = None
+        try:
+            call = db.query(Call).filter(Call.call_unique_id == call_unique_id).first()
+            if not call:
+                return
+            now = datetime.now(timezone.utc)
+            if not call.answered_time:
+                call.answered_time = now
+                if call.ring_time:
+                    call.ring_duration = int((call.answered_time - call.ring_time).total_seconds())
+
+            agent = self._next_free_agent(db, pacing.campaign_id)
+            if agent:
+                agent_id = agent.id
+                self.reserved_agents.add(agent_id)
+                call.agent_id = agent.id
+                call.status = CallStatus.CONNECTED.value
+                agent.status = AgentStatus.IN_CALL.value
+                # The call now counts toward the agent's stats for today
+                stats_cache.invalidate_on_commit(db, agent.id)
+                db.commit()
+
+                if await self.dialer_service.connect_to_agent(call_unique_id, agent.phone_extension):
+                    pacing.connected[call_unique_id] = agent.id
+                    pacing.record_answer_outcome(False)
+                    logger.info(f"Predictive call {call_unique_id} connected to agent {agent.phone_extension}")
+                    return
+
+                # Redirect failed: give the agent back and drop the call
+                call.agent_id = None
+                agent.status = AgentStatus.AVAILABLE.value
+
+            await self._abandon(db, pacing, call)
+        except Exception as e:
+            logger.error(f"Error connecting predictive call {call_unique_id}: {e}", exc_info=True)
+            db.rollback()
+        finally:
+            if agent_id is not None:
+                self.reserved_agents.discard(agent_id)
+            db.close()
+
+    async def _abandon(self, db, pacing: CampaignPacing, call: Call):
+        """No agent could take an answered call"""
+        pacing.record_answer_outcome(True)
+        call.status = CallStatus.ENDED.value
+        call.disposition = ABANDONED_DISPOSITION
+        call.end_time = datetime.now(timezone.utc)
+        if call.start_time:
+            call.duration = int((call.end_time - call.start_time).total_seconds())
+        if call.contact_id:
+            contact = db.query(Contact).filter(Contact.id == call.contact_id).first()
+            if contact:
+                contact.status = ContactStatus.NOT_ANSWERED
+                retry_scheduler.schedule(db, contact)
+            campaign_hopper.release(db, call.contact_id)
+        db.commit()
+        await self.dialer_service.hangup_call(call.call_unique_id)
+        self.on_call_ended(call.call_unique_id)
+        logger.warning(f"Predictive call {call.call_unique_id} abandoned: no free agent")
+
+    def on_call_ended(self, call_unique_id: Optional[str], talk_duration: int = 0):
+        """Update pacing when a predictive call reaches a final state (safe to call repeatedly)"""
+        campaign_id = self.call_campaigns.pop(call_unique_id, None) if call_unique_id else None
+        pacing = self.campaigns.get(campaign_id) if campaign_id else None
+        if not pacing:
+            return
+        if call_unique_id in pacing.in_flight:
+            # Ended before it was ever answered
+            pacing.in_flight.pop(call_unique_id, None)
+            pacing.record_dial_outcome(False)
+        if call_unique_id in pacing.connected:
+            pacing.connected.pop(call_unique_id, None)
+            pacing.record_handle_time(talk_duration or 0)
+
+
+# Global predictive dialer instance
+predictive_dialer = PredictiveDialer()
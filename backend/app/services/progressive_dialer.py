@@ -0,0 +1,124 @@
+"""
+Progressive Dialer Service
+Dials the next hopper contact for an agent as soon as they become available
+in a DialMethod.PROGRESSIVE campaign
+"""
+import asyncio
+import logging
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.agent import AgentSession
+from app.models.call import Call, CallStatus
+from app.models.campaign import Campaign, CampaignStatus, DialMethod
+from app.services.agent_dialer import agent_dialer, DialRefused
+
+logger = logging.getLogger(__name__)
+
+# Call states that mean the agent is already on a call
+ACTIVE_CALL_STATUSES = [
+    CallStatus.DIALING.value,
+    CallStatus.RINGING.value,
+    CallStatus.CONNECTED.value,
+    CallStatus.ANSWERED.value
+]
+
+
+class ProgressiveDialer:
+    """
+    Schedule one auto-dial per available agent
+
+    Triggers come from the places an agent returns to available (Hangup event,
+    hangup and disposition routes, /api/agents/status). Each trigger replaces any
+    pending dial for that agent, so repeated triggers collapse into one call.
+    """
+
+    def __init__(self):
+        self.pending: Dict[int, asyncio.Task] = {}  # agent_id -> scheduled dial
+
+    def agent_available(self, agent_id: int, delay: Optional[float] = None):
+        """Schedule a dial for an agent after the wrap-up delay"""
+        if delay is None:
+            delay = settings.PROGRESSIVE_WRAPUP_SECONDS
+        self.cancel(agent_id)
+        try:
+            self.pending[agent_id] = asyncio.create_task(self._dial_after(agent_id, delay))
+        except RuntimeError:
+            # No running event loop (called from a sync context)
+            logger.debug(f"Cannot schedule progressive dial for agent {agent_id}: no event loop")
+
+    def cancel(self, agent_id: int):
+        """Drop a pending dial (agent paused, logged out or dialed manually)"""
+        task = self.pending.pop(agent_id, None)
+        if task and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+
+    async def stop(self):
+        """Cancel all pending dials"""
+        for agent_id in list(self.pending.keys()):
+            self.cancel(agent_id)
+
+    def _progressive_campaign_id(self, db, agent_id: int) -> Optional[int]:
+        """Campaign of the agent's open session, if it is an active progressive campaign"""
+        session = db.query(AgentSession).filter(
+            AgentSession.agent_id == agent_id,
+            AgentSession.logout_time.is_(None)
+        ).order_by(AgentSession.login_time.desc()).first()
+        if not session or not session.campaign_id:
+            return None
+        campaign = db.query(Campaign).filter(
+            Campaign.id == session.campaign_id,
+            Campaign.dial_method == DialMethod.PROGRESSIVE.value,
+            Campaign.status == CampaignStatus.ACTIVE.value
+        ).first()
+        return campaign.id if campaign else None
+
+    async def _dial_after(self, agent_id: int, delay: float):
+        try:
+            await asyncio.sleep(delay)
+            await self._dial_next(agent_id)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error in progressive dial for agent {agent_id}: {e}", exc_info=True)
+        finally:
+            if self.pending.get(agent_id) is asyncio.current_task():
+                self.pending.pop(agent_id, None)
+
+    async def _dial_next(self, agent_id: int):
+        db = SessionLocal()
+        try:
+            campaign_id = self._progressive_campaign_id(db, agent_id)
+            if not campaign_id:
+                return
+
+            # Re-check at fire time: the agent may have paused or dialed manually during wrap-up
+            active_call = db.query(Call.id).filter(
+                Call.agent_id == agent_id,
+                Call.status.in_(ACTIVE_CALL_STATUSES)
+            ).first()
+            if active_call:
+                return
+
+            # Every worker sees the Hangup event and routes trigger too, so several of these
+            # can fire for one agent; only the one that moves them off available dials
+            if not agent_dialer.claim_available(db, agent_id):
+                return
+
+            try:
+                call = await agent_dialer.dial_next(db, agent_id, campaign_id)
+                logger.info(f"Progressive dial for agent {agent_id}: call {call.id} to {call.phone_number}")
+            except DialRefused as e:
+                # 404 when the hopper is empty; the next trigger tries again
+                agent_dialer.unclaim(db, agent_id)
+                logger.info(f"Progressive dial skipped for agent {agent_id}: {e.detail}")
+            except Exception:
+                db.rollback()
+                agent_dialer.unclaim(db, agent_id)
+                raise
+        finally:
+            db.close()
+
+
+# Global progressive dialer instance
+progressive_dialer = ProgressiveDialer()
@@ -0,0 +1,333 @@
+"""
+Report Rollup Service
+Maintains hourly call rollups and serves bucketed time series from them
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text, bindparam, func, literal_column
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.call_rollup import CallRollupHourly
+from app.services.agent_stats import TERMINAL_STATUSES, MISSED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+INTERVALS = ("hour", "day")
+
+# group_by value -> rollup column
+GROUP_COLUMNS = {
+    "agent": CallRollupHourly.agent_id,
+    "campaign": CallRollupHourly.campaign_id,
+    "disposition": CallRollupHourly.disposition,
+}
+
+METRIC_COLUMNS = [
+    "total_calls", "inbound_calls", "outbound_calls", "answered_calls",
+    "missed_calls", "total_talk_time", "total_duration",
+]
+
+# Serializes rollup writers across workers (pg_advisory_xact_lock key)
+ROLLUP_LOCK_KEY = 720360
+
+SeriesKey = Tuple[str, str, Optional[int], Optional[int]]  # interval, group_by, agent_id, campaign_id
+
+
+def hour_floor(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time()).replace(tzinfo=timezone.utc)
+
+
+class ReportRollup:
+    """
+    Hourly rollups of the calls table plus a time-series query over them
+
+    A background job re-aggregates the trailing REPORT_ROLLUP_LOOKBACK_HOURS of calls
+    into call_rollups_hourly every REPORT_ROLLUP_INTERVAL_SECONDS, so it only ever scans
+    recent calls. Older hours ("closed") are only redone when a trigger on calls marks
+    them in call_rollup_dirty_hours, which lets timeseries() cache closed days and
+    query only the open tail; each worker drops its cached copy of a day once the job
+    stamps one of its hours as re-aggregated. Reports never read the calls table.
+    """
+
+    def __init__(self):
+        self.running = False
+        self.task: Optional[asyncio.Task] = None
+        self.closed_days: "OrderedDict[Tuple[SeriesKey, date], List[Dict]]" = OrderedDict()
+        self.dirty_hours: Dict[datetime, Optional[datetime]] = {}  # hour -> rolled_up_at last seen
+        self.evictions = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _lock(self, db: Session, wait: bool) -> bool:
+        """Take the rollup lock for this transaction; without wait, False if another worker holds it"""
+        if wait:
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_KEY})
+            return True
+        return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_KEY}).scalar())
+
+    def rollup(self, db: Session, start: datetime, end: datetime, wait: bool = True) -> Optional[int]:
+        """
+        Recompute the hourly rollups for [start, end) from the calls table and commit
+        Returns the number of rollup rows written, or None if wait is False and
+        another worker is rolling up
+        """
+        try:
+            if not self._lock(db, wait):
+                db.rollback()
+                return None
+            written = self._aggregate(db, start, end)
+            db.commit()
+            return written
+        except Exception:
+            db.rollback()
+            raise
+
+    def rollup_dirty(self, db: Session, wait: bool = True) -> Optional[int]:
+        """
+        Recompute the closed hours marked in call_rollup_dirty_hours and commit
+        Returns the number of hours claimed (None as for rollup())
+        """
+        try:
+            if not self._lock(db, wait):
+                db.rollback()
+                return None
+            # A call changed after this claim re-marks its hour once this commits
+            hours = sorted(row[0] for row in db.execute(text("""
+                UPDATE call_rollup_dirty_hours SET rolled_up_at = clock_timestamp()
+                WHERE rolled_up_at IS NULL
+                RETURNING bucket_start
+            """)))
+            closed_until = self.closed_before()
+            for hour in hours:
+                # Open hours are redone by the regular run
+                if hour < closed_until:
+                    self._aggregate(db, hour, hour + timedelta(hours=1))
+            db.execute(text(
+                "DELETE FROM call_rollup_dirty_hours WHERE rolled_up_at < now() - interval '1 day'"
+            ))
+            db.commit()
+            return len(hours)
+        except Exception:
+            db.rollback()
+            raise
+
+    def _aggregate(self, db: Session, start: datetime, end: datetime) -> int:
+        params = {
+            "start": hour_floor(start),
+            "end": end,
+            "terminal": TERMINAL_STATUSES,
+            "missed": MISSED_STATUSES,
+        }
+        expanding = [bindparam("terminal", expanding=True), bindparam("missed", expanding=True)]
+        db.execute(text(
+            "DELETE FROM call_rollups_hourly WHERE bucket_start >= :start AND bucket_start < :end"
+        ), params)
+        return db.execute(text("""
+            INSERT INTO call_rollups_hourly (
+                bucket_start, agent_id, campaign_id, disposition, total_calls, inbound_calls,
+                outbound_calls, answered_calls, missed_calls, total_talk_time, total_duration
+            )
+            SELECT
+                date_trunc('hour', start_time AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+                agent_id,
+                campaign_id,
+                disposition,
+                COUNT(*),
+                COUNT(*) FILTER (WHERE direction = 'inbound'),
+                COUNT(*) FILTER (WHERE direction = 'outbound'),
+                COUNT(*) FILTER (WHERE answered_time IS NOT NULL),
+                COUNT(*) FILTER (WHERE status IN :missed),
+                COALESCE(SUM(talk_duration), 0),
+                COALESCE(SUM(duration) FILTER (WHERE duration > 0), 0)
+            FROM calls
+            WHERE start_time >= :start AND start_time < :end
+              AND status IN :terminal
+            GROUP BY 1, agent_id, campaign_id, disposition
+        """).bindparams(*expanding), params).rowcount
+
+    def closed_before(self) -> datetime:
+        """Hours before this are no longer re-aggregated by the background job"""
+        return hour_floor(datetime.now(timezone.utc)) - timedelta(hours=settings.REPORT_ROLLUP_LOOKBACK_HOURS)
+
+    async def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.task = asyncio.create_task(self._rollup_loop())
+
+    async def stop(self):
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    def _rollup_recent(self) -> Optional[int]:
+        # Every worker runs this loop; whichever finds the lock taken skips the round
+        # instead of queueing up to redo the same window straight afterwards
+        db = SessionLocal()
+        try:
+            try:
+                self.rollup_dirty(db, wait=False)
+            except Exception as e:
+                logger.error(f"Error re-aggregating marked report hours: {e}")
+            return self.rollup(db, self.closed_before(), datetime.now(timezone.utc) + timedelta(hours=1), wait=False)
+        finally:
+            db.close()
+
+    def _load_dirty_hours(self) -> Dict[datetime, Optional[datetime]]:
+        db = SessionLocal()
+        try:
+            return dict(db.execute(text("SELECT bucket_start, rolled_up_at FROM call_rollup_dirty_hours")).all())
+        finally:
+            db.close()
+
+    def evict_rerolled(self, dirty_hours: Dict[datetime, Optional[datetime]]):
+        """Drop cached days with an hour marked or re-aggregated since the last check"""
+        days = {
+            hour.astimezone(timezone.utc).date()
+            for hour, rolled_up_at in dirty_hours.items()
+            if hour not in self.dirty_hours or self.dirty_hours[hour] != rolled_up_at
+        }
+        self.dirty_hours = dirty_hours
+        if not days:
+            return
+        for key in [key for key in self.closed_days if key[1] in days]:
+            del self.closed_days[key]
+            self.evictions += 1
+
+    async def _rollup_loop(self):
+        while self.running:
+            try:
+                await asyncio.to_thread(self._rollup_recent)
+            except Exception as e:
+                logger.error(f"Error rolling up recent calls: {e}")
+            try:
+                # Any worker's job may have redone the hours, so every worker checks
+                self.evict_rerolled(await asyncio.to_thread(self._load_dirty_hours))
+            except Exception as e:
+                logger.error(f"Error checking re-aggregated report hours: {e}")
+            try:
+                await asyncio.sleep(settings.REPORT_ROLLUP_INTERVAL_SECONDS)
+            except asyncio.CancelledError:
+                break
+
+    def timeseries(
+        self,
+        db: Session,
+        interval: str,
+        start_day: date,
+        end_day: date,
+        group_by: Optional[str] = None,
+        agent_id: Optional[int] = None,
+        campaign_id: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Bucketed call metrics for the UTC days [start_day, end_day]
+        Each point is {"bucket", "key", <metrics>}; key is the group_by value (None if ungrouped)
+        """
+        if interval not in INTERVALS:
+            raise ValueError(f"Unsupported interval: {interval}")
+        if group_by and group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Unsupported group_by: {group_by}")
+        series: SeriesKey = (interval, group_by or "", agent_id, campaign_id)
+        closed_until = self.closed_before()
+
+        # Closed days come from the cache; missing ones are fetched in a single query
+        closed: Dict[date, Optional[List[Dict]]] = {}
+        day = start_day
+        while day <= end_day and day_start(day + timedelta(days=1)) <= closed_until:
+            closed[day] = self.closed_days.get((series, day))
+            if closed[day] is None:
+                self.cache_misses += 1
+            else:
+                self.closed_days.move_to_end((series, day))
+                self.cache_hits += 1
+            day += timedelta(days=1)
+        open_from = day
+
+        missing = [d for d, cached in closed.items() if cached is None]
+        if missing:
+            fetched: Dict[date, List[Dict]] = {d: [] for d in missing}
+            for point in self._query(db, series, day_start(missing[0]), day_start(missing[-1] + timedelta(days=1))):
+                point_day = point["bucket"].astimezone(timezone.utc).date()
+                if point_day in fetched:
+                    fetched[point_day].append(point)
+            for d, day_points in fetched.items():
+                closed[d] = day_points
+                self._store((series, d), day_points)
+
+        points: List[Dict] = []
+        for day_points in closed.values():
+            points.extend(day_points)
+
+        # Open days are still being re-aggregated, so they are always read fresh
+        if open_from <= end_day:
+            points.extend(self._query(db, series, day_start(open_from), day_start(end_day + timedelta(days=1))))
+
+        return [{**point, "bucket": point["bucket"].isoformat()} for point in points]
+
+    def _query(self, db: Session, series: SeriesKey, start: datetime, end: datetime) -> List[Dict]:
+        interval, group_by, agent_id, campaign_id = series
+        # Truncate in UTC regardless of the session time zone. Literals rather than bind
+        # parameters, so PostgreSQL sees the SELECT and GROUP BY expressions as identical
+        utc = literal_column("'UTC'")
+        bucket = func.timezone(utc, func.date_trunc(
+            literal_column(f"'{interval}'"), func.timezone(utc, CallRollupHourly.bucket_start)
+        ))
+        group_column = GROUP_COLUMNS.get(group_by)
+        columns = [bucket.label("bucket")]
+        if group_column is not None:
+            columns.append(group_column.label("key"))
+        columns.extend(func.sum(getattr(CallRollupHourly, name)).label(name) for name in METRIC_COLUMNS)
+
+        query = db.query(*columns).filter(
+            CallRollupHourly.bucket_start >= start,
+            CallRollupHourly.bucket_start < end
+        )
+        if agent_id:
+            query = query.filter(CallRollupHourly.agent_id == agent_id)
+        if campaign_id:
+            query = query.filter(CallRollupHourly.campaign_id == campaign_id)
+        group = [bucket] if group_column is None else [bucket, group_column]
+        rows = query.group_by(*group).order_by(*group).all()
+
+        return [
+            {
+                "bucket": row.bucket,
+                "key": row.key if group_column is not None else None,
+                **{name: int(getattr(row, name) or 0) for name in METRIC_COLUMNS},
+            }
+            for row in rows
+        ]
+
+    def _store(self, key, points: List[Dict]):
+        self.closed_days[key] = points
+        self.closed_days.move_to_end(key)
+        while len(self.closed_days) > settings.REPORT_CACHE_MAX_DAYS:
+            self.closed_days.popitem(last=False)
+
+    def clear_cache(self):
+        self.closed_days.clear()
+
+    def get_metrics(self) -> Dict:
+        return {
+            "cached_days": len(self.closed_days),
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "evictions": self.evictions,
+            "closed_before": self.closed_before().isoformat(),
+        }
+
+
+# Global report rollup instance
+report_rollup = ReportRollup()
@@ -0,0 +1,206 @@
+"""
+Retry Scheduler Service
+Puts NOT_ANSWERED, BUSY and FAILED contacts back in the hopper when their retry is due
+"""
+import asyncio
+import heapq
+import logging
+from typing import List, Optional, Tuple
+from datetime import datetime, timezone, timedelta, time
+from zoneinfo import ZoneInfo
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.campaign import Campaign
+from app.models.contact import Contact, ContactStatus
+
+logger = logging.getLogger(__name__)
+
+# Contact outcomes that are retried, mapped to the campaign column holding their backoff
+RETRY_BACKOFF_FIELDS = {
+    ContactStatus.NOT_ANSWERED: "retry_no_answer_minutes",
+    ContactStatus.BUSY: "retry_busy_minutes",
+    ContactStatus.FAILED: "retry_failed_minutes",
+}
+
+# Upper bound on how long the release loop sleeps without rechecking
+MAX_IDLE_SECONDS = 60
+
+
+def _parse_hhmm(value: Optional[str]) -> Optional[time]:
+    if not value:
+        return None
+    hours, minutes = value.split(":")
+    return time(int(hours), int(minutes))
+
+
+def next_in_window(due: datetime, window_start: Optional[str], window_end: Optional[str]) -> datetime:
+    """
+    Move a due time forward to the campaign's calling window
+    Windows are "HH:MM" in CALLING_TIMEZONE and may wrap past midnight (e.g. 20:00-02:00)
+    """
+    start = _parse_hhmm(window_start)
+    end = _parse_hhmm(window_end)
+    if start is None or end is None or start == end:
+        return due
+
+    tz = ZoneInfo(settings.CALLING_TIMEZONE)
+    local = due.astimezone(tz)
+    now_t = local.timetz().replace(tzinfo=None)
+
+    if start < end:
+        inside = start <= now_t < end
+    else:
+        inside = now_t >= start or now_t < end
+    if inside:
+        return due
+
+    opening = local.replace(hour=start.hour, minute=start.minute, second=0, microsecond=0)
+    if opening <= local:
+        opening += timedelta(days=1)
+    return opening.astimezone(timezone.utc)
+
+
+class RetryScheduler:
+    """
+    Schedule contact retries and release them exactly when due
+
+    The due time is persisted in contacts.next_attempt_at (indexed), and pending
+    retries are also kept in an in-memory min-heap so the release loop sleeps until
+    the earliest one instead of polling the table. Releases are conditional UPDATEs,
+    so stale heap entries and multiple workers are harmless.
+    """
+
+    def __init__(self):
+        self.heap: List[Tuple[datetime, int]] = []  # (next_attempt_at, contact_id)
+        self.wakeup: Optional[asyncio.Event] = None
+        self.release_task: Optional[asyncio.Task] = None
+        self.running = False
+
+    def schedule(self, db: Session, contact: Contact) -> Optional[datetime]:
+        """
+        Set next_attempt_at for a contact whose call just ended (caller commits)
+        Returns the due time, or None when the outcome is final or attempts are exhausted
+        """
+        try:
+            status = ContactStatus(contact.status)
+        except ValueError:
+            status = None
+        backoff_field = RETRY_BACKOFF_FIELDS.get(status)
+        campaign = db.query(Campaign).filter(Campaign.id == contact.campaign_id).first()
+        if not backoff_field or not campaign:
+            contact.next_attempt_at = None
+            return None
+
+        max_attempts = campaign.max_attempts or 0
+        if (contact.dial_attempts or 0) >= max_attempts:
+            contact.next_attempt_at = None
+            logger.debug(f"Contact {contact.id} reached {max_attempts} attempts, not retrying")
+            return None
+
+        backoff = timedelta(minutes=getattr(campaign, backoff_field) or 0)
+        due = next_in_window(
+            datetime.now(timezone.utc) + backoff,
+            campaign.call_window_start,
+            campaign.call_window_end
+        )
+        contact.next_attempt_at = due
+        self._push(due, contact.id)
+        return due
+
+    def _push(self, due: datetime, contact_id: int):
+        earliest = self.heap[0][0] if self.heap else None
+        heapq.heappush(self.heap, (due, contact_id))
+        if self.wakeup and (earliest is None or due < earliest):
+            self.wakeup.set()
+
+    async def start(self):
+        """Load pending retries and start the release loop"""
+        if self.running:
+            return
+        self.running = True
+        self.wakeup = asyncio.Event()
+        self._load_pending()
+        self.release_task = asyncio.create_task(self._release_loop())
+        logger.info(f"Retry scheduler started with {len(self.heap)} pending retries")
+
+    async def stop(self):
+        """Stop the release loop"""
+        self.running = False
+        if self.release_task:
+            self.release_task.cancel()
+            try:
+                await self.release_task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Retry scheduler stopped")
+
+    def _load_pending(self):
+        """Seed the heap from next_attempt_at (served by its partial index)"""
+        db = SessionLocal()
+        try:
+            rows = db.query(Contact.next_attempt_at, Contact.id).filter(
+                Contact.next_attempt_at.isnot(None)
+            ).all()
+            self.heap = [(due, contact_id) for due, contact_id in rows]
+            heapq.heapify(self.heap)
+        except Exception as e:
+            logger.error(f"Error loading pending retries: {e}")
+        finally:
+            db.close()
+
+    async def _release_loop(self):
+        while self.running:
+            try:
+                self._release_due()
+            except Exception as e:
+                logger.error(f"Error releasing due retries: {e}", exc_info=True)
+
+            timeout = MAX_IDLE_SECONDS
+            if self.heap:
+                until_due = (self.heap[0][0] - datetime.now(timezone.utc)).total_seconds()
+                timeout = min(max(until_due, 0), MAX_IDLE_SECONDS)
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                break
+
+    def _release_due(self):
+        now = datetime.now(timezone.utc)
+        due_ids = []
+        while self.heap and self.heap[0][0] <= now:
+            due_ids.append(heapq.heappop(self.heap)[1])
+        if not due_ids:
+            return
+
+        db = SessionLocal()
+        try:
+            # Only contacts still waiting on this retry; anything rescheduled or
+            # dispositioned since the heap entry was pushed is left alone
+            released = db.query(Contact).filter(
+                Contact.id.in_(due_ids),
+                Contact.next_attempt_at <= now,
+                Contact.status.in_([s.value for s in RETRY_BACKOFF_FIELDS])
+            ).update({
+                Contact.status: ContactStatus.NEW.value,
+                Contact.next_attempt_at: None
+            }, synchronize_session=False)
+            db.commit()
+            if released:
+                logger.info(f"Released {released} contacts back to the hopper for retry")
+        except Exception:
+            db.rollback()
+            # Try these again on the next pass rather than dropping them until restart
+            retry_at = now + timedelta(seconds=MAX_IDLE_SECONDS)
+            for contact_id in due_ids:
+                heapq.heappush(self.heap, (retry_at, contact_id))
+            raise
+        finally:
+            db.close()
+
+
+# Global retry scheduler instance
+retry_scheduler = RetryScheduler()
@@ -0,0 +1,132 @@
+"""
+Session Cache Service
+Verified bearer-token sessions, so authenticated requests authorize from token claims
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.agent import Agent, AgentSession, AgentStatus
+from app.services.websocket_manager import websocket_manager
+
+logger = logging.getLogger(__name__)
+
+# Pub/sub event that revokes sessions in every worker
+SESSION_REVOKED_EVENT = "session_revoked"
+
+
+class SessionCache:
+    """
+    Cache of token sessions recently checked against the database
+
+    Access tokens carry agent_id, session_id and is_admin claims. The first request on
+    a session checks that its agent_sessions row is still open and that the agent's
+    role still matches the is_admin claim; the answer (valid or not) is kept for
+    SESSION_CACHE_TTL_SECONDS, during which requests authorize from the claims alone.
+    Logout and admin changes to an agent close the sessions in the database and revoke
+    them in every worker's cache through the WebSocket pub/sub, which also closes any
+    WebSocket opened with them.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[float, bool]] = {}  # session_id -> (expires_at, valid)
+        self.generation = 0  # bumped on revocation; a check that raced one is not cached
+        self.hits = 0
+        self.misses = 0
+        self.revocations = 0
+
+    async def verify(self, session_id: Optional[str], agent_id: int, is_admin: Optional[bool]) -> bool:
+        """Whether a token with these claims belongs to an open session"""
+        if not session_id or is_admin is None:
+            # Tokens issued before role claims existed have to sign in again
+            return False
+
+        entry = self.entries.get(session_id)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        generation = self.generation
+        valid = await asyncio.to_thread(self._check, session_id, agent_id, is_admin)
+        if self.generation == generation:
+            if len(self.entries) >= settings.SESSION_CACHE_MAX_ENTRIES:
+                self._prune()
+            self.entries[session_id] = (time.monotonic() + settings.SESSION_CACHE_TTL_SECONDS, valid)
+        return valid
+
+    def _check(self, session_id: str, agent_id: int, is_admin: bool) -> bool:
+        db = SessionLocal()
+        try:
+            agent = db.query(Agent.is_admin).join(AgentSession, AgentSession.agent_id == Agent.id).filter(
+                AgentSession.session_id == session_id,
+                AgentSession.agent_id == agent_id,
+                AgentSession.logout_time.is_(None)
+            ).first()
+            return agent is not None and (agent.is_admin == 1) == is_admin
+        finally:
+            db.close()
+
+    def _prune(self):
+        now = time.monotonic()
+        self.entries = {key: entry for key, entry in self.entries.items() if entry[0] > now}
+        if len(self.entries) >= settings.SESSION_CACHE_MAX_ENTRIES:
+            self.entries.clear()
+
+    def close_sessions(self, db: Session, agent_id: int, session_id: Optional[str] = None) -> List[str]:
+        """
+        Mark an agent's open sessions (or just session_id) logged out; returns their ids
+        The caller commits, then passes the ids to revoke()
+        """
+        query = db.query(AgentSession).filter(
+            AgentSession.agent_id == agent_id,
+            AgentSession.logout_time.is_(None)
+        )
+        if session_id:
+            query = query.filter(AgentSession.session_id == session_id)
+        sessions = query.all()
+        now = datetime.now(timezone.utc)
+        for agent_session in sessions:
+            agent_session.logout_time = now
+            agent_session.status = AgentStatus.LOGGED_OUT.value
+        return [agent_session.session_id for agent_session in sessions]
+
+    async def revoke(self, session_ids: Iterable[str]):
+        """Reject these sessions in every worker from now on"""
+        session_ids = list(session_ids)
+        if session_ids:
+            await websocket_manager.publish_event(SESSION_REVOKED_EVENT, {"session_ids": session_ids})
+
+    async def _on_revoked(self, data: Dict):
+        expires_at = time.monotonic() + settings.SESSION_CACHE_TTL_SECONDS
+        revoked = set(data["session_ids"])
+        self.generation += 1
+        for session_id in revoked:
+            # After this the database check rejects the session anyway
+            self.entries[session_id] = (expires_at, False)
+        self.revocations += len(revoked)
+
+        for connections in list(websocket_manager.active_connections.values()):
+            for connection in list(connections):
+                if connection.session_id in revoked:
+                    await websocket_manager._close_socket(connection.websocket, 1008, "Session revoked")
+
+    def get_metrics(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revocations": self.revocations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.entries)
+        }
+
+
+# Global session cache instance
+session_cache = SessionCache()
+
+websocket_manager.on_event(SESSION_REVOKED_EVENT, session_cache._on_revoked)
@@ -0,0 +1,127 @@
+"""
+Stats Cache Service
+Short-TTL, single-flight cache for the stats and dashboard read endpoints
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Keys shared by every admin dashboard; invalidated on any call or agent change
+ADMIN_STATS_ALL_KEY = "admin:stats:all"
+ADMIN_STATS_SUMMARY_KEY = "admin:stats:summary"
+ADMIN_KEYS = (ADMIN_STATS_ALL_KEY, ADMIN_STATS_SUMMARY_KEY)
+
+
+def agent_today_key(agent_id: int) -> str:
+    return f"stats:today:{agent_id}"
+
+
+class StatsCache:
+    """
+    Cache computed stats responses for a few seconds
+
+    Concurrent requests for the same key share one in-flight computation, which runs
+    in a worker thread with its own database session. Invalidation bumps a per-key
+    version, so a computation that started before a change never stores its result.
+    Call sites queue invalidations on the SQLAlchemy session and they are applied only
+    once that session commits.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[float, Any]] = {}  # key -> (expires_at, value)
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    async def get_or_compute(self, key: str, compute: Callable[[Session], Any], ttl: Optional[float] = None) -> Any:
+        """Return the cached value for key, computing it with compute(db) on a miss"""
+        entry = self.entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        inflight = self.inflight.get(key)
+        if inflight:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        version = self.versions.get(key, 0)
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            value = await asyncio.to_thread(self._run, compute)
+            if self.versions.get(key, 0) == version:
+                self.entries[key] = (time.monotonic() + (ttl or settings.STATS_CACHE_TTL_SECONDS), value)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise it; mark retrieved so an unawaited future does not log
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                # The leader was cancelled; fail the waiters rather than leave them hanging
+                future.set_exception(RuntimeError(f"Computing {key} was cancelled"))
+                future.exception()
+            self.inflight.pop(key, None)
+
+    def _run(self, compute: Callable[[Session], Any]) -> Any:
+        db = SessionLocal()
+        try:
+            return compute(db)
+        finally:
+            db.close()
+
+    def invalidate(self, *keys: str):
+        for key in keys:
+            self.entries.pop(key, None)
+            self.versions[key] = self.versions.get(key, 0) + 1
+        self.invalidations += len(keys)
+
+    def invalidate_agent(self, agent_id: Optional[int]):
+        """Drop everything that depends on an agent's calls or status"""
+        if agent_id:
+            self.invalidate(agent_today_key(agent_id), *ADMIN_KEYS)
+        else:
+            self.invalidate(*ADMIN_KEYS)
+
+    def invalidate_on_commit(self, db: Session, agent_id: Optional[int] = None):
+        """Queue invalidation for an agent until the session's transaction commits"""
+        db.info.setdefault("stats_cache_agents", set()).add(agent_id)
+
+    def _after_commit(self, db: Session):
+        for agent_id in db.info.pop("stats_cache_agents", ()):
+            self.invalidate_agent(agent_id)
+
+    def _after_rollback(self, db: Session):
+        db.info.pop("stats_cache_agents", None)
+
+    def get_metrics(self) -> Dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "entries": len(self.entries)
+        }
+
+
+# Global stats cache instance
+stats_cache = StatsCache()
+
+event.listen(SessionLocal, "after_commit", stats_cache._after_commit)
+event.listen(SessionLocal, "after_rollback", stats_cache._after_rollback)
@@ -0,0 +1,259 @@
+"""
+Wallboard Service
+In-memory floor state (agents, live calls, today's counters) streamed to supervisors
+"""
+import asyncio
+import logging
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from app.core.database import SessionLocal
+from app.models.agent import Agent
+from app.models.call import Call, CallDirection, CallStatus
+from app.services.websocket_manager import websocket_manager, Connection
+
+logger = logging.getLogger(__name__)
+
+WALLBOARD_TOPIC = "wallboard"
+
+# Pub/sub event carrying committed call/agent rows to every worker's wallboard
+WALLBOARD_ROWS_EVENT = "wallboard_rows"
+
+LIVE_CALL_STATUSES = {
+    CallStatus.DIALING.value,
+    CallStatus.RINGING.value,
+    CallStatus.CONNECTED.value,
+    CallStatus.ANSWERED.value,
+}
+ABANDONED_STATUSES = {
+    CallStatus.NO_ANSWER.value,
+    CallStatus.BUSY.value,
+    CallStatus.FAILED.value,
+}
+ACTIVE_AGENT_STATUSES = {"available", "in_call", "paused"}
+
+
+def agent_row(agent: Agent) -> Dict:
+    return {
+        "id": agent.id,
+        "username": agent.username,
+        "full_name": agent.full_name,
+        "phone_extension": agent.phone_extension,
+        "status": agent.status,
+        "is_admin": agent.is_admin,
+    }
+
+
+def call_row(call: Call) -> Dict:
+    return {
+        "id": call.id,
+        "agent_id": call.agent_id,
+        "campaign_id": call.campaign_id,
+        "phone_number": call.phone_number,
+        "direction": call.direction,
+        "status": call.status,
+        "start_time": call.start_time.isoformat() if call.start_time else None,
+        "answered_time": call.answered_time.isoformat() if call.answered_time else None,
+    }
+
+
+class Wallboard:
+    """
+    Live floor state for supervisor screens
+
+    The state is loaded from the database once, when the first supervisor subscribes,
+    and from then on kept current from the rows LiveUpdates re-reads after each commit,
+    which reach every worker as a "wallboard_rows" pub/sub event (so AMI events and
+    call routes feed it without extra queries). Subscribers get a
+    "wallboard_snapshot" once and then "wallboard_delta" messages holding only the
+    agents, calls and counters that changed; a removed live call is sent as null.
+    Once the last subscriber leaves the state is no longer maintained, and it is loaded
+    afresh for the next one. Rows published while a load runs are held back and applied
+    once it finishes, so commits the load's query just missed are not lost.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.loading = False
+        self.held_rows: List[Tuple[List[Dict], List[Dict]]] = []  # (calls, agents) published mid-load
+        self.load_lock: Optional[asyncio.Lock] = None
+        self.agents: Dict[int, Dict] = {}
+        self.calls: Dict[int, Dict] = {}  # live calls only
+        self.day: Optional[date] = None
+        self.today: Dict[int, Dict] = {}  # call_id -> contribution to today's counters
+        self.totals: Counter = Counter()
+        self.campaign_totals: Dict[int, Counter] = {}
+        self.last_counters: Dict = {}
+
+    def is_active(self) -> bool:
+        return bool(websocket_manager.topics.get(WALLBOARD_TOPIC))
+
+    async def subscribe(self, connection: Connection):
+        # State kept while nobody watched may be stale; the first subscriber reloads it
+        if not self.is_active():
+            self.loaded = False
+        websocket_manager.subscribe(connection, WALLBOARD_TOPIC)
+        if self.load_lock is None:
+            self.load_lock = asyncio.Lock()
+        async with self.load_lock:
+            if not self.loaded:
+                self.loading = True
+                self.held_rows = []
+                try:
+                    await asyncio.to_thread(self._load)
+                    # Subscribers get the snapshot below, so the deltas are not sent
+                    for calls, agents in self.held_rows:
+                        self._apply_rows(calls, agents)
+                    self.loaded = True
+                finally:
+                    self.loading = False
+                    self.held_rows = []
+        await websocket_manager.send_to_connection(connection, {
+            "type": "wallboard_snapshot",
+            "data": {
+                "agents": list(self.agents.values()),
+                "calls": list(self.calls.values()),
+                "counters": self.last_counters,
+            }
+        })
+
+    def _load(self):
+        db = SessionLocal()
+        try:
+            self._reset_day(datetime.now(timezone.utc).date())
+            self.agents = {agent.id: agent_row(agent) for agent in db.query(Agent).all()}
+            self.calls = {}
+            today_start = datetime.combine(self.day, datetime.min.time(), timezone.utc)
+            for call in db.query(Call).filter(
+                (Call.start_time >= today_start) | Call.status.in_(LIVE_CALL_STATUSES)
+            ).all():
+                self._apply_call(call_row(call))
+            self.last_counters = self.counters()
+        finally:
+            db.close()
+
+    def _reset_day(self, day: date):
+        self.day = day
+        self.today = {}
+        self.totals = Counter()
+        self.campaign_totals = {}
+
+    def _apply_call(self, row: Dict):
+        if row["status"] in LIVE_CALL_STATUSES:
+            self.calls[row["id"]] = row
+        else:
+            self.calls.pop(row["id"], None)
+
+        if not row["start_time"] or datetime.fromisoformat(row["start_time"]).astimezone(timezone.utc).date() != self.day:
+            return
+        contribution = {
+            "campaign_id": row["campaign_id"],
+            "calls": 1,
+            "inbound": int(row["direction"] == CallDirection.INBOUND.value),
+            "outbound": int(row["direction"] == CallDirection.OUTBOUND.value),
+            "answered": int(row["answered_time"] is not None),
+            "abandoned": int(row["status"] in ABANDONED_STATUSES),
+        }
+        previous = self.today.get(row["id"])
+        if previous:
+            self._count(previous, -1)
+        self.today[row["id"]] = contribution
+        self._count(contribution, 1)
+
+    def _count(self, contribution: Dict, sign: int):
+        campaign = self.campaign_totals.setdefault(contribution["campaign_id"], Counter()) \
+            if contribution["campaign_id"] else None
+        for name in ("calls", "inbound", "outbound", "answered", "abandoned"):
+            self.totals[name] += sign * contribution[name]
+            if campaign is not None:
+                campaign[name] += sign * contribution[name]
+
+    def counters(self) -> Dict:
+        agents_by_status = Counter(agent["status"] for agent in self.agents.values() if agent["is_admin"] != 1)
+        calls_by_status = Counter(call["status"] for call in self.calls.values())
+        campaign_live = Counter(call["campaign_id"] for call in self.calls.values() if call["campaign_id"])
+        campaigns = {
+            str(campaign_id): {
+                "live_calls": campaign_live.get(campaign_id, 0),
+                "total_calls": totals["calls"],
+                "answered_calls": totals["answered"],
+            }
+            for campaign_id, totals in self.campaign_totals.items()
+        }
+        for campaign_id, live in campaign_live.items():
+            campaigns.setdefault(str(campaign_id), {"live_calls": live, "total_calls": 0, "answered_calls": 0})
+        return {
+            "total_agents": sum(agents_by_status.values()),
+            "active_agents": sum(agents_by_status[status] for status in ACTIVE_AGENT_STATUSES),
+            "agents_by_status": dict(agents_by_status),
+            "live_calls": len(self.calls),
+            "calls_by_status": dict(calls_by_status),
+            "total_calls": self.totals["calls"],
+            "total_inbound_calls": self.totals["inbound"],
+            "total_outbound_calls": self.totals["outbound"],
+            "answered_calls": self.totals["answered"],
+            "total_abandoned_calls": self.totals["abandoned"],
+            "overall_answer_rate": round(
+                (self.totals["calls"] - self.totals["abandoned"]) / self.totals["calls"] * 100, 2
+            ) if self.totals["calls"] else 0,
+            "campaigns": campaigns,
+        }
+
+    async def publish(self, calls: List[Dict], agents: List[Dict]):
+        """Apply committed call/agent rows and send what changed to subscribers"""
+        if not self.is_active():
+            # Nobody is watching; reload from scratch when someone subscribes again
+            self.loaded = False
+            return
+        if self.loading:
+            self.held_rows.append((calls, agents))
+            return
+        if not self.loaded:
+            return
+
+        delta = self._apply_rows(calls, agents)
+        if delta:
+            # Every worker receives the rows and builds this delta itself, so only its own
+            # subscribers are sent it (publishing would reach each supervisor once per worker)
+            websocket_manager.send_to_local_topic(WALLBOARD_TOPIC, {"type": "wallboard_delta", "data": delta})
+
+    def _apply_rows(self, calls: List[Dict], agents: List[Dict]) -> Dict:
+        """Fold rows into the state; returns the delta (agents, calls and counters that changed)"""
+        now_day = datetime.now(timezone.utc).date()
+        if now_day != self.day:
+            self._reset_day(now_day)
+
+        delta: Dict = {}
+        changed_agents = [row for row in agents if self.agents.get(row["id"]) != row]
+        for row in changed_agents:
+            self.agents[row["id"]] = row
+        if changed_agents:
+            delta["agents"] = changed_agents
+
+        changed_calls = {}
+        for row in calls:
+            was_live = row["id"] in self.calls
+            if self.calls.get(row["id"]) != row:
+                self._apply_call(row)
+                if row["id"] in self.calls:
+                    changed_calls[str(row["id"])] = row
+                elif was_live:
+                    changed_calls[str(row["id"])] = None
+        if changed_calls:
+            delta["calls"] = changed_calls
+
+        counters = self.counters()
+        changed_counters = {key: value for key, value in counters.items() if self.last_counters.get(key) != value}
+        self.last_counters = counters
+        if changed_counters:
+            delta["counters"] = changed_counters
+        return delta
+
+    async def _on_rows(self, data: Dict):
+        await self.publish(data["calls"], data["agents"])
+
+
+# Global wallboard instance
+wallboard = Wallboard()
+
+websocket_manager.on_event(WALLBOARD_ROWS_EVENT, wallboard._on_rows)
@@ -1,49 +1,418 @@
-from typing import Dict, Set
+from collections import Counter, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
 from fastapi import WebSocket
+from app.core.config import settings
+from app.services.ws_pubsub import create_pubsub
 import json
 import asyncio
+import logging
+import time
+import uuid
+
+try:
+    import msgpack
+except ImportError:  # Optional: clients fall back to JSON
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+ENCODINGS = ("json", "msgpack")
+
+# Message types where a later message for the same subject supersedes an earlier one
+CALL_MESSAGE_TYPES = ("call_state", "call_update")
+AGENT_MESSAGE_TYPES = ("agent_status", "stats_update")
+
+
+def coalesce_key(message: dict):
+    data = message.get("data")
+    if not isinstance(data, dict):
+        return None
+    message_type = message.get("type")
+    if message_type in CALL_MESSAGE_TYPES:
+        call_id = data.get("id") or data.get("call_id")
+        return (message_type, call_id) if call_id else None
+    if message_type in AGENT_MESSAGE_TYPES:
+        return (message_type,)
+    return None
+
+
+def coalesce(messages: list) -> list:
+    """
+    Merge messages about the same call (or the agent's status/stats) into one
+
+    The merged message takes the place and seq of the latest one it absorbed, and its
+    data is the earlier data updated with the later, so partial updates and stats
+    deltas accumulate. Everything else keeps its original order.
+    """
+    merged = []
+    positions = {}
+    for message in messages:
+        key = coalesce_key(message)
+        if key is not None and key in positions:
+            index = positions.pop(key)
+            message = {**message, "data": {**merged[index]["data"], **message["data"]}}
+            merged[index] = None
+        if key is not None:
+            positions[key] = len(merged)
+        merged.append(message)
+    return [message for message in merged if message is not None]
+
+
+class Connection:
+    """One WebSocket with its own bounded outbound queue, drained by a writer task"""
+
+    def __init__(self, websocket: WebSocket, agent_id: int, session_id: str, topics: Set[str], encoding: str = "json"):
+        self.websocket = websocket
+        self.agent_id = agent_id
+        self.session_id = session_id
+        self.topics = topics
+        self.encoding = encoding  # "json" (text frames) or "msgpack" (binary frames)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self.writer: Optional[asyncio.Task] = None
+        self.over_high_water_since: Optional[float] = None
+        self.closed = False
+        self.last_seen = time.monotonic()  # Last message (or pong) from the client
+
+
+class AgentHistory:
+    """Per-agent sequence counter and ring buffer of recent messages, for resuming"""
+
+    def __init__(self):
+        self.seq = 0
+        self.events: Deque[dict] = deque(maxlen=settings.WS_REPLAY_BUFFER_SIZE)
+        self.expires_at: Optional[float] = None  # Set once the agent has no local connections
+
+    def record(self, message: dict) -> dict:
+        self.seq += 1
+        message = {**message, "seq": self.seq}
+        self.events.append(message)
+        return message
+
+    def since(self, seq: int) -> Optional[List[dict]]:
+        """Messages after seq, or None if some of them are no longer buffered"""
+        if seq > self.seq:
+            return None
+        if seq == self.seq:
+            return []
+        if not self.events or self.events[0]["seq"] > seq + 1:
+            return None
+        return [message for message in self.events if message["seq"] > seq]
 
 
 class WebSocketManager:
-    """Manage WebSocket connections for real-time updates"""
-    
+    """
+    Manage WebSocket connections for real-time updates
+
+    Sending never waits on the network: messages are put on the connection's queue
+    and its writer task sends them. A client whose queue stays above
+    WS_SEND_QUEUE_HIGH_WATER for WS_SLOW_CLIENT_SECONDS, fills its queue or takes
+    longer than WS_SEND_TIMEOUT_SECONDS for one send is disconnected, so a slow
+    browser cannot hold up broadcasts or the AMI handlers that send to it.
+
+    The writer waits WS_COALESCE_MS after the first queued message, merges updates
+    for the same call (see coalesce()) and sends what is left as one "batch" frame.
+
+    Messages addressed to an agent carry a per-agent "seq" and the last
+    WS_REPLAY_BUFFER_SIZE of them are kept (for WS_RESUME_WINDOW_SECONDS after the
+    agent's last socket closes), so a client that reconnects with the epoch and last
+    seq it saw gets only what it missed. The epoch identifies this worker process;
+    seqs are not comparable between workers. Every WS_PING_INTERVAL_SECONDS each
+    connection is sent a "ping"; one that has sent nothing for WS_PING_TIMEOUT_SECONDS
+    is closed and removed.
+
+    Frames are JSON text unless the client asked for msgpack (binary) at connect time
+    and the msgpack package is installed. Compression (permessage-deflate) is
+    negotiated by the server itself, see WS_PER_MESSAGE_DEFLATE.
+
+    An agent may have several connections at once (tabs, a supervisor monitor);
+    messages for the agent go to all of them. Connections are also indexed by topic
+    (e.g. the "admins" role topic) for fan-out to everyone subscribed.
+
+    Messages for an agent, a topic or everyone are published through the pub/sub
+    backend (see ws_pubsub) so that, with several API workers, each worker delivers
+    them to the sockets it holds. active_connections only lists local sockets; use
+    may_be_connected() to decide whether something is worth sending.
+    """
+
     def __init__(self):
-        self.active_connections: Dict[int, WebSocket] = {}  # agent_id -> websocket
-        self.agent_sessions: Dict[int, str] = {}  # agent_id -> session_id
+        self.active_connections: Dict[int, Set[Connection]] = {}  # agent_id -> connections
+        self.topics: Dict[str, Set[Connection]] = {}  # topic -> connections
+        self.pubsub = create_pubsub()
+        self.started = False
+        self.epoch = uuid.uuid4().hex[:12]
+        self.history: Dict[int, AgentHistory] = {}  # agent_id -> recent messages
+        self.heartbeat_task: Optional[asyncio.Task] = None
+        self.event_handlers: Dict[str, Callable[[dict], Awaitable[None]]] = {}
+        self.sent = 0
+        self.frames = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.evictions = 0
+        self.reaped = 0
+        self.resumed = 0
+        self.resume_misses = 0
+        self.latency_total = 0.0  # seconds from enqueue to sent, summed
+        self.latency_max = 0.0
+        self.send_total = 0.0  # seconds spent sending frames, summed
+        self.bytes_sent: Dict[str, int] = {encoding: 0 for encoding in ENCODINGS}  # before compression
+
+    async def start(self):
+        await self.pubsub.start(self._deliver)
+        self.started = True
+        self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        self.started = False
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+            try:
+                await self.heartbeat_task
+            except asyncio.CancelledError:
+                pass
+        await self.pubsub.stop()
+
+    async def _heartbeat_loop(self):
+        while True:
+            try:
+                await asyncio.sleep(settings.WS_PING_INTERVAL_SECONDS)
+            except asyncio.CancelledError:
+                break
+            try:
+                self._heartbeat()
+            except Exception as e:
+                logger.error(f"Error in WebSocket heartbeat: {e}")
+
+    def _heartbeat(self):
+        now = time.monotonic()
+        for connections in list(self.active_connections.values()):
+            for connection in list(connections):
+                if now - connection.last_seen > settings.WS_PING_TIMEOUT_SECONDS:
+                    logger.info(f"Reaping unresponsive WebSocket for agent {connection.agent_id}")
+                    self.reaped += 1
+                    self.disconnect(connection)
+                    asyncio.create_task(self._close_socket(connection.websocket, 1001, "Ping timeout"))
+                else:
+                    self._enqueue(connection, {"type": "ping"})
 
-    async def connect(self, websocket: WebSocket, agent_id: int, session_id: str):
+        # Forget replay buffers of agents that have been gone longer than the resume window
+        for agent_id, history in list(self.history.items()):
+            if history.expires_at is not None and history.expires_at < now:
+                del self.history[agent_id]
+
+    def touch(self, connection: Connection):
+        """Note that the client is alive (it sent something)"""
+        connection.last_seen = time.monotonic()
+
+    @property
+    def distributed(self) -> bool:
+        return self.pubsub.distributed
+
+    def may_be_connected(self, agent_id: Optional[int] = None) -> bool:
+        """Whether anyone (or the given agent) might be connected to any worker"""
+        if self.distributed:
+            return True
+        return agent_id in self.active_connections if agent_id is not None else bool(self.active_connections)
+
+    def on_event(self, kind: str, handler: Callable[[dict], Awaitable[None]]):
+        """Run handler in every worker for each envelope published with publish_event(kind, ...)"""
+        self.event_handlers[kind] = handler
+
+    async def publish_event(self, kind: str, data: dict):
+        await self._publish({"kind": kind, "data": data})
+
+    async def _publish(self, envelope: dict):
+        if self.started:
+            await self.pubsub.publish(envelope)
+        else:
+            await self._deliver(envelope)
+
+    async def _deliver(self, envelope: dict):
+        """Deliver a published envelope to this worker's sockets"""
+        kind = envelope.get("kind")
+        if kind == "agent":
+            agent_id = envelope["agent_id"]
+            history = self.history.get(agent_id)
+            if history is None and agent_id not in self.active_connections:
+                return
+            message = (history or self.history.setdefault(agent_id, AgentHistory())).record(envelope["message"])
+            for connection in list(self.active_connections.get(agent_id, ())):
+                self._enqueue(connection, message)
+        elif kind == "topic":
+            self.send_to_local_topic(envelope["topic"], envelope["message"])
+        elif kind == "all":
+            for agent_id, connections in list(self.active_connections.items()):
+                if agent_id == envelope.get("exclude_agent_id"):
+                    continue
+                for connection in list(connections):
+                    self._enqueue(connection, envelope["message"])
+        elif kind in self.event_handlers:
+            await self.event_handlers[kind](envelope["data"])
+
+    def negotiate_encoding(self, requested: Optional[str]) -> str:
+        return "msgpack" if requested == "msgpack" and msgpack is not None else "json"
+
+    async def connect(
+        self, websocket: WebSocket, agent_id: int, session_id: str, topics=(), encoding: str = "json"
+    ) -> Connection:
         await websocket.accept()
-        self.active_connections[agent_id] = websocket
-        self.agent_sessions[agent_id] = session_id
+        connection = Connection(websocket, agent_id, session_id, set(topics), encoding)
+        connection.writer = asyncio.create_task(self._writer(connection))
+        self.active_connections.setdefault(agent_id, set()).add(connection)
+        for topic in connection.topics:
+            self.topics.setdefault(topic, set()).add(connection)
+        self.history.setdefault(agent_id, AgentHistory()).expires_at = None
+        return connection
 
-    def disconnect(self, agent_id: int):
-        if agent_id in self.active_connections:
-            del self.active_connections[agent_id]
-        if agent_id in self.agent_sessions:
-            del self.agent_sessions[agent_id]
+    def position(self, agent_id: int) -> Dict:
+        """The resume point a client should remember: this worker's epoch and the agent's last seq"""
+        history = self.history.get(agent_id)
+        return {"epoch": self.epoch, "seq": history.seq if history else 0}
 
-    async def send_personal_message(self, message: dict, agent_id: int):
-        if agent_id in self.active_connections:
+    def missed_since(self, agent_id: int, epoch: str, seq: int) -> Optional[List[dict]]:
+        """What the agent missed after (epoch, seq), or None if a full snapshot is needed instead"""
+        history = self.history.get(agent_id)
+        missed = history.since(seq) if history and epoch == self.epoch else None
+        if missed is None:
+            self.resume_misses += 1
+        else:
+            self.resumed += 1
+        return missed
+
+    def subscribe(self, connection: Connection, topic: str):
+        if connection.closed:
+            return
+        connection.topics.add(topic)
+        self.topics.setdefault(topic, set()).add(connection)
+
+    def unsubscribe(self, connection: Connection, topic: str):
+        connection.topics.discard(topic)
+        subscribers = self.topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(connection)
+            if not subscribers:
+                del self.topics[topic]
+
+    def disconnect(self, connection: Connection):
+        """Remove one connection; the agent's other connections stay registered"""
+        connections = self.active_connections.get(connection.agent_id)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
+                del self.active_connections[connection.agent_id]
+                history = self.history.get(connection.agent_id)
+                if history:
+                    history.expires_at = time.monotonic() + settings.WS_RESUME_WINDOW_SECONDS
+        for topic in list(connection.topics):
+            self.unsubscribe(connection, topic)
+        self._close(connection)
+
+    def _close(self, connection: Connection):
+        if connection.closed:
+            return
+        connection.closed = True
+        if connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+        self.dropped += connection.queue.qsize()
+
+    def _evict(self, connection: Connection, reason: str):
+        """Drop a client that cannot keep up; its socket is closed in the background"""
+        if connection.closed:
+            return
+        logger.warning(f"Disconnecting slow WebSocket client for agent {connection.agent_id}: {reason}")
+        self.evictions += 1
+        self.disconnect(connection)
+        asyncio.create_task(self._close_socket(connection.websocket, 1013, "Client too slow"))
+
+    async def _close_socket(self, websocket: WebSocket, code: int, reason: str):
+        try:
+            await asyncio.wait_for(websocket.close(code=code, reason=reason), settings.WS_SEND_TIMEOUT_SECONDS)
+        except Exception:
+            pass
+
+    def _enqueue(self, connection: Connection, message: dict):
+        if connection.closed:
+            return
+        try:
+            connection.queue.put_nowait((time.monotonic(), message))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            self._evict(connection, "send queue full")
+            return
+
+        if connection.queue.qsize() >= settings.WS_SEND_QUEUE_HIGH_WATER:
+            now = time.monotonic()
+            if connection.over_high_water_since is None:
+                connection.over_high_water_since = now
+            elif now - connection.over_high_water_since > settings.WS_SLOW_CLIENT_SECONDS:
+                self._evict(connection, "send queue over high-water mark")
+
+    async def _writer(self, connection: Connection):
+        while not connection.closed:
             try:
-                await self.active_connections[agent_id].send_json(message)
+                batch = [await connection.queue.get()]
+                if settings.WS_COALESCE_MS > 0:
+                    await asyncio.sleep(settings.WS_COALESCE_MS / 1000)
+                while len(batch) < settings.WS_BATCH_MAX_MESSAGES and not connection.queue.empty():
+                    batch.append(connection.queue.get_nowait())
+                messages = coalesce([message for _, message in batch])
+                frame = messages[0] if len(messages) == 1 else {"type": "batch", "data": messages}
+                started = time.monotonic()
+                await asyncio.wait_for(self._send_frame(connection, frame), settings.WS_SEND_TIMEOUT_SECONDS)
+            except asyncio.CancelledError:
+                break
+            except asyncio.TimeoutError:
+                self._evict(connection, "send timed out")
+                break
             except Exception as e:
-                print(f"Error sending message to agent {agent_id}: {e}")
+                logger.error(f"Error sending message to agent {connection.agent_id}: {e}")
+                self._evict(connection, "send failed")
+                break
+
+            finished = time.monotonic()
+            self.frames += 1
+            self.sent += len(batch)
+            self.coalesced += len(batch) - len(messages)
+            self.send_total += finished - started
+            for queued_at, _ in batch:
+                self.latency_total += finished - queued_at
+            self.latency_max = max(self.latency_max, finished - batch[0][0])
+            if connection.queue.qsize() < settings.WS_SEND_QUEUE_HIGH_WATER:
+                connection.over_high_water_since = None
+
+    async def _send_frame(self, connection: Connection, frame: dict):
+        if connection.encoding == "msgpack":
+            payload = msgpack.packb(frame, default=str)
+            self.bytes_sent["msgpack"] += len(payload)
+            await connection.websocket.send_bytes(payload)
+        else:
+            text = json.dumps(frame, separators=(",", ":"), ensure_ascii=False, default=str)
+            self.bytes_sent["json"] += len(text.encode())
+            await connection.websocket.send_text(text)
+
+    def is_connected(self, agent_id: int) -> bool:
+        return agent_id in self.active_connections
+
+    async def send_to_connection(self, connection: Connection, message: dict):
+        self._enqueue(connection, message)
+
+    async def send_personal_message(self, message: dict, agent_id: int):
+        """Send to every connection the agent has open, on any worker"""
+        if self.may_be_connected(agent_id):
+            await self._publish({"kind": "agent", "agent_id": agent_id, "message": message})
+
+    async def send_to_topic(self, topic: str, message: dict):
+        if self.distributed or topic in self.topics:
+            await self._publish({"kind": "topic", "topic": topic, "message": message})
+
+    def send_to_local_topic(self, topic: str, message: dict):
+        """Queue a message for this worker's subscribers only (for state every worker already has)"""
+        for connection in list(self.topics.get(topic, ())):
+            self._enqueue(connection, message)
 
     async def broadcast(self, message: dict, exclude_agent_id: int = None):
         """Broadcast to all connected agents except one"""
-        disconnected = []
-        for agent_id, connection in self.active_connections.items():
-            if agent_id == exclude_agent_id:
-                continue
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                print(f"Error broadcasting to agent {agent_id}: {e}")
-                disconnected.append(agent_id)
-        
-        # Clean up disconnected agents
-        for agent_id in disconnected:
-            self.disconnect(agent_id)
+        if self.may_be_connected():
+            await self._publish({"kind": "all", "exclude_agent_id": exclude_agent_id, "message": message})
 
     async def send_call_update(self, agent_id: int, call_data: dict):
         """Send call status update to agent"""
@@ -69,6 +438,38 @@ class WebSocketManager:
         }
         await self.send_personal_message(message, agent_id)
 
+    def get_metrics(self) -> Dict:
+        depths = {
+            agent_id: [connection.queue.qsize() for connection in connections]
+            for agent_id, connections in self.active_connections.items()
+        }
+        all_depths = [depth for agent_depths in depths.values() for depth in agent_depths]
+        return {
+            "pubsub": type(self.pubsub).__name__,
+            "agents": len(self.active_connections),
+            "connections": len(all_depths),
+            "topics": {topic: len(subscribers) for topic, subscribers in self.topics.items()},
+            "queued": sum(all_depths),
+            "max_queue_depth": max(all_depths, default=0),
+            "queue_depths": depths,
+            "sent": self.sent,
+            "frames": self.frames,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "evictions": self.evictions,
+            "reaped": self.reaped,
+            "resumed": self.resumed,
+            "resume_misses": self.resume_misses,
+            "replay_buffers": len(self.history),
+            "avg_latency_ms": round(self.latency_total / self.sent * 1000, 2) if self.sent else 0.0,
+            "max_latency_ms": round(self.latency_max * 1000, 2),
+            "encodings": dict(Counter(
+                connection.encoding for connections in self.active_connections.values() for connection in connections
+            )),
+            "bytes_sent": self.bytes_sent,
+            "avg_send_ms": round(self.send_total / self.frames * 1000, 2) if self.frames else 0.0
+        }
+
 
 # Global WebSocket manager instance
 websocket_manager = WebSocketManager()
@@ -0,0 +1,182 @@
+"""
+WebSocket Pub/Sub Service
+Carries WebSocket fan-out between API worker processes
+"""
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Optional
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], Awaitable[None]]
+
+# NOTIFY payloads are limited to 8000 bytes; larger envelopes go through ws_outbox
+NOTIFY_MAX_BYTES = 7800
+OUTBOX_PREFIX = "#"
+
+
+class InProcessPubSub:
+    """Single-worker backend: published envelopes are delivered straight back to this process"""
+
+    distributed = False
+
+    def __init__(self):
+        self.handler: Optional[Handler] = None
+
+    async def start(self, handler: Handler):
+        self.handler = handler
+
+    async def stop(self):
+        self.handler = None
+
+    async def publish(self, envelope: dict):
+        if self.handler:
+            await self.handler(envelope)
+
+
+class PostgresPubSub:
+    """
+    Multi-worker backend on PostgreSQL LISTEN/NOTIFY
+
+    Every worker LISTENs on WS_PUBSUB_CHANNEL over a dedicated connection watched by
+    the event loop, and receives its own notifications too, so a publish reaches all
+    workers (each then delivers to the sockets it holds). Notifications are handled
+    one at a time in arrival order. Envelopes too large for NOTIFY are stored in the
+    ws_outbox table and only their id is sent. If the listening connection drops it
+    is re-established; messages published meanwhile are not replayed.
+    """
+
+    distributed = True
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self.handler: Optional[Handler] = None
+        self.connection = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.consumer: Optional[asyncio.Task] = None
+        self.reconnect_task: Optional[asyncio.Task] = None
+        self.running = False
+
+    async def start(self, handler: Handler):
+        self.handler = handler
+        self.loop = asyncio.get_running_loop()
+        self.running = True
+        self.consumer = asyncio.create_task(self._consume())
+        await self._listen()
+
+    async def stop(self):
+        self.running = False
+        self._close_listener()
+        for task in (self.consumer, self.reconnect_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    async def _listen(self):
+        try:
+            self.connection = await asyncio.to_thread(self._open_listener)
+            self.loop.add_reader(self.connection.fileno(), self._on_readable)
+            logger.info(f"Listening for WebSocket events on channel {self.channel}")
+        except Exception as e:
+            logger.error(f"Error starting WebSocket pub/sub listener: {e}")
+            self._schedule_reconnect()
+
+    def _open_listener(self):
+        raw = engine.raw_connection()
+        raw.detach()  # Held for the life of the worker, not returned to the pool
+        connection = raw.driver_connection
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return connection
+
+    def _close_listener(self):
+        if self.connection is None:
+            return
+        try:
+            self.loop.remove_reader(self.connection.fileno())
+        except Exception:
+            pass
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+        self.connection = None
+
+    def _on_readable(self):
+        try:
+            self.connection.poll()
+        except Exception as e:
+            logger.error(f"WebSocket pub/sub listener lost its connection: {e}")
+            self._close_listener()
+            self._schedule_reconnect()
+            return
+        while self.connection.notifies:
+            self.inbox.put_nowait(self.connection.notifies.pop(0).payload)
+
+    def _schedule_reconnect(self):
+        if not self.running or (self.reconnect_task and not self.reconnect_task.done()):
+            return
+
+        async def reconnect():
+            await asyncio.sleep(5)
+            await self._listen()
+
+        self.reconnect_task = asyncio.create_task(reconnect())
+
+    async def _consume(self):
+        while True:
+            payload = await self.inbox.get()
+            try:
+                if payload.startswith(OUTBOX_PREFIX):
+                    payload = await asyncio.to_thread(self._fetch_outbox, int(payload[1:]))
+                    if payload is None:
+                        continue
+                await self.handler(json.loads(payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error delivering WebSocket event: {e}")
+
+    def _fetch_outbox(self, outbox_id: int) -> Optional[str]:
+        with engine.connect() as connection:
+            return connection.execute(
+                text("SELECT payload FROM ws_outbox WHERE id = :id"), {"id": outbox_id}
+            ).scalar()
+
+    async def publish(self, envelope: dict):
+        payload = json.dumps(envelope, default=str)
+        try:
+            await asyncio.to_thread(self._notify, payload)
+        except Exception as e:
+            logger.error(f"Error publishing WebSocket event: {e}")
+
+    def _notify(self, payload: str):
+        with engine.connect() as connection:
+            if len(payload.encode()) > NOTIFY_MAX_BYTES:
+                outbox_id = connection.execute(
+                    text("INSERT INTO ws_outbox (payload) VALUES (:payload) RETURNING id"), {"payload": payload}
+                ).scalar()
+                connection.execute(text("DELETE FROM ws_outbox WHERE created_at < NOW() - INTERVAL '5 minutes'"))
+                payload = f"{OUTBOX_PREFIX}{outbox_id}"
+            connection.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+            connection.commit()
+
+
+def create_pubsub():
+    """Backend selected by WS_PUBSUB_BACKEND ("postgres" or "memory")"""
+    if settings.WS_PUBSUB_BACKEND == "postgres":
+        if settings.DATABASE_URL.startswith("postgresql"):
+            return PostgresPubSub(settings.WS_PUBSUB_CHANNEL)
+        logger.warning("WS_PUBSUB_BACKEND=postgres needs a PostgreSQL DATABASE_URL; using in-process pub/sub")
+    elif settings.WS_PUBSUB_BACKEND != "memory":
+        logger.warning(f"Unknown WS_PUBSUB_BACKEND {settings.WS_PUBSUB_BACKEND!r}; using in-process pub/sub")
+    return InProcessPubSub()
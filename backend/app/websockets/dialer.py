@@ -1,14 +1,32 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
 from app.services.websocket_manager import websocket_manager
+from app.services.live_updates import live_updates
+from app.services.wallboard import wallboard, WALLBOARD_TOPIC
+from app.services.session_cache import session_cache
 from app.core.security import decode_access_token
 from typing import Optional
+import json
 
 router = APIRouter()
 
 
+def role_topics(payload: dict) -> set:
+    """Topics a connection joins from the token's role claim"""
+    return {"admins"} if payload.get("is_admin") else {"agents"}
+
+
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = None):
-    """WebSocket endpoint for real-time updates"""
+async def websocket_endpoint(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    resume: Optional[str] = None,
+    encoding: Optional[str] = None
+):
+    """
+    WebSocket endpoint for real-time updates
+    resume="<epoch>:<seq>" (from the last connection) replays missed messages instead of a snapshot
+    encoding="msgpack" asks for binary MessagePack frames instead of JSON text (if available)
+    """
     if not token:
         await websocket.close(code=1008, reason="Authentication required")
         return
@@ -26,32 +44,86 @@ async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = None):
         await websocket.close(code=1008, reason="Invalid token")
         return
     
-    # Connect
-    await websocket_manager.connect(websocket, agent_id, session_id)
+    if not await session_cache.verify(session_id, agent_id, payload.get("is_admin")):
+        await websocket.close(code=1008, reason="Session expired or revoked")
+        return
+    
+    # Connect (an agent may have several tabs or monitors open at once)
+    connection = await websocket_manager.connect(
+        websocket, agent_id, session_id, role_topics(payload), websocket_manager.negotiate_encoding(encoding)
+    )
+    position = websocket_manager.position(agent_id)
+    
+    missed = None
+    if resume:
+        try:
+            epoch, seq = resume.split(":")
+            missed = websocket_manager.missed_since(agent_id, epoch, int(seq))
+        except ValueError:
+            missed = None
     
     try:
         # Send initial connection confirmation
-        await websocket_manager.send_personal_message(
+        await websocket_manager.send_to_connection(
+            connection,
             {
                 "type": "connected",
-                "message": "WebSocket connected successfully"
-            },
-            agent_id
+                "message": "WebSocket connected successfully",
+                "epoch": position["epoch"],
+                "seq": position["seq"],
+                "resumed": missed is not None,
+                "encoding": connection.encoding
+            }
         )
         
+        if missed is not None:
+            # Resuming: only what happened while the client was away
+            for message in missed:
+                await websocket_manager.send_to_connection(connection, message)
+        else:
+            # Current call, status and stats; later changes are pushed as they commit
+            await live_updates.send_snapshot(agent_id, connection)
+        
         # Keep connection alive
         while True:
             # Receive any messages from client
             data = await websocket.receive_text()
+            websocket_manager.touch(connection)
+            
+            try:
+                message = json.loads(data)
+            except ValueError:
+                message = None
+            if isinstance(message, dict) and message.get("type") == "pong":
+                continue
+            
+            # Supervisors subscribe to the wallboard stream
+            if isinstance(message, dict) and message.get("type") == "unsubscribe":
+                topic = (message.get("data") or {}).get("topic")
+                if topic == WALLBOARD_TOPIC:
+                    websocket_manager.unsubscribe(connection, topic)
+                continue
+            if isinstance(message, dict) and message.get("type") == "subscribe":
+                topic = (message.get("data") or {}).get("topic")
+                if topic == WALLBOARD_TOPIC and "admins" in connection.topics:
+                    await wallboard.subscribe(connection)
+                else:
+                    await websocket_manager.send_to_connection(
+                        connection,
+                        {"type": "error", "message": f"Cannot subscribe to {topic}"}
+                    )
+                continue
+            
             # Echo back or handle client messages
-            await websocket_manager.send_personal_message(
+            await websocket_manager.send_to_connection(
+                connection,
                 {
                     "type": "echo",
                     "data": data
-                },
-                agent_id
+                }
             )
             
     except WebSocketDisconnect:
-        websocket_manager.disconnect(agent_id)
         print(f"Agent {agent_id} disconnected")
+    finally:
+        websocket_manager.disconnect(connection)
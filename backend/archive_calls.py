@@ -0,0 +1,53 @@
+"""
+Archive old monthly partitions of calls to Parquet and drop them from the database
+Run: python archive_calls.py [months]   (default: CALLS_ARCHIVE_AFTER_MONTHS)
+
+Requires migrations/partition_calls_by_month.sql. Each month older than [months] is
+written, with its call recordings, quality metrics and notes, to CALLS_ARCHIVE_DIR as
+zstd Parquet; those child rows are deleted, voicemail_messages.call_id is cleared (the
+migration removed the foreign keys that used to do this) and the partition is detached
+and dropped. A run that stops part-way can simply be repeated.
+Archived months stay available through GET /api/reports/calls/export. Suitable for a
+monthly cron job.
+"""
+import sys
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.call_partitions import call_partitions
+
+
+def archive(months: int) -> int:
+    db = SessionLocal()
+    try:
+        if not call_partitions.is_partitioned(db):
+            print("calls is not partitioned; run migrations/partition_calls_by_month.sql first")
+            return 0
+        created = call_partitions.ensure_partitions(db)
+        if created:
+            print(f"  Created partitions: {', '.join(created)}")
+        archived = 0
+        for month in call_partitions.archivable_months(db, months):
+            rows = call_partitions.archive_month(db, month)
+            print(f"  {month:%Y-%m}: " + ", ".join(f"{count} {table}" for table, count in rows.items()))
+            archived += 1
+        return archived
+    except Exception as e:
+        db.rollback()
+        print(f"Error archiving calls: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    months = int(sys.argv[1]) if len(sys.argv) > 1 else settings.CALLS_ARCHIVE_AFTER_MONTHS
+    
+    print("=" * 50)
+    print("AK Dialer - Archive Calls")
+    print("=" * 50)
+    
+    archived = archive(months)
+    
+    print("=" * 50)
+    print(f"[OK] Archived {archived} month(s) to {settings.CALLS_ARCHIVE_DIR}")
+    print("=" * 50)
@@ -0,0 +1,108 @@
+"""
+Backfill phone_normalized on existing contacts and calls, and normalize dnc_list
+Run: python backfill_phone_normalized.py [batch_size]
+
+Walks each table by primary key in batches so it can run against a live database
+and be restarted at any time (rows already normalized are simply rewritten).
+"""
+import sys
+import pandas as pd
+from sqlalchemy import update, bindparam
+from app.core.database import SessionLocal
+from app.core.phone import normalize_phone_series
+from app.models.contact import Contact
+from app.models.call import Call
+from app.models.dnc import DNCEntry
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def backfill_table(model, phone_column, batch_size: int):
+    """Set phone_normalized for every row of a table, one id range at a time"""
+    db = SessionLocal()
+    table = model.__table__
+    stmt = update(table).where(table.c.id == bindparam('row_id')).values(
+        phone_normalized=bindparam('normalized')
+    )
+    last_id = 0
+    processed = 0
+    try:
+        while True:
+            rows = db.query(model.id, phone_column).filter(
+                model.id > last_id
+            ).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            
+            batch = pd.DataFrame(rows, columns=['id', 'phone'])
+            batch['normalized'] = normalize_phone_series(batch['phone'])
+            params = [
+                {'row_id': int(row_id), 'normalized': None if pd.isna(normalized) else normalized}
+                for row_id, normalized in zip(batch['id'], batch['normalized'])
+            ]
+            db.connection().execute(stmt, params)
+            db.commit()
+            
+            last_id = rows[-1][0]
+            processed += len(rows)
+            print(f"  {table.name}: {processed} rows (last id {last_id})")
+    except Exception as e:
+        print(f"Error backfilling {table.name}: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    print(f"[OK] {table.name}: {processed} rows normalized")
+
+
+def normalize_dnc_list(batch_size: int):
+    """Rewrite dnc_list numbers to E.164 digits, dropping entries that collapse into duplicates"""
+    db = SessionLocal()
+    last_id = 0
+    changed = 0
+    try:
+        while True:
+            rows = db.query(DNCEntry.id, DNCEntry.phone_number).filter(
+                DNCEntry.id > last_id
+            ).order_by(DNCEntry.id).limit(batch_size).all()
+            if not rows:
+                break
+            
+            batch = pd.DataFrame(rows, columns=['id', 'phone'])
+            batch['normalized'] = normalize_phone_series(batch['phone'])
+            for row_id, phone, normalized in batch.itertuples(index=False):
+                if pd.isna(normalized) or normalized == phone:
+                    continue
+                duplicate = db.query(DNCEntry.id).filter(DNCEntry.phone_number == normalized).first()
+                if duplicate:
+                    db.query(DNCEntry).filter(DNCEntry.id == int(row_id)).delete(synchronize_session=False)
+                else:
+                    db.query(DNCEntry).filter(DNCEntry.id == int(row_id)).update(
+                        {DNCEntry.phone_number: normalized}, synchronize_session=False
+                    )
+                changed += 1
+            db.commit()
+            last_id = rows[-1][0]
+    except Exception as e:
+        print(f"Error normalizing dnc_list: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    print(f"[OK] dnc_list: {changed} numbers normalized")
+
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BATCH_SIZE
+    
+    print("=" * 50)
+    print("AK Dialer - Phone Normalization Backfill")
+    print("=" * 50)
+    
+    backfill_table(Contact, Contact.phone, batch_size)
+    backfill_table(Call, Call.phone_number, batch_size)
+    normalize_dnc_list(batch_size)
+    
+    print("=" * 50)
+    print("[OK] Backfill complete!")
+    print("=" * 50)
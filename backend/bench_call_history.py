@@ -0,0 +1,103 @@
+"""
+Benchmark call history paging: keyset cursor vs OFFSET, deep into an agent's history
+Run: python bench_call_history.py <agent_id> [page_size] [--seed N]
+
+Walks the agent's full history with the same query as GET /api/calls/history and
+prints per-page latency at increasing depths next to the equivalent OFFSET query.
+With --seed N, N synthetic calls spread over the past year are inserted for the
+agent first; everything runs in one transaction that is rolled back at the end,
+so nothing is left behind.
+"""
+import sys
+import time
+from sqlalchemy import text, tuple_
+from app.core.database import SessionLocal
+from app.models.call import Call
+from app.api.routes.calls import call_history_query
+
+SAMPLE_PAGES = (1, 10, 100, 1000, 5000, 10000, 50000)
+
+
+def seed(db, agent_id: int, count: int):
+    db.execute(text("""
+        INSERT INTO calls (agent_id, phone_number, direction, status, start_time, duration)
+        SELECT :agent_id,
+               '92300' || lpad((n % 10000000)::text, 7, '0'),
+               CASE WHEN n % 3 = 0 THEN 'inbound' ELSE 'outbound' END,
+               'ended',
+               now() - (n * (interval '365 days' / :count)),
+               (n % 300)
+        FROM generate_series(1, :count) AS n
+    """), {"agent_id": agent_id, "count": count})
+    db.execute(text("ANALYZE calls"))
+
+
+def timed(fn):
+    started = time.perf_counter()
+    rows = fn()
+    return (time.perf_counter() - started) * 1000, rows
+
+
+def bench(agent_id: int, page_size: int, seed_count: int = 0):
+    db = SessionLocal()
+    try:
+        if seed_count:
+            print(f"Seeding {seed_count} calls for agent {agent_id} (rolled back afterwards)...")
+            seed(db, agent_id, seed_count)
+
+        ordered = lambda q: q.order_by(Call.start_time.desc(), Call.id.desc()).limit(page_size)
+        print(f"{'page':>8} {'depth':>10} {'keyset ms':>10} {'offset ms':>10}")
+
+        page = 0
+        cursor = None
+        walk_started = time.perf_counter()
+        while True:
+            page += 1
+            query = call_history_query(db, agent_id)
+            if cursor:
+                query = query.filter(tuple_(Call.start_time, Call.id) < cursor)
+            keyset_ms, rows = timed(lambda: ordered(query).all())
+            if not rows:
+                break
+
+            if page in SAMPLE_PAGES:
+                depth = (page - 1) * page_size
+                offset_ms, _ = timed(lambda: ordered(call_history_query(db, agent_id)).offset(depth).all())
+                print(f"{page:>8} {depth:>10} {keyset_ms:>10.2f} {offset_ms:>10.2f}")
+
+            last = rows[-1]
+            cursor = (last.start_time, last.id)
+            # Keep the identity map from growing over a long walk
+            db.expunge_all()
+            if len(rows) < page_size:
+                break
+
+        walk_ms = (time.perf_counter() - walk_started) * 1000
+        print(f"Walked {page} pages in {walk_ms:.0f} ms ({walk_ms / max(page, 1):.2f} ms/page)")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    seed_count = 0
+    if "--seed" in args:
+        index = args.index("--seed")
+        seed_count = int(args[index + 1])
+        del args[index:index + 2]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    agent_id = int(args[0])
+    page_size = int(args[1]) if len(args) > 1 else 50
+    
+    print("=" * 50)
+    print("AK Dialer - Call History Paging Benchmark")
+    print("=" * 50)
+    
+    bench(agent_id, page_size, seed_count)
+    
+    print("=" * 50)
+    print("[OK] Keyset latency should stay flat while OFFSET grows with depth")
+    print("=" * 50)
@@ -0,0 +1,34 @@
+-- Incremental per-agent daily counters (agent_performance) for the stats endpoints
+-- Run this on your database server, then run: python rebuild_agent_stats.py 30
+
+CREATE TABLE IF NOT EXISTS agent_performance (
+    id SERIAL PRIMARY KEY,
+    agent_id INTEGER NOT NULL REFERENCES agents(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    period_type VARCHAR(20) DEFAULT 'daily',
+    total_calls INTEGER DEFAULT 0,
+    answered_calls INTEGER DEFAULT 0,
+    missed_calls INTEGER DEFAULT 0,
+    total_talk_time INTEGER DEFAULT 0,
+    avg_call_duration INTEGER DEFAULT 0,
+    total_sales INTEGER DEFAULT 0,
+    conversion_rate FLOAT DEFAULT 0.0,
+    total_break_time INTEGER DEFAULT 0,
+    login_duration INTEGER DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    UNIQUE(agent_id, date, period_type)
+);
+
+ALTER TABLE agent_performance
+ADD COLUMN IF NOT EXISTS inbound_calls INTEGER DEFAULT 0,
+ADD COLUMN IF NOT EXISTS outbound_calls INTEGER DEFAULT 0,
+ADD COLUMN IF NOT EXISTS total_duration INTEGER DEFAULT 0,
+ADD COLUMN IF NOT EXISTS duration_calls INTEGER DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_agent_performance_agent_id ON agent_performance(agent_id);
+CREATE INDEX IF NOT EXISTS idx_agent_performance_date ON agent_performance(date);
+
+-- Marks calls already added to the counters so each call is counted exactly once
+ALTER TABLE calls
+ADD COLUMN IF NOT EXISTS stats_recorded BOOLEAN DEFAULT FALSE;
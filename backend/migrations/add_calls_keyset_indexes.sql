@@ -0,0 +1,11 @@
+-- Indexes for keyset pagination and filtering of an agent's call history
+-- Run this on your database server
+
+-- Keyset pagination on (start_time, id) within an agent, newest first
+CREATE INDEX IF NOT EXISTS idx_calls_agent_start_time_id ON calls(agent_id, start_time DESC, id DESC);
+
+-- Superseded by the composite index above (agent_id is its leading column)
+DROP INDEX IF EXISTS idx_calls_agent_id;
+
+-- Keep planner statistics fresh so estimated_total stays close to the real count
+ANALYZE calls;
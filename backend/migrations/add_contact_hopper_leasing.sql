@@ -0,0 +1,13 @@
+-- Add hopper lease columns to contacts and the partial index used to pick the next contact
+-- Run this on your database server
+
+ALTER TABLE contacts
+ADD COLUMN IF NOT EXISTS leased_by_agent_id INTEGER REFERENCES agents(id),
+ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE;
+
+-- Next-contact selection: oldest NEW contact per campaign, without sorting the campaign
+CREATE INDEX IF NOT EXISTS idx_contacts_hopper ON contacts(campaign_id, created_at) WHERE status = 'new';
+-- Same selection when no campaign is given
+CREATE INDEX IF NOT EXISTS idx_contacts_hopper_all ON contacts(created_at) WHERE status = 'new';
+-- Lookup of the lease an agent already holds
+CREATE INDEX IF NOT EXISTS idx_contacts_leased_by_agent_id ON contacts(leased_by_agent_id) WHERE leased_by_agent_id IS NOT NULL;
@@ -0,0 +1,18 @@
+-- Add retry rules to campaigns and retry scheduling to contacts
+-- Run this on your database server
+
+ALTER TABLE campaigns
+ADD COLUMN IF NOT EXISTS max_attempts INTEGER DEFAULT 3,
+ADD COLUMN IF NOT EXISTS retry_no_answer_minutes INTEGER DEFAULT 60,
+ADD COLUMN IF NOT EXISTS retry_busy_minutes INTEGER DEFAULT 15,
+ADD COLUMN IF NOT EXISTS retry_failed_minutes INTEGER DEFAULT 240,
+ADD COLUMN IF NOT EXISTS call_window_start VARCHAR(5),
+ADD COLUMN IF NOT EXISTS call_window_end VARCHAR(5);
+
+ALTER TABLE contacts
+ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP WITH TIME ZONE;
+
+-- Only contacts waiting on a retry carry next_attempt_at, so the partial index stays small;
+-- the retry scheduler loads pending retries from it at startup
+CREATE INDEX IF NOT EXISTS idx_contacts_next_attempt_at ON contacts(next_attempt_at)
+WHERE next_attempt_at IS NOT NULL;
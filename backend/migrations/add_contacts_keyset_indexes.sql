@@ -0,0 +1,15 @@
+-- Indexes for keyset pagination and server-side filtering of the contacts list
+-- Run this on your database server
+
+-- Keyset pagination on (created_at, id), newest first, optionally within a campaign
+CREATE INDEX IF NOT EXISTS idx_contacts_created_at_id ON contacts(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_contacts_campaign_created_at_id ON contacts(campaign_id, created_at DESC, id DESC);
+
+-- Phone prefix search (LIKE 'prefix%') regardless of database collation
+CREATE INDEX IF NOT EXISTS idx_contacts_phone_pattern ON contacts(phone varchar_pattern_ops);
+
+-- City filter
+CREATE INDEX IF NOT EXISTS idx_contacts_city ON contacts(city);
+
+-- Keep planner statistics fresh so estimated_total stays close to the real count
+ANALYZE contacts;
@@ -0,0 +1,17 @@
+-- Add normalized (E.164 digits) phone columns to contacts and calls
+-- Run this on your database server, then run: python backfill_phone_normalized.py
+
+ALTER TABLE contacts
+ADD COLUMN IF NOT EXISTS phone_normalized VARCHAR(20);
+
+ALTER TABLE calls
+ADD COLUMN IF NOT EXISTS phone_normalized VARCHAR(20);
+
+-- Dedupe within a campaign, DNC screening and caller lookups all match on these
+CREATE INDEX IF NOT EXISTS idx_contacts_campaign_phone_normalized ON contacts(campaign_id, phone_normalized);
+CREATE INDEX IF NOT EXISTS ix_contacts_phone_normalized ON contacts(phone_normalized);
+CREATE INDEX IF NOT EXISTS ix_calls_phone_normalized ON calls(phone_normalized);
+
+-- Prefix searches (contact list and call history phone_prefix) match phone_normalized with LIKE
+CREATE INDEX IF NOT EXISTS idx_contacts_phone_normalized_pattern ON contacts(phone_normalized varchar_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_calls_phone_normalized_pattern ON calls(phone_normalized varchar_pattern_ops);
@@ -0,0 +1,49 @@
+-- Hours of call_rollups_hourly to re-aggregate because their calls changed after the
+-- hour closed (e.g. a late CDR or disposition for a call more than
+-- REPORT_ROLLUP_LOOKBACK_HOURS old)
+-- Run this on your database server after create_call_rollups_hourly.sql. If you
+-- partition calls, run it after partition_calls_by_month.sql: the trigger is created
+-- on whichever table is called calls at the time.
+--
+-- The trigger marks the hour of every inserted, updated or deleted call that started
+-- before the previous hour (later hours are always re-aggregated anyway, since
+-- REPORT_ROLLUP_LOOKBACK_HOURS is at least 1). The API's rollup job re-aggregates
+-- marked hours and stamps rolled_up_at, which is how every worker learns to drop its
+-- cached copy of that day; stamped rows are purged after a day.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS call_rollup_dirty_hours (
+    bucket_start TIMESTAMP WITH TIME ZONE PRIMARY KEY,
+    marked_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    rolled_up_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_call_rollup_dirty_hours_pending
+    ON call_rollup_dirty_hours(bucket_start) WHERE rolled_up_at IS NULL;
+
+CREATE OR REPLACE FUNCTION calls_mark_rollup_dirty() RETURNS trigger AS $$
+DECLARE
+    closed_before TIMESTAMP WITH TIME ZONE := date_trunc('hour', now()) - interval '1 hour';
+    started TIMESTAMP WITH TIME ZONE;
+BEGIN
+    FOREACH started IN ARRAY ARRAY[
+        CASE WHEN TG_OP <> 'INSERT' THEN OLD.start_time END,
+        CASE WHEN TG_OP <> 'DELETE' THEN NEW.start_time END
+    ] LOOP
+        IF started IS NOT NULL AND started < closed_before THEN
+            INSERT INTO call_rollup_dirty_hours (bucket_start)
+            VALUES (date_trunc('hour', started AT TIME ZONE 'UTC') AT TIME ZONE 'UTC')
+            ON CONFLICT (bucket_start) DO UPDATE
+                SET marked_at = CURRENT_TIMESTAMP, rolled_up_at = NULL;
+        END IF;
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS calls_mark_rollup_dirty ON calls;
+CREATE TRIGGER calls_mark_rollup_dirty AFTER INSERT OR UPDATE OR DELETE ON calls
+FOR EACH ROW EXECUTE FUNCTION calls_mark_rollup_dirty();
+
+COMMIT;
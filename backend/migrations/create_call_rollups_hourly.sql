@@ -0,0 +1,22 @@
+-- Hourly call rollups for the reporting API (/api/reports/timeseries)
+-- Run this on your database server, then run: python rebuild_call_rollups.py 90
+
+CREATE TABLE IF NOT EXISTS call_rollups_hourly (
+    id SERIAL PRIMARY KEY,
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    agent_id INTEGER REFERENCES agents(id) ON DELETE CASCADE,
+    campaign_id INTEGER REFERENCES campaigns(id) ON DELETE CASCADE,
+    disposition VARCHAR(50),
+    total_calls INTEGER DEFAULT 0,
+    inbound_calls INTEGER DEFAULT 0,
+    outbound_calls INTEGER DEFAULT 0,
+    answered_calls INTEGER DEFAULT 0,
+    missed_calls INTEGER DEFAULT 0,
+    total_talk_time INTEGER DEFAULT 0,
+    total_duration INTEGER DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_call_rollups_hourly_bucket_start ON call_rollups_hourly(bucket_start);
+CREATE INDEX IF NOT EXISTS idx_call_rollups_hourly_agent_bucket ON call_rollups_hourly(agent_id, bucket_start);
+CREATE INDEX IF NOT EXISTS idx_call_rollups_hourly_campaign_bucket ON call_rollups_hourly(campaign_id, bucket_start);
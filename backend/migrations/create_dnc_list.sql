@@ -0,0 +1,25 @@
+-- Create the dnc_list table used by the DNC screening index
+-- Run this on your database server (already included in database_complete.sql)
+
+CREATE TABLE IF NOT EXISTS dnc_list (
+    id SERIAL PRIMARY KEY,
+    phone_number VARCHAR(50) UNIQUE NOT NULL,
+    reason VARCHAR(255),
+    source VARCHAR(100) DEFAULT 'manual',
+    added_by INTEGER REFERENCES agents(id),
+    notes TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE
+);
+
+-- phone_number is stored as normalized digits; the UNIQUE constraint doubles as its index
+CREATE INDEX IF NOT EXISTS idx_dnc_created_at ON dnc_list(created_at);
+
+-- Existing entries entered by hand may contain formatting; normalize them to digits
+UPDATE dnc_list
+SET phone_number = regexp_replace(regexp_replace(phone_number, '\.0$', ''), '\D', '', 'g')
+WHERE phone_number ~ '\D'
+  AND NOT EXISTS (
+      SELECT 1 FROM dnc_list d2
+      WHERE d2.phone_number = regexp_replace(regexp_replace(dnc_list.phone_number, '\.0$', ''), '\D', '', 'g')
+  );
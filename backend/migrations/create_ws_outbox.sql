@@ -0,0 +1,11 @@
+-- Overflow storage for WebSocket pub/sub events larger than a NOTIFY payload (8000 bytes)
+-- Run this on your database server before running more than one API worker
+-- Rows are only needed for a moment; publishers delete rows older than 5 minutes
+
+CREATE UNLOGGED TABLE IF NOT EXISTS ws_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    payload TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_ws_outbox_created_at ON ws_outbox(created_at);
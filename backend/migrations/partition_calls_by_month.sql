@@ -0,0 +1,142 @@
+-- Partition calls by month on start_time (see app/services/call_partitions.py)
+-- Run this on your database server during a maintenance window (it rewrites calls),
+-- then schedule: python archive_calls.py
+--
+-- PostgreSQL requires the partition key in every unique constraint, so:
+--   * the primary key becomes (id, start_time); ids still come from calls_id_seq
+--   * call_unique_id keeps its index but is no longer enforced unique
+--   * foreign keys from other tables to calls(id) are dropped for good (a partitioned
+--     calls can only be referenced by (id, start_time)). The calls_delete_children
+--     trigger takes over their ON DELETE behaviour: deleting a call deletes its
+--     call_recordings/call_quality_metrics/call_notes rows and clears
+--     voicemail_messages.call_id. Dropping a partition fires no triggers, so
+--     archive_calls.py does the same itself before it drops one. Inserts into those
+--     tables are no longer checked against calls.
+--   * views over calls (v_daily_call_stats, v_campaign_performance) are dropped and
+--     recreated on the partitioned table; grants on them have to be re-applied
+
+BEGIN;
+
+LOCK TABLE calls IN ACCESS EXCLUSIVE MODE;
+
+-- Drop foreign keys that reference calls
+DO $$
+DECLARE fk record;
+BEGIN
+    FOR fk IN
+        SELECT conrelid::regclass AS tbl, conname FROM pg_constraint
+        WHERE confrelid = 'calls'::regclass AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', fk.tbl, fk.conname);
+    END LOOP;
+END $$;
+
+-- Remember and drop the views that read calls (they would follow the rename and
+-- block dropping the old table)
+CREATE TEMP TABLE calls_view_defs ON COMMIT DROP AS
+SELECT DISTINCT v.oid, v.oid::regclass::text AS viewname, rtrim(pg_get_viewdef(v.oid), ';') AS viewdef
+FROM pg_depend d
+JOIN pg_rewrite r ON r.oid = d.objid
+JOIN pg_class v ON v.oid = r.ev_class
+WHERE d.refobjid = 'calls'::regclass AND v.oid <> 'calls'::regclass AND v.relkind = 'v';
+
+DO $$
+DECLARE def record;
+BEGIN
+    FOR def IN SELECT viewname FROM calls_view_defs LOOP
+        EXECUTE format('DROP VIEW %s', def.viewname);
+    END LOOP;
+END $$;
+
+ALTER TABLE calls RENAME TO calls_unpartitioned;
+ALTER SEQUENCE calls_id_seq OWNED BY NONE;
+UPDATE calls_unpartitioned SET start_time = COALESCE(created_at, NOW()) WHERE start_time IS NULL;
+
+-- Remember the indexes and outgoing foreign keys before the old table goes away
+CREATE TEMP TABLE calls_index_defs ON COMMIT DROP AS
+SELECT indexname,
+       regexp_replace(
+           replace(indexdef, 'CREATE UNIQUE INDEX', 'CREATE INDEX'),
+           ' ON (\S+\.)?calls_unpartitioned ', ' ON calls '
+       ) AS indexdef
+FROM pg_indexes
+WHERE tablename = 'calls_unpartitioned'
+  AND indexname NOT IN (
+      SELECT conname FROM pg_constraint
+      WHERE conrelid = 'calls_unpartitioned'::regclass AND contype = 'p'
+  );
+
+CREATE TEMP TABLE calls_fk_defs ON COMMIT DROP AS
+SELECT conname, pg_get_constraintdef(oid) AS condef FROM pg_constraint
+WHERE conrelid = 'calls_unpartitioned'::regclass AND contype = 'f';
+
+CREATE TABLE calls (LIKE calls_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+PARTITION BY RANGE (start_time);
+ALTER TABLE calls ALTER COLUMN start_time SET NOT NULL;
+ALTER TABLE calls ADD PRIMARY KEY (id, start_time);
+ALTER SEQUENCE calls_id_seq OWNED BY calls.id;
+
+-- One partition per month of existing data through 3 months ahead, plus a default
+DO $$
+DECLARE
+    month DATE;
+    last_month DATE := date_trunc('month', NOW() + INTERVAL '3 months')::date;
+BEGIN
+    SELECT COALESCE(date_trunc('month', MIN(start_time AT TIME ZONE 'UTC'))::date, date_trunc('month', NOW())::date)
+    INTO month FROM calls_unpartitioned;
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF calls FOR VALUES FROM (%L) TO (%L)',
+            'calls_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+            month::text || ' 00:00:00+00',
+            (month + INTERVAL '1 month')::date::text || ' 00:00:00+00'
+        );
+        month := (month + INTERVAL '1 month')::date;
+    END LOOP;
+END $$;
+
+CREATE TABLE calls_default PARTITION OF calls DEFAULT;
+
+INSERT INTO calls SELECT * FROM calls_unpartitioned;
+DROP TABLE calls_unpartitioned;
+
+-- Recreate indexes (after the copy, so it is a single bulk build) and foreign keys
+DO $$
+DECLARE def record;
+BEGIN
+    FOR def IN SELECT indexdef FROM calls_index_defs LOOP
+        EXECUTE def.indexdef;
+    END LOOP;
+    FOR def IN SELECT conname, condef FROM calls_fk_defs LOOP
+        EXECUTE format('ALTER TABLE calls ADD CONSTRAINT %I %s', def.conname, def.condef);
+    END LOOP;
+    FOR def IN SELECT viewname, viewdef FROM calls_view_defs ORDER BY oid LOOP
+        EXECUTE format('CREATE VIEW %s AS %s', def.viewname, def.viewdef);
+    END LOOP;
+END $$;
+
+-- Replaces the dropped foreign keys' ON DELETE behaviour (see the header)
+CREATE OR REPLACE FUNCTION calls_delete_children() RETURNS trigger AS $$
+BEGIN
+    IF to_regclass('call_recordings') IS NOT NULL THEN
+        DELETE FROM call_recordings WHERE call_id = OLD.id;
+    END IF;
+    IF to_regclass('call_quality_metrics') IS NOT NULL THEN
+        DELETE FROM call_quality_metrics WHERE call_id = OLD.id;
+    END IF;
+    IF to_regclass('call_notes') IS NOT NULL THEN
+        DELETE FROM call_notes WHERE call_id = OLD.id;
+    END IF;
+    IF to_regclass('voicemail_messages') IS NOT NULL THEN
+        UPDATE voicemail_messages SET call_id = NULL WHERE call_id = OLD.id;
+    END IF;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER calls_delete_children AFTER DELETE ON calls
+FOR EACH ROW EXECUTE FUNCTION calls_delete_children();
+
+COMMIT;
+
+ANALYZE calls;
@@ -0,0 +1,40 @@
+"""
+Rebuild per-agent daily counters (agent_performance) from the calls table
+Run: python rebuild_agent_stats.py [days]   (default: today only)
+
+Use after deploying the counters, or to repair a range after a backfill.
+Each day is rebuilt in its own transaction.
+"""
+import sys
+from datetime import datetime, timezone, timedelta
+from app.core.database import SessionLocal
+from app.services.agent_stats import agent_stats
+
+
+def rebuild(days: int):
+    today = datetime.now(timezone.utc).date()
+    db = SessionLocal()
+    try:
+        for offset in range(days - 1, -1, -1):
+            day = today - timedelta(days=offset)
+            written = agent_stats.rebuild(db, day, day)
+            print(f"  {day}: {written} agent rows")
+    except Exception as e:
+        print(f"Error rebuilding agent stats: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    
+    print("=" * 50)
+    print("AK Dialer - Rebuild Agent Stats")
+    print("=" * 50)
+    
+    rebuild(days)
+    
+    print("=" * 50)
+    print(f"[OK] Rebuilt {days} day(s) of agent stats")
+    print("=" * 50)
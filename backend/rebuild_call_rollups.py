@@ -0,0 +1,41 @@
+"""
+Rebuild the hourly reporting rollups (call_rollups_hourly) from the calls table
+Run: python rebuild_call_rollups.py [days]   (default: 90)
+
+Use after creating the table, or to repair a range after a backfill. The API keeps
+only the last few hours current, so older days are filled in here, one day per
+transaction. Restart the API afterwards so it drops cached closed days.
+"""
+import sys
+from datetime import datetime, timezone, timedelta
+from app.core.database import SessionLocal
+from app.services.report_rollup import report_rollup, day_start
+
+
+def rebuild(days: int):
+    today = datetime.now(timezone.utc).date()
+    db = SessionLocal()
+    try:
+        for offset in range(days - 1, -1, -1):
+            day = today - timedelta(days=offset)
+            written = report_rollup.rollup(db, day_start(day), day_start(day + timedelta(days=1)))
+            print(f"  {day}: {written} rollup rows")
+    except Exception as e:
+        print(f"Error rebuilding call rollups: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 90
+    
+    print("=" * 50)
+    print("AK Dialer - Rebuild Call Rollups")
+    print("=" * 50)
+    
+    rebuild(days)
+    
+    print("=" * 50)
+    print(f"[OK] Rebuilt {days} day(s) of call rollups")
+    print("=" * 50)
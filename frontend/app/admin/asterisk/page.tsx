@@ -114,7 +114,7 @@ export default function AsteriskConfigPage() {
   const handleReload = async (module?: string) => {
     try {
       await asteriskAPI.reload(module)
-      alert(`${module || 'Asterisk'} reloaded successfully!`)
+      alert(`${module || 'Asterisk'} reload scheduled`)
       loadData()
     } catch (error: any) {
       alert(`Error: ${error.response?.data?.detail || error.message}`)
@@ -6,7 +6,8 @@ import DashboardLayout from '@/components/shared/DashboardLayout'
 import AgentAddEditModal from '@/components/shared/AgentAddEditModal'
 import CampaignAddEditModal from '@/components/shared/CampaignAddEditModal'
 import { adminAPI } from '@/lib/api'
-import type { AgentStats, AdminSummaryStats, Agent, Campaign } from '@/lib/api'
+import { wsManager } from '@/lib/websocket'
+import type { AgentStats, AdminSummaryStats, Agent, Campaign, WallboardAgent, WallboardCall, WallboardCounters, WallboardSnapshot, WallboardDelta } from '@/lib/api'
 
 export default function AdminPage() {
 	const router = useRouter()
@@ -24,6 +25,7 @@ export default function AdminPage() {
 	const [showCampaignModal, setShowCampaignModal] = useState(false)
 	const [editingCampaign, setEditingCampaign] = useState<Campaign | null>(null)
 	const [campaignSearchQuery, setCampaignSearchQuery] = useState('')
+	const [liveCalls, setLiveCalls] = useState<Record<string, WallboardCall>>({})
 
 	useEffect(() => {
 		const checkAdminAuth = async () => {
@@ -63,6 +65,69 @@ export default function AdminPage() {
 		return () => clearInterval(interval)
 	}, [router])
 
+	// Live floor state: one snapshot, then only what changed
+	useEffect(() => {
+		if (!isAdmin) return
+		const token = localStorage.getItem('access_token')
+		if (!token) return
+
+		const applyCounters = (counters: Partial<WallboardCounters>) => {
+			setSummaryStats((prev) => prev ? {
+				...prev,
+				...(counters.total_agents !== undefined && { total_agents: counters.total_agents }),
+				...(counters.active_agents !== undefined && { active_agents: counters.active_agents }),
+				...(counters.total_calls !== undefined && { total_calls: counters.total_calls }),
+				...(counters.total_inbound_calls !== undefined && { total_inbound_calls: counters.total_inbound_calls }),
+				...(counters.total_outbound_calls !== undefined && { total_outbound_calls: counters.total_outbound_calls }),
+				...(counters.total_abandoned_calls !== undefined && { total_abandoned_calls: counters.total_abandoned_calls }),
+				...(counters.overall_answer_rate !== undefined && { overall_answer_rate: counters.overall_answer_rate }),
+			} : prev)
+		}
+
+		const applyAgents = (updates: WallboardAgent[]) => {
+			const byId = new Map(updates.map((agent) => [agent.id, agent]))
+			setAgents((prev) => prev.map((agent) => {
+				const update = byId.get(agent.id)
+				return update ? { ...agent, status: update.status, full_name: update.full_name, phone_extension: update.phone_extension } : agent
+			}))
+		}
+
+		const handleWallboardSnapshot = (data: WallboardSnapshot) => {
+			setLiveCalls(Object.fromEntries(data.calls.map((call) => [String(call.id), call])))
+			applyAgents(data.agents)
+			applyCounters(data.counters)
+		}
+
+		const handleWallboardDelta = (data: WallboardDelta) => {
+			if (data.calls) {
+				setLiveCalls((prev) => {
+					const next = { ...prev }
+					Object.entries(data.calls!).forEach(([id, call]) => {
+						if (call) {
+							next[id] = call
+						} else {
+							delete next[id]
+						}
+					})
+					return next
+				})
+			}
+			if (data.agents) applyAgents(data.agents)
+			if (data.counters) applyCounters(data.counters)
+		}
+
+		wsManager.connect(token)
+		wsManager.on('wallboard_snapshot', handleWallboardSnapshot)
+		wsManager.on('wallboard_delta', handleWallboardDelta)
+		wsManager.subscribe('wallboard')
+
+		return () => {
+			wsManager.unsubscribe('wallboard')
+			wsManager.off('wallboard_snapshot', handleWallboardSnapshot)
+			wsManager.off('wallboard_delta', handleWallboardDelta)
+		}
+	}, [isAdmin])
+
 	const loadAgents = async () => {
 		try {
 			const agentsData = await adminAPI.listAgents()
@@ -154,6 +219,11 @@ export default function AdminPage() {
 		)
 	})
 
+	const agentName = (agentId: number | null) => {
+		const agent = agents.find((a) => a.id === agentId)
+		return agent ? agent.full_name || agent.username : '-'
+	}
+
 	const formatDateTime = (date: Date) => {
 		return date.toLocaleString('en-US', {
 			year: 'numeric',
@@ -306,6 +376,57 @@ export default function AdminPage() {
 								</div>
 							</div>
 						</div>
+
+						{/* Live Calls */}
+						<div className="bg-white dark:bg-slate-800 border border-slate-200 dark:border-slate-700 rounded-lg shadow-card">
+							<div className="p-6">
+								<h2 className="text-xl font-bold text-slate-900 dark:text-slate-100 mb-4">
+									Live Calls ({Object.keys(liveCalls).length})
+								</h2>
+								<div className="overflow-x-auto">
+									<table className="w-full">
+										<thead>
+											<tr className="border-b border-slate-200 dark:border-slate-700">
+												<th className="text-left py-3 px-4 font-semibold text-slate-700 dark:text-slate-300">Agent</th>
+												<th className="text-left py-3 px-4 font-semibold text-slate-700 dark:text-slate-300">Phone</th>
+												<th className="text-left py-3 px-4 font-semibold text-slate-700 dark:text-slate-300">Direction</th>
+												<th className="text-left py-3 px-4 font-semibold text-slate-700 dark:text-slate-300">Status</th>
+												<th className="text-left py-3 px-4 font-semibold text-slate-700 dark:text-slate-300">Started</th>
+											</tr>
+										</thead>
+										<tbody>
+											{Object.keys(liveCalls).length === 0 ? (
+												<tr>
+													<td colSpan={5} className="text-center py-8 text-slate-500 dark:text-slate-400">
+														No calls in progress
+													</td>
+												</tr>
+											) : (
+												Object.values(liveCalls).map((call) => (
+													<tr key={call.id} className="border-b border-slate-100 dark:border-slate-700 hover:bg-slate-50 dark:hover:bg-slate-700/50">
+														<td className="py-3 px-4 text-slate-900 dark:text-slate-100">{agentName(call.agent_id)}</td>
+														<td className="py-3 px-4 text-slate-900 dark:text-slate-100">{call.phone_number}</td>
+														<td className="py-3 px-4 text-slate-900 dark:text-slate-100">{call.direction}</td>
+														<td className="py-3 px-4">
+															<span className={`px-2 py-1 rounded text-xs font-medium ${
+																call.status === 'connected' || call.status === 'answered'
+																	? 'bg-green-100 dark:bg-green-900/30 text-green-800 dark:text-green-300'
+																	: 'bg-blue-100 dark:bg-blue-900/30 text-blue-800 dark:text-blue-300'
+															}`}>
+																{call.status}
+															</span>
+														</td>
+														<td className="py-3 px-4 text-slate-900 dark:text-slate-100">
+															{call.start_time ? formatDateTime(new Date(call.start_time)) : '-'}
+														</td>
+													</tr>
+												))
+											)}
+										</tbody>
+									</table>
+								</div>
+							</div>
+						</div>
 					</div>
 				)}
 
@@ -1,19 +1,30 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useRouter } from 'next/navigation'
 import DashboardLayout from '@/components/shared/DashboardLayout'
 import ContactAddModal from '@/components/shared/ContactAddModal'
 import { contactsAPI, campaignsAPI } from '@/lib/api'
-import type { Contact, Campaign } from '@/lib/api'
+import type { Contact, Campaign, ContactListParams } from '@/lib/api'
+
+const CONTACT_STATUSES = ['new', 'contacted', 'not_answered', 'busy', 'failed', 'do_not_call']
 
 export default function ContactsPage() {
   const router = useRouter()
   const [loading, setLoading] = useState(true)
   const [contacts, setContacts] = useState<Contact[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [estimatedTotal, setEstimatedTotal] = useState<number | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [campaigns, setCampaigns] = useState<Campaign[]>([])
   const [selectedCampaign, setSelectedCampaign] = useState<string>('all')
   const [searchTerm, setSearchTerm] = useState('')
+  const [cityTerm, setCityTerm] = useState('')
+  const [searchQuery, setSearchQuery] = useState('')
+  const [cityQuery, setCityQuery] = useState('')
+  const [statusFilter, setStatusFilter] = useState<string>('all')
+  const [dialedFilter, setDialedFilter] = useState<string>('all')
+  const loadSeq = useRef(0)
   const [showAddModal, setShowAddModal] = useState(false)
   const [showImportModal, setShowImportModal] = useState(false)
   const [importing, setImporting] = useState(false)
@@ -55,23 +66,69 @@ export default function ContactsPage() {
     setIsAdmin(agentData.is_admin === true || agentData.is_admin === 1)
   }, [])
 
-  const loadContacts = async () => {
+  const contactFilters = (): ContactListParams => {
+    const params: ContactListParams = {}
+    if (selectedCampaign !== 'all') params.campaign_id = parseInt(selectedCampaign)
+    if (statusFilter !== 'all') params.status = statusFilter
+    if (dialedFilter !== 'all') params.dialed = dialedFilter === 'dialed'
+    if (cityQuery) params.city = cityQuery
+    if (searchQuery) {
+      // Numbers are matched by normalized prefix on the server, anything else by name
+      if (/^[\d\s+()-]+$/.test(searchQuery)) {
+        params.phone_prefix = searchQuery
+      } else {
+        params.name = searchQuery
+      }
+    }
+    return params
+  }
+
+  const loadContacts = async (cursor?: string) => {
+    // Ignore responses to requests made before the filters last changed
+    const seq = cursor ? loadSeq.current : ++loadSeq.current
     try {
-      const campaignId = selectedCampaign === 'all' ? undefined : parseInt(selectedCampaign)
-      const data = await contactsAPI.list(campaignId)
-      setContacts(data)
+      const page = await contactsAPI.list({ ...contactFilters(), cursor })
+      if (seq !== loadSeq.current) return
+      setContacts(prev => (cursor ? [...prev, ...page.items] : page.items))
+      setNextCursor(page.has_more ? page.next_cursor || null : null)
+      if (!cursor) {
+        setEstimatedTotal(page.estimated_total ?? null)
+      }
     } catch (error) {
       console.error('Error loading contacts:', error)
-      setContacts([])
+      if (!cursor && seq === loadSeq.current) {
+        setContacts([])
+        setNextCursor(null)
+      }
+    }
+  }
+
+  const loadMoreContacts = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      await loadContacts(nextCursor)
+    } finally {
+      setLoadingMore(false)
     }
   }
 
+  // Typed filters go to the server once typing pauses
+  useEffect(() => {
+    const timeout = setTimeout(() => {
+      setSearchQuery(searchTerm.trim())
+      setCityQuery(cityTerm.trim())
+    }, 300)
+    return () => clearTimeout(timeout)
+  }, [searchTerm, cityTerm])
+
+  // Any filter change starts again from the first page
   useEffect(() => {
     if (!loading) {
       loadContacts()
     }
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [selectedCampaign, loading])
+  }, [selectedCampaign, statusFilter, dialedFilter, searchQuery, cityQuery, loading])
 
   const formatDateTime = (date: Date) => {
     return date.toLocaleString('en-US', {
@@ -85,15 +142,6 @@ export default function ContactsPage() {
     })
   }
 
-  const filteredContacts = contacts.filter(contact => {
-    const matchesSearch = !searchTerm || 
-      contact.name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      contact.phone?.includes(searchTerm)
-    const matchesCampaign = selectedCampaign === 'all' || 
-      contact.campaign_id?.toString() === selectedCampaign
-    return matchesSearch && matchesCampaign
-  })
-
   if (loading) {
     return (
       <div className="min-h-screen flex items-center justify-center bg-slate-50 dark:bg-slate-900">
@@ -215,7 +263,7 @@ export default function ContactsPage() {
 
         {/* Filters */}
         <div className="bg-white dark:bg-slate-800 border border-slate-200 dark:border-slate-700 rounded-lg p-4 shadow-card">
-          <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
+          <div className="grid grid-cols-1 md:grid-cols-3 lg:grid-cols-5 gap-4">
             <div>
               <label className="block text-sm font-medium text-slate-700 dark:text-slate-300 mb-2">
                 Search
@@ -245,6 +293,49 @@ export default function ContactsPage() {
                 ))}
               </select>
             </div>
+            <div>
+              <label className="block text-sm font-medium text-slate-700 dark:text-slate-300 mb-2">
+                Status
+              </label>
+              <select
+                value={statusFilter}
+                onChange={(e) => setStatusFilter(e.target.value)}
+                className="w-full px-3 py-2 border border-slate-300 dark:border-slate-600 bg-white dark:bg-slate-700 text-slate-900 dark:text-slate-100 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+              >
+                <option value="all">All Statuses</option>
+                {CONTACT_STATUSES.map((contactStatus) => (
+                  <option key={contactStatus} value={contactStatus}>
+                    {contactStatus.replace(/_/g, ' ')}
+                  </option>
+                ))}
+              </select>
+            </div>
+            <div>
+              <label className="block text-sm font-medium text-slate-700 dark:text-slate-300 mb-2">
+                City
+              </label>
+              <input
+                type="text"
+                value={cityTerm}
+                onChange={(e) => setCityTerm(e.target.value)}
+                placeholder="Exact city..."
+                className="w-full px-3 py-2 border border-slate-300 dark:border-slate-600 bg-white dark:bg-slate-700 text-slate-900 dark:text-slate-100 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+              />
+            </div>
+            <div>
+              <label className="block text-sm font-medium text-slate-700 dark:text-slate-300 mb-2">
+                Dialed
+              </label>
+              <select
+                value={dialedFilter}
+                onChange={(e) => setDialedFilter(e.target.value)}
+                className="w-full px-3 py-2 border border-slate-300 dark:border-slate-600 bg-white dark:bg-slate-700 text-slate-900 dark:text-slate-100 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+              >
+                <option value="all">All</option>
+                <option value="dialed">Dialed</option>
+                <option value="never">Never dialed</option>
+              </select>
+            </div>
           </div>
         </div>
 
@@ -264,14 +355,14 @@ export default function ContactsPage() {
                   </tr>
                 </thead>
                 <tbody>
-                  {filteredContacts.length === 0 ? (
+                  {contacts.length === 0 ? (
                     <tr>
                       <td colSpan={6} className="text-center py-8 text-slate-500 dark:text-slate-400">
                         No contacts found
                       </td>
                     </tr>
                   ) : (
-                    filteredContacts.map((contact) => (
+                    contacts.map((contact) => (
                       <tr key={contact.id} className="border-b border-slate-100 dark:border-slate-700 hover:bg-slate-50 dark:hover:bg-slate-700/50">
                         <td className="py-3 px-4 text-slate-900 dark:text-slate-100">{contact.name || '-'}</td>
                         <td className="py-3 px-4 text-slate-900 dark:text-slate-100">{contact.phone}</td>
@@ -302,6 +393,21 @@ export default function ContactsPage() {
                 </tbody>
               </table>
             </div>
+            <div className="flex items-center justify-between mt-4 text-sm text-slate-500 dark:text-slate-400">
+              <span>
+                Showing {contacts.length}
+                {estimatedTotal !== null && ` of ~${estimatedTotal}`} contacts
+              </span>
+              {nextCursor && (
+                <button
+                  onClick={loadMoreContacts}
+                  disabled={loadingMore}
+                  className="px-4 py-2 bg-slate-100 dark:bg-slate-700 hover:bg-slate-200 dark:hover:bg-slate-600 text-slate-800 dark:text-slate-200 rounded-md font-semibold disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              )}
+            </div>
           </div>
         </div>
       </div>
@@ -29,6 +29,14 @@ export default function DialerPage() {
   const [dialedContacts, setDialedContacts] = useState<Contact[]>([])
   const [autoDialEnabled, setAutoDialEnabled] = useState(false)
 
+  // Progressive and predictive campaigns are dialed by the server; dialing from here as well would double-dial
+  const sessionCampaign = campaigns.find((campaign) => campaign.id === sessionInfo?.campaign_id)
+  const serverDialing = ['progressive', 'predictive'].includes(sessionCampaign?.dial_method ?? '')
+
+  useEffect(() => {
+    if (serverDialing) setAutoDialEnabled(false)
+  }, [serverDialing])
+
   // Helper function to check if a call is active
   const isCallActive = (call: Call | null): boolean => {
     if (!call) return false
@@ -84,6 +92,8 @@ export default function DialerPage() {
         if (token) {
           try {
             wsManager.connect(token)
+            wsManager.on('snapshot', handleSnapshot)
+            wsManager.on('call_state', handleCallState)
             wsManager.on('call_update', handleCallUpdate)
             wsManager.on('incoming_call', handleIncomingCall)
             wsManager.on('stats_update', handleStatsUpdate)
@@ -93,7 +103,7 @@ export default function DialerPage() {
           }
         }
 
-        // Update current time every second
+        // Update current time every second (local clock only, no requests)
         const timeInterval = setInterval(() => {
           setCurrentTime(new Date())
         }, 1000)
@@ -104,21 +114,13 @@ export default function DialerPage() {
         // Load dialed contacts
         loadDialedContacts().catch(console.error)
 
-        // Refresh current call periodically (every 2 seconds)
-        // This ensures we catch any status changes even if WebSocket misses them
-        const callInterval = setInterval(() => {
-          loadCurrentCall().catch(console.error)
-        }, 2000)
-
-        // Refresh stats periodically
-        const statsInterval = setInterval(() => {
-          loadStats().catch(console.error)
-        }, 30000)
+        // No polling: call state and stats changes are pushed over the WebSocket,
+        // and a full snapshot is sent on every (re)connect
 
         return () => {
           clearInterval(timeInterval)
-          clearInterval(callInterval)
-          clearInterval(statsInterval)
+          wsManager.off('snapshot', handleSnapshot)
+          wsManager.off('call_state', handleCallState)
           wsManager.off('call_update', handleCallUpdate)
           wsManager.off('incoming_call', handleIncomingCall)
           wsManager.off('stats_update', handleStatsUpdate)
@@ -139,27 +141,6 @@ export default function DialerPage() {
     initializeDashboard()
   }, [router])
 
-  // Safety check: Clear ended calls periodically
-  useEffect(() => {
-    if (!currentCall) return
-
-    const checkCallStatus = () => {
-      // Use the helper function to check if call is still active
-      if (!isCallActive(currentCall)) {
-        setCurrentCall(null)
-        loadStats() // Refresh stats when call ends
-      }
-    }
-
-    // Check immediately
-    checkCallStatus()
-
-    // Check every second
-    const interval = setInterval(checkCallStatus, 1000)
-    return () => clearInterval(interval)
-    // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [currentCall])
-
   const loadStats = async () => {
     try {
       const data = await statsAPI.getToday()
@@ -218,7 +199,7 @@ export default function DialerPage() {
   const handleAutoDialNext = async (callStatus: string) => {
     // Auto-dial next if call failed and auto-dial is enabled
     const failedStatuses = ['busy', 'no_answer', 'failed']
-    if (autoDialEnabled && failedStatuses.includes(callStatus)) {
+    if (autoDialEnabled && !serverDialing && failedStatuses.includes(callStatus)) {
       try {
         // Small delay before dialing next
         setTimeout(async () => {
@@ -264,8 +245,28 @@ export default function DialerPage() {
     }
   }
 
-  const handleStatsUpdate = (data: any) => {
-    loadStats()
+  const handleSnapshot = (data: any) => {
+    setCurrentCall(data.call && isCallActive(data.call) ? data.call : null)
+    if (data.stats) {
+      setStats(data.stats)
+      setLoading(false)
+    }
+  }
+
+  const handleCallState = (call: Call) => {
+    if (isCallActive(call)) {
+      setCurrentCall(call)
+      return
+    }
+    // Call reached a final state: clear it if it is the one on screen
+    setCurrentCall((previous) => (previous && previous.id !== call.id ? previous : null))
+    loadDialedContacts()
+    handleAutoDialNext(call.status)
+  }
+
+  const handleStatsUpdate = (update: Partial<Stats>) => {
+    // Everything but login_time, which is worked out locally from session_login_time
+    setStats((previous) => (previous ? { ...previous, ...update } : (update as Stats)))
   }
 
   const handleAgentStatus = (data: any) => {
@@ -282,7 +283,7 @@ export default function DialerPage() {
           return
         }
         // Otherwise fetch from history
-        const calls = await callsAPI.getHistory('inbound')
+        const { items: calls } = await callsAPI.getHistory({ filter: 'inbound', limit: 20 })
         const call = calls.find(c => c.id === data.call_id)
         if (call && (call.status === 'ringing' || call.status === 'dialing')) {
           setIncomingCall(call)
@@ -330,6 +331,19 @@ export default function DialerPage() {
     })
   }
 
+  const formatElapsed = (ms: number) => {
+    const totalSeconds = Math.max(0, Math.floor(ms / 1000))
+    const hours = Math.floor(totalSeconds / 3600)
+    const minutes = Math.floor((totalSeconds % 3600) / 60)
+    const seconds = totalSeconds % 60
+    return [hours, minutes, seconds].map((n) => String(n).padStart(2, '0')).join(':')
+  }
+
+  // Login time is not pushed (it changes every second); derive it from the session start
+  const displayStats = stats?.session_login_time
+    ? { ...stats, login_time: formatElapsed(currentTime.getTime() - new Date(stats.session_login_time).getTime()) }
+    : stats
+
   if (loading) {
     return (
       <div className="min-h-screen flex items-center justify-center bg-slate-50 dark:bg-slate-900">
@@ -401,15 +415,17 @@ export default function DialerPage() {
               <div className="flex items-center justify-between mb-6">
                 <h2 className="text-lg font-semibold text-slate-900 dark:text-slate-100">Call Controls</h2>
                 <div className="flex items-center space-x-3">
-                  <label className="flex items-center space-x-2 cursor-pointer">
-                    <input
-                      type="checkbox"
-                      checked={autoDialEnabled}
-                      onChange={(e) => setAutoDialEnabled(e.target.checked)}
-                      className="w-4 h-4 text-blue-600 rounded focus:ring-blue-500"
-                    />
-                    <span className="text-sm text-slate-600 dark:text-slate-400">Auto-Dial</span>
-                  </label>
+                  {!serverDialing && (
+                    <label className="flex items-center space-x-2 cursor-pointer">
+                      <input
+                        type="checkbox"
+                        checked={autoDialEnabled}
+                        onChange={(e) => setAutoDialEnabled(e.target.checked)}
+                        className="w-4 h-4 text-blue-600 rounded focus:ring-blue-500"
+                      />
+                      <span className="text-sm text-slate-600 dark:text-slate-400">Auto-Dial</span>
+                    </label>
+                  )}
                   {currentCall && (
                     <span className="inline-flex items-center px-3 py-1 rounded-full bg-green-100 dark:bg-green-900/30 text-green-800 dark:text-green-300 text-xs font-medium">
                       <span className="w-1.5 h-1.5 bg-green-600 rounded-full animate-pulse mr-2"></span>
@@ -439,7 +455,7 @@ export default function DialerPage() {
                   </svg>
                 </button>
               </div>
-              <StatsDashboard stats={stats} onRefresh={loadStats} />
+              <StatsDashboard stats={displayStats} onRefresh={loadStats} />
             </div>
           </div>
 
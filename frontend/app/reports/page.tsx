@@ -3,8 +3,12 @@
 import { useState, useEffect, useMemo } from 'react'
 import { useRouter } from 'next/navigation'
 import DashboardLayout from '@/components/shared/DashboardLayout'
-import { statsAPI, campaignsAPI, adminAPI } from '@/lib/api'
-import type { Stats, Campaign, AgentStats } from '@/lib/api'
+import { statsAPI, campaignsAPI, adminAPI, reportsAPI } from '@/lib/api'
+import type { Stats, Campaign, AgentStats, TimeseriesPoint } from '@/lib/api'
+
+type DateRange = 'today' | 'week' | 'month' | 'quarter'
+
+const RANGE_DAYS: Record<DateRange, number> = { today: 1, week: 7, month: 30, quarter: 90 }
 
 export default function ReportsPage() {
   const router = useRouter()
@@ -14,7 +18,8 @@ export default function ReportsPage() {
   const [agentsStats, setAgentsStats] = useState<AgentStats[]>([])
   const [campaigns, setCampaigns] = useState<Campaign[]>([])
   const [selectedCampaign, setSelectedCampaign] = useState<string>('all')
-  const [dateRange, setDateRange] = useState<'today' | 'week' | 'month'>('today')
+  const [dateRange, setDateRange] = useState<DateRange>('today')
+  const [trend, setTrend] = useState<TimeseriesPoint[]>([])
   const [currentTime, setCurrentTime] = useState(new Date())
   const [agentSearchQuery, setAgentSearchQuery] = useState('')
 
@@ -49,6 +54,7 @@ export default function ReportsPage() {
     }
 
     loadData()
+    loadTrend(dateRange)
 
     const interval = setInterval(() => {
       setCurrentTime(new Date())
@@ -57,6 +63,22 @@ export default function ReportsPage() {
     return () => clearInterval(interval)
   }, [router, dateRange])
 
+  const loadTrend = async (range: DateRange) => {
+    try {
+      // Served from the hourly rollups: hourly buckets for today, daily otherwise
+      const end = new Date()
+      const start = new Date(end.getTime() - (RANGE_DAYS[range] - 1) * 24 * 60 * 60 * 1000)
+      const data = await reportsAPI.getTimeseries({
+        interval: range === 'today' ? 'hour' : 'day',
+        start: start.toISOString().slice(0, 10),
+        end: end.toISOString().slice(0, 10),
+      })
+      setTrend(data.points)
+    } catch (error) {
+      console.error('Error loading trend:', error)
+    }
+  }
+
   const loadStats = async () => {
     try {
       const data = await statsAPI.getToday()
@@ -90,6 +112,8 @@ export default function ReportsPage() {
     )
   }, [agentsStats, agentSearchQuery])
 
+  const trendPeak = useMemo(() => Math.max(...trend.map((point) => point.total_calls), 1), [trend])
+
   if (loading) {
     return (
       <div className="min-h-screen flex items-center justify-center bg-slate-50 dark:bg-slate-900">
@@ -111,16 +135,20 @@ export default function ReportsPage() {
           <div className="flex items-center space-x-3">
             <select
               value={dateRange}
-              onChange={(e) => setDateRange(e.target.value as 'today' | 'week' | 'month')}
+              onChange={(e) => setDateRange(e.target.value as DateRange)}
               className="px-3 py-2 bg-white dark:bg-slate-700 border border-slate-300 dark:border-slate-600 text-slate-900 dark:text-slate-100 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
             >
               <option value="today">Today</option>
               <option value="week">This Week</option>
               <option value="month">This Month</option>
+              <option value="quarter">Last 90 Days</option>
             </select>
             
             <button
-              onClick={loadStats}
+              onClick={() => {
+                loadStats()
+                loadTrend(dateRange)
+              }}
               className="px-4 py-2 bg-blue-600 hover:bg-blue-700 text-white rounded-md font-semibold"
             >
               Refresh
@@ -189,6 +217,39 @@ export default function ReportsPage() {
           </div>
         )}
 
+        {/* Call Volume Trend */}
+        <div className="bg-white dark:bg-slate-800 border border-slate-200 dark:border-slate-700 rounded-lg p-6 shadow-card">
+          <div className="flex items-center justify-between mb-4">
+            <h2 className="text-xl font-bold text-slate-900 dark:text-slate-100">Call Volume</h2>
+            <span className="text-sm text-slate-600 dark:text-slate-400">
+              {trend.reduce((sum, point) => sum + point.total_calls, 0)} calls
+            </span>
+          </div>
+          {trend.length === 0 ? (
+            <div className="text-center py-8 text-slate-500 dark:text-slate-400">No calls in this period</div>
+          ) : (
+            <div className="flex items-end h-40 space-x-1">
+              {trend.map((point) => {
+                const label = dateRange === 'today'
+                  ? new Date(point.bucket).toLocaleTimeString('en-US', { hour: '2-digit', hour12: false })
+                  : new Date(point.bucket).toLocaleDateString('en-US', { month: 'short', day: 'numeric' })
+                return (
+                  <div
+                    key={point.bucket}
+                    className="flex-1 flex flex-col justify-end h-full"
+                    title={`${label}: ${point.total_calls} calls, ${point.answered_calls} answered, ${point.missed_calls} missed`}
+                  >
+                    <div
+                      className="bg-blue-600 rounded-t"
+                      style={{ height: `${(point.total_calls / trendPeak) * 100}%` }}
+                    ></div>
+                  </div>
+                )
+              })}
+            </div>
+          )}
+        </div>
+
         {!isAdmin && (
           <>
             {/* Performance Metrics */}
@@ -7,21 +7,47 @@ import type { Call } from '@/lib/api'
 export default function CallHistory() {
   const [calls, setCalls] = useState<Call[]>([])
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [filter, setFilter] = useState<'all' | 'today' | 'outbound' | 'inbound'>('today')
+  const [phonePrefix, setPhonePrefix] = useState('')
+  const [startDate, setStartDate] = useState('')
+  const [endDate, setEndDate] = useState('')
 
   useEffect(() => {
-    loadCalls()
-  }, [filter])
-
-  const loadCalls = async () => {
     setLoading(true)
+    loadCalls().finally(() => setLoading(false))
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [filter, phonePrefix, startDate, endDate])
+
+  const loadCalls = async (cursor?: string) => {
     try {
-      const data = await callsAPI.getHistory(filter)
-      setCalls(data)
+      const page = await callsAPI.getHistory({
+        filter,
+        phone_prefix: phonePrefix || undefined,
+        start: startDate ? new Date(`${startDate}T00:00:00`).toISOString() : undefined,
+        // End date is inclusive: stop at the start of the following day
+        end: endDate ? new Date(new Date(`${endDate}T00:00:00`).getTime() + 24 * 60 * 60 * 1000).toISOString() : undefined,
+        cursor,
+      })
+      setCalls(prev => (cursor ? [...prev, ...page.items] : page.items))
+      setNextCursor(page.has_more ? page.next_cursor || null : null)
     } catch (error) {
       console.error('Error loading call history:', error)
+      if (!cursor) {
+        setCalls([])
+        setNextCursor(null)
+      }
+    }
+  }
+
+  const loadMoreCalls = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      await loadCalls(nextCursor)
     } finally {
-      setLoading(false)
+      setLoadingMore(false)
     }
   }
 
@@ -74,6 +100,27 @@ export default function CallHistory() {
           </button>
         ))}
       </div>
+      <div className="flex flex-wrap gap-2">
+        <input
+          type="text"
+          placeholder="Number starts with..."
+          value={phonePrefix}
+          onChange={(e) => setPhonePrefix(e.target.value)}
+          className="flex-1 min-w-[10rem] px-3 py-1.5 text-sm border border-slate-300 dark:border-slate-600 bg-white dark:bg-slate-700 text-slate-900 dark:text-slate-100 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+        />
+        <input
+          type="date"
+          value={startDate}
+          onChange={(e) => setStartDate(e.target.value)}
+          className="px-3 py-1.5 text-sm border border-slate-300 dark:border-slate-600 bg-white dark:bg-slate-700 text-slate-900 dark:text-slate-100 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+        />
+        <input
+          type="date"
+          value={endDate}
+          onChange={(e) => setEndDate(e.target.value)}
+          className="px-3 py-1.5 text-sm border border-slate-300 dark:border-slate-600 bg-white dark:bg-slate-700 text-slate-900 dark:text-slate-100 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+        />
+      </div>
 
       {/* Call List */}
       <div className="space-y-2 max-h-96 overflow-y-auto">
@@ -121,6 +168,15 @@ export default function CallHistory() {
             </div>
           ))
         )}
+        {nextCursor && !loading && (
+          <button
+            onClick={loadMoreCalls}
+            disabled={loadingMore}
+            className="w-full px-4 py-2 bg-slate-100 dark:bg-slate-700 hover:bg-slate-200 dark:hover:bg-slate-600 text-slate-800 dark:text-slate-200 rounded-md text-sm font-semibold disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load older calls'}
+          </button>
+        )}
       </div>
     </div>
   )
@@ -18,10 +18,10 @@ export default function IncomingCallModal({ call, onAnswer, onReject }: Incoming
     // Try to find contact by phone number
     const findContact = async () => {
       try {
-        const contacts = await contactsAPI.list()
-        const found = contacts.find(c => c.phone === call.phone_number)
-        if (found) {
-          setContact(found)
+        // Matched on the normalized number, so "+92 300...", "0300..." and "300..." all find the contact
+        const page = await contactsAPI.list({ phone: call.phone_number, limit: 1 })
+        if (page.items.length > 0) {
+          setContact(page.items[0])
         }
       } catch (error) {
         console.error('Error fetching contact:', error)
@@ -17,7 +17,13 @@ export default function CampaignAddEditModal({ campaign, onClose, onSuccess }: C
     code: '',
     description: '',
     status: 'active',
-    dial_method: 'manual'
+    dial_method: 'manual',
+    max_attempts: 3,
+    retry_no_answer_minutes: 60,
+    retry_busy_minutes: 15,
+    retry_failed_minutes: 240,
+    call_window_start: '',
+    call_window_end: ''
   })
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState('')
@@ -29,7 +35,13 @@ export default function CampaignAddEditModal({ campaign, onClose, onSuccess }: C
         code: campaign.code || '',
         description: campaign.description || '',
         status: campaign.status || 'active',
-        dial_method: campaign.dial_method || 'manual'
+        dial_method: campaign.dial_method || 'manual',
+        max_attempts: campaign.max_attempts ?? 3,
+        retry_no_answer_minutes: campaign.retry_no_answer_minutes ?? 60,
+        retry_busy_minutes: campaign.retry_busy_minutes ?? 15,
+        retry_failed_minutes: campaign.retry_failed_minutes ?? 240,
+        call_window_start: campaign.call_window_start || '',
+        call_window_end: campaign.call_window_end || ''
       })
     }
   }, [campaign])
@@ -55,13 +67,23 @@ export default function CampaignAddEditModal({ campaign, onClose, onSuccess }: C
       return
     }
 
+    if (!!formData.call_window_start !== !!formData.call_window_end) {
+      setError('Set both calling window start and end, or leave both empty')
+      return
+    }
+
     setLoading(true)
 
     try {
+      const payload = {
+        ...formData,
+        call_window_start: formData.call_window_start || null,
+        call_window_end: formData.call_window_end || null
+      }
       if (isEditMode && campaign) {
-        await adminAPI.updateCampaign(campaign.id, formData)
+        await adminAPI.updateCampaign(campaign.id, payload)
       } else {
-        await adminAPI.createCampaign(formData)
+        await adminAPI.createCampaign(payload)
       }
       onSuccess()
       onClose()
@@ -172,6 +194,79 @@ export default function CampaignAddEditModal({ campaign, onClose, onSuccess }: C
               </select>
             </div>
 
+            <div>
+              <label className="block text-sm font-medium text-slate-700 dark:text-slate-300 mb-2">
+                Max Dial Attempts
+              </label>
+              <input
+                type="number"
+                min={1}
+                max={50}
+                value={formData.max_attempts}
+                onChange={(e) => setFormData({ ...formData, max_attempts: parseInt(e.target.value) || 1 })}
+                className="w-full px-3 py-2 border border-slate-300 dark:border-slate-600 bg-white dark:bg-slate-700 text-slate-900 dark:text-slate-100 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+              />
+            </div>
+
+            <div>
+              <label className="block text-sm font-medium text-slate-700 dark:text-slate-300 mb-2">
+                Retry After (minutes)
+              </label>
+              <div className="grid grid-cols-3 gap-2">
+                <div>
+                  <span className="block text-xs text-slate-500 dark:text-slate-400 mb-1">No answer</span>
+                  <input
+                    type="number"
+                    min={0}
+                    value={formData.retry_no_answer_minutes}
+                    onChange={(e) => setFormData({ ...formData, retry_no_answer_minutes: parseInt(e.target.value) || 0 })}
+                    className="w-full px-3 py-2 border border-slate-300 dark:border-slate-600 bg-white dark:bg-slate-700 text-slate-900 dark:text-slate-100 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                  />
+                </div>
+                <div>
+                  <span className="block text-xs text-slate-500 dark:text-slate-400 mb-1">Busy</span>
+                  <input
+                    type="number"
+                    min={0}
+                    value={formData.retry_busy_minutes}
+                    onChange={(e) => setFormData({ ...formData, retry_busy_minutes: parseInt(e.target.value) || 0 })}
+                    className="w-full px-3 py-2 border border-slate-300 dark:border-slate-600 bg-white dark:bg-slate-700 text-slate-900 dark:text-slate-100 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                  />
+                </div>
+                <div>
+                  <span className="block text-xs text-slate-500 dark:text-slate-400 mb-1">Failed</span>
+                  <input
+                    type="number"
+                    min={0}
+                    value={formData.retry_failed_minutes}
+                    onChange={(e) => setFormData({ ...formData, retry_failed_minutes: parseInt(e.target.value) || 0 })}
+                    className="w-full px-3 py-2 border border-slate-300 dark:border-slate-600 bg-white dark:bg-slate-700 text-slate-900 dark:text-slate-100 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                  />
+                </div>
+              </div>
+            </div>
+
+            <div>
+              <label className="block text-sm font-medium text-slate-700 dark:text-slate-300 mb-2">
+                Calling Window (optional)
+              </label>
+              <div className="grid grid-cols-2 gap-2">
+                <input
+                  type="time"
+                  value={formData.call_window_start}
+                  onChange={(e) => setFormData({ ...formData, call_window_start: e.target.value })}
+                  className="w-full px-3 py-2 border border-slate-300 dark:border-slate-600 bg-white dark:bg-slate-700 text-slate-900 dark:text-slate-100 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                />
+                <input
+                  type="time"
+                  value={formData.call_window_end}
+                  onChange={(e) => setFormData({ ...formData, call_window_end: e.target.value })}
+                  className="w-full px-3 py-2 border border-slate-300 dark:border-slate-600 bg-white dark:bg-slate-700 text-slate-900 dark:text-slate-100 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                />
+              </div>
+              <p className="text-xs text-slate-500 dark:text-slate-400 mt-1">Retries are only released inside this window</p>
+            </div>
+
             <div className="flex space-x-3 pt-4">
               <button
                 type="button"
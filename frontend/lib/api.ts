@@ -72,6 +72,12 @@ export interface Campaign {
   description?: string
   status: string
   dial_method: string
+  max_attempts?: number
+  retry_no_answer_minutes?: number
+  retry_busy_minutes?: number
+  retry_failed_minutes?: number
+  call_window_start?: string | null
+  call_window_end?: string | null
   created_at: string
 }
 
@@ -114,6 +120,45 @@ export interface Contact {
   status: string
 }
 
+export interface ContactPage {
+  items: Contact[]
+  next_cursor?: string | null
+  has_more: boolean
+  estimated_total?: number | null
+}
+
+export interface CallPage {
+  items: Call[]
+  next_cursor?: string | null
+  has_more: boolean
+  estimated_total?: number | null
+}
+
+export interface CallHistoryParams {
+  filter?: 'all' | 'today' | 'outbound' | 'inbound'
+  start?: string
+  end?: string
+  direction?: 'inbound' | 'outbound'
+  status?: string
+  disposition?: string
+  campaign_id?: number
+  phone_prefix?: string
+  cursor?: string
+  limit?: number
+}
+
+export interface ContactListParams {
+  campaign_id?: number
+  status?: string
+  city?: string
+  phone_prefix?: string
+  phone?: string
+  name?: string
+  dialed?: boolean
+  cursor?: string
+  limit?: number
+}
+
 export interface Stats {
   inbound_calls: number
   outbound_calls: number
@@ -121,6 +166,7 @@ export interface Stats {
   total_calls: number
   break_time: string
   login_time: string
+  session_login_time?: string | null
   session_id?: string
 }
 
@@ -147,6 +193,47 @@ export interface AdminSummaryStats {
   overall_answer_rate: number
 }
 
+// Supervisor wallboard stream (WebSocket topic "wallboard")
+export interface WallboardAgent {
+  id: number
+  username: string
+  full_name?: string
+  phone_extension: string
+  status: string
+  is_admin: number
+}
+
+export interface WallboardCall {
+  id: number
+  agent_id: number | null
+  campaign_id: number | null
+  phone_number: string
+  direction: string
+  status: string
+  start_time: string | null
+  answered_time: string | null
+}
+
+export interface WallboardCounters extends AdminSummaryStats {
+  agents_by_status: Record<string, number>
+  live_calls: number
+  calls_by_status: Record<string, number>
+  answered_calls: number
+  campaigns: Record<string, { live_calls: number; total_calls: number; answered_calls: number }>
+}
+
+export interface WallboardSnapshot {
+  agents: WallboardAgent[]
+  calls: WallboardCall[]
+  counters: WallboardCounters
+}
+
+export interface WallboardDelta {
+  agents?: WallboardAgent[]
+  calls?: Record<string, WallboardCall | null>
+  counters?: Partial<WallboardCounters>
+}
+
 export const authAPI = {
   login: async (data: LoginRequest): Promise<LoginResponse> => {
     const response = await api.post<LoginResponse>('/api/auth/login', data)
@@ -226,10 +313,8 @@ export const callsAPI = {
       return null
     }
   },
-  getHistory: async (filter: 'all' | 'today' | 'outbound' | 'inbound' = 'today'): Promise<Call[]> => {
-    const response = await api.get<Call[]>('/api/calls/history', {
-      params: { filter },
-    })
+  getHistory: async (params: CallHistoryParams = {}): Promise<CallPage> => {
+    const response = await api.get<CallPage>('/api/calls/history', { params })
     return response.data
   },
   updateDisposition: async (call_id: number, disposition: string, notes?: string): Promise<void> => {
@@ -271,9 +356,8 @@ export const callsAPI = {
 }
 
 export const contactsAPI = {
-  list: async (campaign_id?: number): Promise<Contact[]> => {
-    const params = campaign_id ? { campaign_id } : {}
-    const response = await api.get<Contact[]>('/api/contacts/', { params })
+  list: async (params: ContactListParams = {}): Promise<ContactPage> => {
+    const response = await api.get<ContactPage>('/api/contacts/', { params })
     return response.data
   },
   create: async (data: Partial<Contact>): Promise<Contact> => {
@@ -319,6 +403,42 @@ export const statsAPI = {
   },
 }
 
+export interface TimeseriesPoint {
+  bucket: string
+  key: number | string | null
+  total_calls: number
+  inbound_calls: number
+  outbound_calls: number
+  answered_calls: number
+  missed_calls: number
+  total_talk_time: number
+  total_duration: number
+}
+
+export interface TimeseriesResponse {
+  interval: 'hour' | 'day'
+  group_by: string | null
+  start: string
+  end: string
+  points: TimeseriesPoint[]
+}
+
+export interface TimeseriesParams {
+  interval?: 'hour' | 'day'
+  start?: string
+  end?: string
+  group_by?: 'agent' | 'campaign' | 'disposition'
+  agent_id?: number
+  campaign_id?: number
+}
+
+export const reportsAPI = {
+  getTimeseries: async (params: TimeseriesParams = {}): Promise<TimeseriesResponse> => {
+    const response = await api.get<TimeseriesResponse>('/api/reports/timeseries', { params })
+    return response.data
+  },
+}
+
 export const asteriskAPI = {
   getStatus: async (): Promise<{ running: boolean; version?: string }> => {
     const response = await api.get('/api/admin/asterisk/status')
@@ -332,6 +452,13 @@ export const asteriskAPI = {
     const response = await api.post('/api/admin/asterisk/endpoints', endpoint)
     return response.data
   },
+  bulkCreateEndpoints: async (
+    endpoints: { extension: string; password: string; context?: string; callerid?: string; full_name?: string; agent_username?: string; agent_password?: string }[],
+    createAgents: boolean = false
+  ): Promise<any> => {
+    const response = await api.post('/api/admin/asterisk/endpoints/bulk', { endpoints, create_agents: createAgents })
+    return response.data
+  },
   deleteEndpoint: async (extension: string): Promise<any> => {
     const response = await api.delete(`/api/admin/asterisk/endpoints/${extension}`)
     return response.data
@@ -401,6 +528,12 @@ export const adminAPI = {
     description?: string
     status?: string
     dial_method?: string
+    max_attempts?: number
+    retry_no_answer_minutes?: number
+    retry_busy_minutes?: number
+    retry_failed_minutes?: number
+    call_window_start?: string | null
+    call_window_end?: string | null
   }): Promise<Campaign> => {
     const response = await api.post<Campaign>('/api/admin/campaigns', campaignData)
     return response.data
@@ -411,6 +544,12 @@ export const adminAPI = {
     description?: string
     status?: string
     dial_method?: string
+    max_attempts?: number
+    retry_no_answer_minutes?: number
+    retry_busy_minutes?: number
+    retry_failed_minutes?: number
+    call_window_start?: string | null
+    call_window_end?: string | null
   }): Promise<Campaign> => {
     const response = await api.put<Campaign>(`/api/admin/campaigns/${campaignId}`, campaignData)
     return response.data
@@ -1,14 +1,22 @@
 import { io, Socket } from 'socket.io-client'
+import { decodeMsgpack } from './msgpack'
 
 const WS_URL = process.env.NEXT_PUBLIC_WS_URL || 'ws://localhost:8000'
+// 'msgpack' (binary, smaller) or 'json'; the server falls back to JSON text if it can't do msgpack
+const WS_ENCODING = process.env.NEXT_PUBLIC_WS_ENCODING || 'msgpack'
 
 class WebSocketManager {
   private socket: Socket | null = null
   private token: string | null = null
   private listeners: Map<string, Set<(data: any) => void>> = new Map()
+  private topics: Set<string> = new Set()
+  // Resume point from the server; sent on reconnect so only missed messages are replayed
+  private epoch: string | null = null
+  private lastSeq = 0
 
   connect(token: string) {
-    if (this.socket?.connected) {
+    const current = (this as any).ws
+    if (this.socket?.connected || (current && current.readyState <= WebSocket.OPEN)) {
       return
     }
 
@@ -30,18 +38,28 @@ class WebSocketManager {
       const baseUrl = WS_URL.replace('http://', 'ws://').replace('https://', 'wss://')
       wsUrl = `${baseUrl}/ws?token=${token}`
     }
+    if (WS_ENCODING === 'msgpack') {
+      wsUrl += '&encoding=msgpack'
+    }
+    if (this.epoch) {
+      wsUrl += `&resume=${this.epoch}:${this.lastSeq}`
+    }
     
     console.log('Connecting to WebSocket:', wsUrl.replace(/token=[^&]+/, 'token=***'))
     const ws = new WebSocket(wsUrl)
+    ws.binaryType = 'arraybuffer'
 
     ws.onopen = () => {
       console.log('WebSocket connected')
       this.emit('connected', {})
+      // (Re)join server-side topics after every (re)connect
+      this.topics.forEach((topic) => this.emit('subscribe', { topic }))
     }
 
     ws.onmessage = (event) => {
       try {
-        const data = JSON.parse(event.data)
+        // Text frames are JSON, binary frames are MessagePack
+        const data = typeof event.data === 'string' ? JSON.parse(event.data) : decodeMsgpack(event.data)
         this.handleMessage(data)
       } catch (error) {
         console.error('Error parsing WebSocket message:', error)
@@ -57,12 +75,14 @@ class WebSocketManager {
       console.log('WebSocket disconnected', { code: event.code, reason: event.reason, wasClean: event.wasClean })
       // Only reconnect if not a normal closure and we still have a token
       if (event.code !== 1000 && this.token) {
-        console.log('Reconnecting WebSocket in 3 seconds...')
+        // Jittered so a network blip doesn't bring every client back at the same instant
+        const delay = 1000 + Math.random() * 4000
+        console.log(`Reconnecting WebSocket in ${Math.round(delay / 1000)} seconds...`)
         setTimeout(() => {
           if (this.token) {
             this.connectNative(this.token)
           }
-        }, 3000)
+        }, delay)
       }
     }
 
@@ -71,7 +91,29 @@ class WebSocketManager {
   }
 
   private handleMessage(data: any) {
+    // Several messages queued within the server's coalescing window arrive as one frame
+    if (data.type === 'batch' && Array.isArray(data.data)) {
+      data.data.forEach((message: any) => this.handleMessage(message))
+      return
+    }
+
     const type = data.type
+
+    if (type === 'ping') {
+      this.emit('pong', {})
+      return
+    }
+    if (type === 'connected' && data.epoch) {
+      // Not resumed: the snapshot that follows replaces everything, so start from its position
+      if (!data.resumed) {
+        this.lastSeq = data.seq
+      }
+      this.epoch = data.epoch
+    }
+    if (typeof data.seq === 'number' && type !== 'connected') {
+      this.lastSeq = data.seq
+    }
+
     const handlers = this.listeners.get(type)
     if (handlers) {
       handlers.forEach((handler) => handler(data.data || data))
@@ -105,6 +147,16 @@ class WebSocketManager {
     }
   }
 
+  subscribe(topic: string) {
+    this.topics.add(topic)
+    this.emit('subscribe', { topic })
+  }
+
+  unsubscribe(topic: string) {
+    this.topics.delete(topic)
+    this.emit('unsubscribe', { topic })
+  }
+
   disconnect() {
     const ws = (this as any).ws
     if (ws) {
@@ -113,6 +165,9 @@ class WebSocketManager {
     }
     this.token = null
     this.listeners.clear()
+    this.topics.clear()
+    this.epoch = null
+    this.lastSeq = 0
   }
 }
 